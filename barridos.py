@@ -0,0 +1,298 @@
+###############################################################################
+#BARRIDOS DE PARÁMETROS PARA MAPAS DE SUPERVIVENCIA
+###############################################################################
+
+#Funciones para calcular el radio de equilibrio R_eqM y los límites de la zona
+#habitable R_HZM sobre grillas grandes de parámetros (masa, edad, metalicidad,
+#energía y distancia de la supernova, etc.). La grilla se divide en bloques
+#que se calculan en paralelo en varios procesos.
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import investigando_en_fisica as ief
+
+#Parámetros de los que depende el radio de equilibrio, en el orden en que
+#quedan los ejes de los arrays del barrido
+PARAMETROS = ('t', 'M', 'Z', 'E', 'd', 'n', 'tipo')
+
+#Parámetros de los que dependen la estrella y la zona habitable
+PARAMETROS_ESTRELLA = ('t', 'M', 'Z')
+
+#Número de puntos de la grilla que se calculan en cada bloque
+BLOQUE = 2**16
+
+#Grilla de referencia con la que se mide la desviación de los barridos
+#guardados en float32 respecto a float64 (ver desviacion_dtype)
+GRILLA_REFERENCIA = dict(t=np.geomspace(0.01, 10, 12), M=np.geomspace(0.1, 100, 25),
+                         Z=np.array([0.0001, 0.001, 0.02, 0.03]), E=np.geomspace(1e50, 1e52, 5),
+                         d=np.geomspace(1, 300, 10))
+
+#Resultado de un barrido
+class Barrido:
+    '''
+    Clase con el resultado de un barrido. Los arrays tienen un eje por cada
+    parámetro que se barrió, en el orden de 'dims', y 'ejes' tiene los
+    valores de los parámetros en cada eje. Los parámetros que se dejaron
+    fijos quedan en 'fijos'.
+
+    R_eq: Radio de equilibrio entre los vientos y el remanente (En AU), nan
+          donde no hay raíz dentro de [a, b]
+    valido: Array de booleanos, False donde no hay raíz dentro de [a, b]
+    R_HZ_int y R_HZ_ext: Límites interno y externo de la zona habitable (En
+                         AU). Como solo dependen de t, M y Z tienen largo 1
+                         en los ejes de los demás parámetros (se pueden
+                         comparar con R_eq por broadcasting)
+    protegida: Array de booleanos, True donde los vientos de la estrella
+               protegen toda la zona habitable del remanente (R_eq > R_HZ_ext)
+
+    R_eq, R_HZ_int y R_HZ_ext se guardan con el dtype_salida pedido en
+    barrido (float64 o float32).
+    '''
+
+    def __init__(self, ejes, fijos, R_eq, valido, R_HZ_int, R_HZ_ext, protegida):
+
+        self.ejes = ejes
+        self.fijos = fijos
+        self.R_eq = R_eq
+        self.valido = valido
+        self.R_HZ_int = R_HZ_int
+        self.R_HZ_ext = R_HZ_ext
+        self.protegida = protegida
+
+    @property
+    def dims(self):
+
+        return tuple(self.ejes)
+
+    @property
+    def shape(self):
+
+        return self.R_eq.shape
+
+    @property
+    def dtype(self):
+
+        return self.R_eq.dtype
+
+    @property
+    def nbytes(self):
+        '''
+        Memoria que ocupan los arrays del barrido (En bytes).
+        '''
+
+        return sum(a.nbytes for a in (self.R_eq, self.valido, self.R_HZ_int, self.R_HZ_ext, self.protegida))
+
+    def __repr__(self):
+
+        ejes = ', '.join(f'{k}: {len(v)}' for k, v in self.ejes.items())
+
+        return f'Barrido({ejes})'
+
+    def to_xarray(self):
+        '''
+        Entrega el barrido como un xarray.Dataset (necesita xarray).
+        '''
+
+        import xarray as xr
+
+        dims = self.dims
+        estrella = [k if k in PARAMETROS_ESTRELLA else None for k in dims]
+        dims_HZ = [k for k in estrella if k is not None]
+        corte = tuple(slice(None) if k is not None else 0 for k in estrella)
+
+        return xr.Dataset(
+            {'R_eq': (dims, self.R_eq),
+             'valido': (dims, self.valido),
+             'R_HZ_int': (dims_HZ, self.R_HZ_int[corte]),
+             'R_HZ_ext': (dims_HZ, self.R_HZ_ext[corte]),
+             'protegida': (dims, self.protegida)},
+            coords=self.ejes, attrs=self.fijos)
+
+#Datos que comparten todos los bloques de un barrido. En los procesos del
+#pool se guardan una sola vez al crearlos (ver _iniciar), para no enviarlos
+#con cada bloque
+_datos = None
+
+def _iniciar(datos):
+
+    global _datos
+    _datos = datos
+
+#Cálculo de un bloque de la grilla
+def _bloque(inicio, fin):
+    '''
+    Función que calcula el radio de equilibrio y si la zona habitable está
+    protegida en los puntos de índices (en la grilla aplanada) desde inicio
+    hasta fin. Entrega la tupla (inicio, R_eq, valido, protegida).
+    '''
+
+    forma, valores, R, R_ext, kwargs = _datos
+
+    #Índices de cada eje de los puntos del bloque (sin ejes, la grilla es un
+    #solo punto)
+    indices = np.unravel_index(np.arange(inicio, fin), forma) if forma else ()
+
+    #Valores de los parámetros en los puntos del bloque. Los arrays de la
+    #estrella tienen largo 1 en los ejes que no son de la estrella
+    p = {k: v[indices[i]] if i is not None else v for k, (i, v) in valores.items()}
+    estrella = tuple(ind if R.shape[j] > 1 else 0 for j, ind in enumerate(indices))
+    R, R_ext = R[estrella], R_ext[estrella]
+
+    Req, valido = ief.R_eq_batch(p['t'], p['M'], R, p['E'], p['d'], p['n'], p['tipo'], **kwargs)
+    Req, valido = np.reshape(Req, fin - inicio), np.reshape(valido, fin - inicio)
+
+    #La presión de los vientos disminuye con la distancia, así que los vientos
+    #protegen toda la zona habitable (R_eq > R_HZ_ext) si en el límite externo
+    #su presión es mayor que la del remanente. Esto sirve también donde R_eq
+    #queda fuera de [a, b]
+    viento = ief.StellarWind(p['t'], p['M'], R)
+    protegida = viento.pressure(R_ext) > ief.P_SNR(p['E'], p['d'], p['n'], p['tipo'])
+
+    return inicio, Req, valido, np.broadcast_to(protegida, Req.shape)
+
+#Barrido de parámetros
+def barrido(t, M, Z, E, d, n=0.1, tipo='Ia', workers=None, bloque=BLOQUE, dtype_salida=np.float64, **kwargs):
+    '''
+    Función que calcula el radio de equilibrio R_eqM, los límites de la zona
+    habitable R_HZM y si los vientos protegen la zona habitable sobre una
+    grilla de parámetros. Cada parámetro puede ser un número (queda fijo) o
+    un array de una dimensión (es un eje de la grilla). La grilla se divide en
+    bloques de 'bloque' puntos que se calculan en 'workers' procesos.
+
+    Entrega un objeto Barrido con arrays de N dimensiones (una por cada
+    parámetro que es un array, en el orden t, M, Z, E, d, n, tipo).
+    Depende de:
+
+    t: Tiempo de vida de la estrella en la secuencia principal (En Gyr)
+    M: Masa de la estrella (En Masas solares)
+    Z: Metalicidad de la estrella (adimensional)
+    E: Energía liberada por la supernova (En ergios)
+    d: Distancia a la que ocurre la supernova (En parsecs)
+    n: Número de partículas por centímetro cúbico en el medio
+       interestelar (cm^-3)
+    tipo: String que nos dice si la supernova con la que se está tratando
+          es de tipo Ia o II.
+    workers: Número de procesos (por defecto el número de núcleos). Con
+             workers=1 se calcula en el mismo proceso
+    bloque: Número de puntos de la grilla que calcula cada proceso a la vez
+    dtype_salida: Tipo con que se guardan los arrays de R_eq y de la zona
+                  habitable que se entregan (np.float64 o np.float32). Es
+                  solo el tipo de almacenamiento: todo se calcula en
+                  float64, porque E en ergios (~1e51) no cabe en float32,
+                  R_ZAMS eleva M a 19.5 y la tolerancia de la búsqueda de
+                  raíces (xtol=2e-12) es menor que la resolución de
+                  float32. Los arrays intermedios de cada bloque ocupan a lo
+                  más del orden de 'bloque' elementos, así que en grillas
+                  grandes la memoria la ocupan los resultados, y con
+                  float32 se reduce a cerca de la mitad. Cada valor se
+                  redondea una sola vez al guardarlo, así que la desviación
+                  relativa queda bajo ~6e-8 y 'valido' y 'protegida' no
+                  cambian (ver desviacion_dtype)
+    kwargs: Se pasan a R_eq_batch (a, b, method, xtol, rtol, maxiter)
+    '''
+
+    dtype = np.dtype(dtype_salida)
+    if dtype not in (np.float64, np.float32):
+        raise ValueError('dtype_salida debe ser float64 o float32')
+
+    parametros = dict(t=t, M=M, Z=Z, E=E, d=d, n=n, tipo=tipo)
+
+    #Separamos los ejes de la grilla de los parámetros fijos
+    ejes, fijos = {}, {}
+    for k in PARAMETROS:
+        v = np.asarray(parametros[k])
+        if v.ndim == 0:
+            fijos[k] = v[()]
+        elif v.ndim == 1:
+            ejes[k] = v
+        else:
+            raise ValueError(f'{k} debe ser un número o un array de una dimensión')
+
+    dims = tuple(ejes)
+    forma = tuple(len(v) for v in ejes.values())
+
+    #La estrella y la zona habitable solo dependen de t, M y Z, así que se
+    #calculan una sola vez en la grilla de esos parámetros (con largo 1 en los
+    #ejes de los demás)
+    def eje_estrella(k):
+        if k not in ejes:
+            return fijos[k]
+        i = dims.index(k)
+        return ejes[k].reshape([-1 if j == i else 1 for j in range(len(dims))])
+
+    t_e, M_e, Z_e = [eje_estrella(k) for k in PARAMETROS_ESTRELLA]
+    forma_estrella = np.broadcast_shapes(*[np.shape(v) for v in (t_e, M_e, Z_e)], (1,)*len(dims))
+    R, L, _ = ief.StarTrack(M_e, Z_e).RLT(np.multiply(t_e, 1000))
+    R_HZ_int, R_HZ_ext = ief.R_HZ(L, R)
+    R, R_HZ_int, R_HZ_ext = [np.broadcast_to(v, forma_estrella) for v in (R, R_HZ_int, R_HZ_ext)]
+
+    #Datos que necesita cada bloque: los valores de los parámetros con el
+    #índice del eje al que corresponden (None si son fijos)
+    valores = {k: (dims.index(k), ejes[k]) if k in ejes else (None, fijos[k]) for k in PARAMETROS}
+    datos = (forma, valores, R, R_HZ_ext, kwargs)
+
+    total = int(np.prod(forma))
+    bloques = [(i, min(i + bloque, total)) for i in range(0, total, bloque)]
+
+    R_eq = np.empty(total, dtype=dtype)
+    valido = np.empty(total, dtype=bool)
+    protegida = np.empty(total, dtype=bool)
+
+    def guardar(inicio, Req, val, prot):
+        fin = inicio + Req.size
+        R_eq[inicio:fin], valido[inicio:fin], protegida[inicio:fin] = Req, val, prot
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(bloques))
+
+    if workers <= 1:
+        _iniciar(datos)
+        try:
+            for inicio, fin in bloques:
+                guardar(*_bloque(inicio, fin))
+        finally:
+            _iniciar(None)
+    else:
+        with ProcessPoolExecutor(workers, initializer=_iniciar, initargs=(datos,)) as pool:
+            futuros = [pool.submit(_bloque, inicio, fin) for inicio, fin in bloques]
+            for futuro in as_completed(futuros):
+                guardar(*futuro.result())
+
+    #El radio de la estrella y los límites de la zona habitable se usan en
+    #float64 en los bloques, y solo se redondean al entregarlos
+    return Barrido(ejes, fijos, R_eq.reshape(forma), valido.reshape(forma),
+                   R_HZ_int.astype(dtype, copy=False), R_HZ_ext.astype(dtype, copy=False), protegida.reshape(forma))
+
+#Desviación de los barridos guardados en precisión reducida
+def desviacion_dtype(dtype=np.float32, workers=1, **grilla):
+    '''
+    Función que calcula un barrido de referencia guardado con el dtype dado
+    (ver dtype_salida en barrido) y guardado con float64, y entrega un
+    diccionario con la desviación relativa máxima de R_eq, R_HZ_int y
+    R_HZ_ext (donde los dos son finitos), el número de puntos en que cambian
+    'valido' y 'protegida' (o en que R_eq es nan solo en uno de los dos) y
+    la memoria de cada barrido (En bytes).
+
+    La grilla es GRILLA_REFERENCIA, y sus parámetros (t, M, Z, E, d, n,
+    tipo) se pueden cambiar con los kwargs.
+    '''
+
+    parametros = dict(GRILLA_REFERENCIA, **grilla)
+    base = barrido(**parametros, workers=workers)
+    reducido = barrido(**parametros, workers=workers, dtype_salida=dtype)
+
+    def desviacion(x, y):
+        x = x.astype(np.float64)
+        finitos = np.isfinite(x) & np.isfinite(y)
+        return float(np.max(np.abs(x[finitos]/y[finitos] - 1), initial=0.0))
+
+    return dict(dtype=np.dtype(dtype).name,
+                R_eq=desviacion(reducido.R_eq, base.R_eq),
+                R_HZ_int=desviacion(reducido.R_HZ_int, base.R_HZ_int),
+                R_HZ_ext=desviacion(reducido.R_HZ_ext, base.R_HZ_ext),
+                nan_distintos=int(np.count_nonzero(np.isnan(reducido.R_eq) != np.isnan(base.R_eq))),
+                valido_distintos=int(np.count_nonzero(reducido.valido != base.valido)),
+                protegida_distintos=int(np.count_nonzero(reducido.protegida != base.protegida)),
+                puntos=int(base.R_eq.size), bytes_float64=base.nbytes, bytes_reducido=reducido.nbytes)
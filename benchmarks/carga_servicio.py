@@ -0,0 +1,182 @@
+###############################################################################
+#PRUEBA DE CARGA DEL SERVICIO JSON-RPC
+###############################################################################
+
+#Envía muchas consultas de un punto (R_eqM, R_HZM, L_MS y R_MS) desde varios
+#clientes a la vez a una instancia local de servicio.py, y mide las
+#consultas por segundo y la latencia que ve cada cliente, junto con las
+#estadísticas del servicio (tamaño de los lotes, aciertos del caché).
+#
+#Sin --url se levanta una instancia en un puerto libre y se detiene al
+#terminar:
+#
+#    python benchmarks/carga_servicio.py --clientes 32 --consultas 20000
+#    python benchmarks/carga_servicio.py --url http://localhost:8750
+#
+#Con --repetidas se elige la fracción de consultas que repiten un punto ya
+#consultado (que el servicio responde desde el caché).
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+import numpy as np
+
+#Carpeta del repositorio (donde está servicio.py)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Fracción de cada método en las consultas
+MEZCLA = {'R_eqM': 0.4, 'R_HZM': 0.3, 'L_MS': 0.15, 'R_MS': 0.15}
+
+#Consultas de la prueba
+def consultas(N, repetidas=0.0, semilla=0):
+    '''
+    Función que entrega una lista de N peticiones JSON-RPC (diccionarios)
+    con parámetros realistas al azar. Una fracción 'repetidas' de ellas
+    repite los parámetros de una consulta anterior.
+    '''
+
+    rng = np.random.default_rng(semilla)
+    metodos = rng.choice(list(MEZCLA), N, p=list(MEZCLA.values()))
+    M = rng.uniform(0.5, 2, N)
+    t = rng.uniform(0.01, 1, N)*np.minimum(10, 10*M**-2.5)
+    Z = rng.choice([0.0001, 0.001, 0.004, 0.01, 0.02, 0.03], N)
+    E = 10**rng.uniform(50, 52, N)
+    d = rng.uniform(1, 100, N)
+
+    lista = []
+    for i in range(N):
+        if i > 0 and rng.uniform() < repetidas:
+            j = rng.integers(i)
+        else:
+            j = i
+        if metodos[i] == 'R_eqM':
+            params = [t[j], M[j], Z[j], E[j], d[j]]
+        elif metodos[i] == 'R_HZM':
+            params = [t[j], M[j], Z[j]]
+        else:
+            params = [t[j]*1000, M[j], Z[j]]
+        lista.append(dict(jsonrpc='2.0', id=i, method=str(metodos[i]), params=[float(p) for p in params]))
+
+    return lista
+
+#Instancia local del servicio
+def levantar(ventana=None):
+    '''
+    Función que levanta servicio.py en un puerto libre en otro proceso y
+    entrega la tupla (proceso, url).
+    '''
+
+    comando = [sys.executable, os.path.join(RAIZ, 'servicio.py'), '--puerto', '0']
+    if ventana is not None:
+        comando += ['--ventana', str(ventana)]
+
+    proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True, cwd=RAIZ)
+    linea = proceso.stdout.readline()
+    if not linea:
+        proceso.kill()
+        raise RuntimeError('no se pudo levantar servicio.py')
+
+    return proceso, linea.split()[-1]
+
+#Cliente de la prueba
+def _cliente(url, peticiones, latencias, errores):
+
+    partes = urllib.parse.urlsplit(url)
+    conexion = http.client.HTTPConnection(partes.hostname, partes.port, timeout=60)
+
+    for peticion in peticiones:
+        cuerpo = json.dumps(peticion)
+        inicio = time.perf_counter()
+        conexion.request('POST', '/', cuerpo, {'Content-Type': 'application/json'})
+        respuesta = json.loads(conexion.getresponse().read())
+        latencias.append(time.perf_counter() - inicio)
+        if 'error' in respuesta:
+            errores.append(respuesta['error'])
+
+    conexion.close()
+
+#Prueba de carga
+def prueba(url, N=10**4, clientes=16, repetidas=0.0, semilla=0):
+    '''
+    Función que envía N consultas al servicio en la url dada, repartidas
+    entre 'clientes' hilos que esperan cada respuesta antes de enviar la
+    siguiente, y entrega un diccionario con las consultas por segundo, las
+    latencias (En milisegundos), los errores y las estadísticas del
+    servicio.
+    '''
+
+    lista = consultas(N, repetidas, semilla)
+    latencias, errores = [], []
+    hilos = [threading.Thread(target=_cliente, args=(url, lista[k::clientes], latencias, errores))
+             for k in range(clientes)]
+
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    duracion = time.perf_counter() - inicio
+
+    partes = urllib.parse.urlsplit(url)
+    conexion = http.client.HTTPConnection(partes.hostname, partes.port, timeout=60)
+    conexion.request('GET', '/estadisticas')
+    servicio = json.loads(conexion.getresponse().read())
+    conexion.close()
+
+    latencias = np.array(latencias)*1e3
+    p50, p90, p99 = np.percentile(latencias, [50, 90, 99])
+
+    return dict(consultas=N, clientes=clientes, segundos=duracion, consultas_por_segundo=N/duracion,
+                latencia_media_ms=latencias.mean(), latencia_p50_ms=p50, latencia_p90_ms=p90,
+                latencia_p99_ms=p99, latencia_max_ms=latencias.max(), errores=len(errores),
+                servicio=servicio)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Prueba de carga de servicio.py')
+    parser.add_argument('--url', help='servicio ya levantado (por defecto se levanta uno local)')
+    parser.add_argument('--consultas', type=int, default=10**4, help='número de consultas (por defecto %(default)s)')
+    parser.add_argument('--clientes', type=int, default=16, help='clientes simultáneos (por defecto %(default)s)')
+    parser.add_argument('--repetidas', type=float, default=0.0,
+                        help='fracción de consultas que repiten un punto (por defecto %(default)s)')
+    parser.add_argument('--ventana', type=float, help='ventana de agrupación del servicio levantado (ms)')
+    parser.add_argument('--salida', help='archivo JSON donde se guardan los resultados')
+    args = parser.parse_args(argv)
+
+    proceso = None
+    url = args.url
+    if url is None:
+        proceso, url = levantar(args.ventana)
+
+    try:
+        #Unas consultas para que el servicio cargue todo antes de medir
+        prueba(url, 2*args.clientes, args.clientes, semilla=1)
+        resultado = prueba(url, args.consultas, args.clientes, args.repetidas)
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+
+    servicio = resultado['servicio']
+    print(f"{resultado['consultas']} consultas con {resultado['clientes']} clientes en {resultado['segundos']:.2f} s")
+    print(f"  {resultado['consultas_por_segundo']:.0f} consultas/s, {resultado['errores']} errores")
+    print(f"  latencia (ms): media {resultado['latencia_media_ms']:.2f}, p50 {resultado['latencia_p50_ms']:.2f}, "
+          f"p90 {resultado['latencia_p90_ms']:.2f}, p99 {resultado['latencia_p99_ms']:.2f}, "
+          f"máx {resultado['latencia_max_ms']:.2f}")
+    print(f"  servicio: {servicio['lotes']} lotes, {servicio['puntos_por_lote']:.1f} puntos por lote, "
+          f"{servicio['aciertos_cache']} aciertos del caché")
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultado, f, indent=2)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
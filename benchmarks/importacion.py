@@ -0,0 +1,134 @@
+###############################################################################
+#PRESUPUESTO DE TIEMPO DE IMPORTACIÓN DE investigando_en_fisica
+###############################################################################
+
+#Importa el módulo en procesos nuevos de python con 'python -X importtime' y
+#revisa que el tiempo de importación propio del módulo (sin contar numpy, que
+#por sí solo toma entre 150 y 280 ms según la máquina y varía bastante de un
+#proceso a otro) quede dentro del presupuesto y que no se carguen las
+#librerías pesadas (matplotlib, scipy ni astropy).
+#
+#Uso (desde la carpeta del repositorio):
+#
+#    python benchmarks/importacion.py
+#    python benchmarks/importacion.py --presupuesto 30 --repeticiones 10
+#
+#Termina con código 1 si se pasa del presupuesto o si se carga alguna de las
+#librerías pesadas. El detalle de un import se puede ver directamente con
+#
+#    python -X importtime -c "import investigando_en_fisica"
+
+import argparse
+import os
+import subprocess
+import sys
+
+#Carpeta del repositorio (donde está investigando_en_fisica.py)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Presupuesto por defecto en milisegundos para el tiempo de importar el módulo
+#sin contar numpy (el tiempo acumulado del módulo menos el de numpy). El
+#módulo toma del orden de 10 a 15 ms, así que el presupuesto deja margen para
+#el ruido de la medición y falla si se agrega un import o un cálculo pesado
+PRESUPUESTO_MS = 50
+
+#Imports que no se cuentan en el presupuesto
+EXCLUIDOS = ('numpy',)
+
+#Librerías que no se deben cargar al importar el módulo
+PROHIBIDAS = ('matplotlib', 'scipy', 'astropy')
+
+#Código que se ejecuta en cada proceso nuevo: importa el módulo y escribe las
+#librerías prohibidas que quedaron cargadas
+_CODIGO = (
+    'import sys, investigando_en_fisica; '
+    'print(" ".join(sorted({m.split(".")[0] for m in sys.modules} & set(%r))))'
+    % (PROHIBIDAS,)
+    )
+
+#Medición de una importación
+def medir_importacion():
+    '''
+    Función que importa el módulo en un proceso nuevo de python con
+    'python -X importtime' y entrega el tiempo de importación propio del
+    módulo (el acumulado menos el de los imports de EXCLUIDOS) y el
+    acumulado en milisegundos, la lista de los imports más lentos como tuplas
+    (tiempo acumulado en ms, nombre) y las librerías prohibidas que se
+    cargaron. Arroja un RuntimeError si la salida de -X importtime no tiene
+    la línea del módulo.
+    '''
+
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', _CODIGO],
+                             cwd=RAIZ, capture_output=True, text=True, check=True)
+
+    #Cada línea de -X importtime es 'import time: propio | acumulado | nombre'
+    #con los tiempos en microsegundos
+    tiempos = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, nombre = linea[len('import time:'):].split('|')
+        tiempos.append((int(acumulado)/1000, nombre.rstrip()[1:]))
+
+    #-X importtime indica la profundidad de cada import con la sangría del
+    #nombre (dos espacios por nivel) y escribe cada import después de los
+    #imports que hace. Los imports directos del módulo son entonces los del
+    #segundo nivel que están entre el import anterior del primer nivel y el
+    #del módulo
+    total = None
+    directos = []
+    for t, nombre in tiempos:
+        nivel = (len(nombre) - len(nombre.lstrip()))//2
+        if nivel == 0:
+            if nombre == 'investigando_en_fisica':
+                total = t
+                break
+            directos = []
+        elif nivel == 1:
+            directos.append((t, nombre.strip()))
+
+    #El módulo no aparece si ya estaba importado antes de _CODIGO (por
+    #ejemplo desde sitecustomize) o si python no escribió los tiempos
+    if total is None:
+        raise RuntimeError('la salida de -X importtime no tiene la línea de investigando_en_fisica')
+
+    cargadas = proceso.stdout.split()
+    propio = total - sum(t for t, nombre in directos if nombre in EXCLUIDOS)
+
+    return propio, total, sorted(directos, reverse=True), cargadas
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description='Presupuesto de tiempo de importación de investigando_en_fisica')
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_MS,
+                        help='tiempo máximo de importación sin numpy en ms (por defecto %(default)s)')
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help='número de procesos a medir, se usa el mínimo (por defecto %(default)s)')
+    args = parser.parse_args(argv)
+
+    try:
+        mediciones = [medir_importacion() for _ in range(args.repeticiones)]
+    except RuntimeError as error:
+        print(f'ERROR: {error}')
+        return 1
+    propio, total, directos, cargadas = min(mediciones)
+
+    print(f'Tiempo de importación sin numpy: {propio:.1f} ms (mínimo de {args.repeticiones}, '
+          f'presupuesto {args.presupuesto:.0f} ms; {total:.1f} ms con numpy)')
+    print('Imports más lentos:')
+    for t, nombre in directos[:5]:
+        print(f'  {t:8.1f} ms  {nombre.strip()}')
+
+    ok = True
+    if propio > args.presupuesto:
+        print('ERROR: el tiempo de importación supera el presupuesto')
+        ok = False
+    if cargadas:
+        print('ERROR: se cargaron librerías pesadas al importar: ' + ', '.join(cargadas))
+        ok = False
+
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
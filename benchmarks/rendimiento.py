@@ -0,0 +1,371 @@
+###############################################################################
+#BENCHMARKS DE LAS FUNCIONES DE investigando_en_fisica
+###############################################################################
+
+#Mide el tiempo de todas las funciones públicas del módulo (funciones de la
+#secuencia principal, de los vientos, del remanente, del radio de equilibrio,
+#de la zona habitable y de la atmósfera) con parámetros realistas, como
+#números (escalar) y como arrays de varios tamaños, además de algunos
+#escenarios completos (por ejemplo un barrido de R_eqM de 10^5 puntos).
+#Para cada caso informa las llamadas por segundo y el costo por elemento.
+#
+#Los resultados se pueden guardar en JSON y comparar con los de otro commit:
+#
+#    python benchmarks/rendimiento.py --salida nuevo.json
+#    python benchmarks/rendimiento.py --salida nuevo.json --comparar base.json
+#    python benchmarks/rendimiento.py --comparar base.json nuevo.json
+#
+#Con --filtro se miden solo los casos cuyo nombre contiene el texto dado y
+#con --rapido solo los tamaños pequeños, sin los escenarios. Con --backend
+#numba se miden las funciones con las versiones compiladas de compilado.py.
+
+import argparse
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+import warnings
+import numpy as np
+
+#Carpeta del repositorio (donde está investigando_en_fisica.py)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import investigando_en_fisica as ief
+
+#Tamaños de los arrays (None es el caso escalar, con números de python)
+TAMANOS = (None, 1000, 100000)
+TAMANOS_RAPIDO = (None, 1000)
+
+#Los benchmarks no deben depender de avisos de numpy
+warnings.simplefilter('ignore')
+
+#Parámetros realistas
+def parametros(N, semilla=0):
+    '''
+    Función que entrega un diccionario con parámetros realistas para las
+    funciones: números si N es None y arrays de largo N si no.
+    '''
+
+    rng = np.random.default_rng(semilla)
+
+    def u(a, b):
+        return float((a + b)/2) if N is None else rng.uniform(a, b, N)
+
+    p = dict(
+        M = u(0.6, 1.4),            #Masa de la estrella (Masas solares)
+        Z = 0.02,                   #Metalicidad
+        t = u(0.5, 3.0),            #Edad (Gyr)
+        R = u(0.8, 1.3),            #Radio de la estrella (Radios solares)
+        L = u(0.5, 2.0),            #Luminosidad de la estrella (Luminosidades solares)
+        r = u(0.5, 5.0),            #Distancia a la estrella (AU)
+        E = u(0.5e51, 2e51),        #Energía de la supernova (ergios)
+        d = u(5.0, 50.0),           #Distancia a la supernova (pc)
+        n = 0.1,                    #Densidad del medio interestelar (cm^-3)
+        tipo = 'Ia',
+        R_p = u(0.8, 1.5),          #Radio del planeta (Radios terrestres)
+        M_p = u(0.8, 3.0),          #Masa del planeta (Masas terrestres)
+        P_0 = u(0.5, 2.0),          #Presión atmosférica (atm)
+        s = u(0.0, 3e10),           #Tiempo de paso del remanente (segundos)
+        )
+    p['t_Myr'] = p['t']*1000
+
+    return p
+
+#Casos: nombre de la función y sus argumentos a partir de los parámetros.
+#Las funciones con solo_escalar=True (las que usan brentq) se miden solo con
+#números
+CASOS = [
+    #Secuencia principal
+    ('dseta', lambda p: (p['Z'],)),
+    ('coeficientes', lambda p: (p['Z'],)),
+    ('R_ZAMS', lambda p: (p['M'], p['Z'])),
+    ('M_hook', lambda p: (p['Z'],)),
+    ('t_BGB', lambda p: (p['M'], p['Z'])),
+    ('t_hook', lambda p: (p['M'], p['Z'])),
+    ('t_MS', lambda p: (p['M'], p['Z'])),
+    ('tau', lambda p: (p['t_Myr'], p['M'], p['Z'])),
+    ('R_TMS', lambda p: (p['M'], p['Z'])),
+    ('tau_1', lambda p: (p['t_Myr'], p['M'], p['Z'])),
+    ('tau_2', lambda p: (p['t_Myr'], p['M'], p['Z'])),
+    ('deltaR', lambda p: (p['M'], p['Z'])),
+    ('alpha_R', lambda p: (p['M'], p['Z'])),
+    ('beta_R', lambda p: (p['M'], p['Z'])),
+    ('gamma', lambda p: (p['M'], p['Z'])),
+    ('R_MS', lambda p: (p['t_Myr'], p['M'], p['Z'])),
+    ('L_ZAMS', lambda p: (p['M'], p['Z'])),
+    ('L_TMS', lambda p: (p['M'], p['Z'])),
+    ('deltaL', lambda p: (p['M'], p['Z'])),
+    ('alpha_L', lambda p: (p['M'], p['Z'])),
+    ('beta_L', lambda p: (p['M'], p['Z'])),
+    ('eta', lambda p: (p['M'], p['Z'])),
+    ('L_MS', lambda p: (p['t_Myr'], p['M'], p['Z'])),
+    #Vientos
+    ('T_0', lambda p: (p['M'], p['R'])),
+    ('v_1AU', lambda p: (p['M'], p['R'])),
+    ('dvdr', lambda p: (p['M'], p['R'])),
+    ('v_sw', lambda p: (p['r'], p['M'], p['R'])),
+    ('omega', lambda p: (p['t'], p['M'])),
+    ('M_punto', lambda p: (p['t'], p['M'], p['R'])),
+    ('rho_SW', lambda p: (p['t'], p['r'], p['M'], p['R'])),
+    ('P_SW', lambda p: (p['t'], p['r'], p['M'], p['R'])),
+    #Remanente
+    ('DeltaR_SNR', lambda p: (p['d'],)),
+    ('rho_SNR', lambda p: (p['d'], p['n'], p['tipo'])),
+    ('v_SNR', lambda p: (p['E'], p['d'], p['n'])),
+    ('P_SNR', lambda p: (p['E'], p['d'], p['n'], p['tipo'])),
+    #Radio de equilibrio
+    ('R_eq', lambda p: (p['t'], p['M'], p['R'], p['E'], p['d']), True),
+    ('R_eqM', lambda p: (p['t'], p['M'], p['Z'], p['E'], p['d']), True),
+    ('R_eq_batch', lambda p: (p['t'], p['M'], p['R'], p['E'], p['d'])),
+    ('R_eqM_batch', lambda p: (p['t'], p['M'], p['Z'], p['E'], p['d'])),
+    ('R_eq_grad', lambda p: (p['t'], p['M'], p['R'], p['E'], p['d'])),
+    ('R_eq_sweep', lambda p: (np.ravel(p['t'])[0], np.ravel(p['M'])[0], np.ravel(p['R'])[0], np.ravel(p['E'])[0],
+                              np.linspace(1, 100, np.size(p['d'])))),
+    #Zona habitable
+    ('T_eff', lambda p: (p['L'], p['R'])),
+    ('S_eff', lambda p: (p['L'], p['R'], 'min')),
+    ('R_HZ', lambda p: (p['L'], p['R'])),
+    ('R_HZM', lambda p: (p['t'], p['M'], p['Z'])),
+    ('d_crit', lambda p: (p['t'], p['M'], p['Z'], p['E'])),
+    ('isochrone', lambda p: (p['t'] if np.ndim(p['t']) == 0 else 1.0, p['Z'], p['M'])),
+    #Atmósfera
+    ('M_punto_atm', lambda p: (p['E'], p['d'], p['R_p'])),
+    ('t_cross', lambda p: (p['E'], p['d'])),
+    ('M_atm', lambda p: (p['s'], p['E'], p['d'], p['R_p'], p['M_p'], p['P_0'])),
+    ('dM_atm', lambda p: (p['s'], p['E'], p['d'], p['R_p'])),
+    ('historia_M_atm', lambda p: (p['s'], 10**51, 10, 1, 1, 1)),
+    ('paso_remanente', lambda p: (p['t'], p['M'], p['R'], p['E'], p['d'], p['n'], p['tipo'],
+                                  p['R_p'], 0.03, 1.0, 100, False)),
+    ]
+
+#Casos de funciones con caché LRU: se vacía el caché en cada llamada medida,
+#para medir el cálculo y no los aciertos del caché (que se repetirían en
+#todas las llamadas, porque los argumentos son siempre los mismos)
+CACHES = {
+    'coeficientes': lambda: ief._coeficientes_Z.cache_clear(),
+    'isochrone': lambda: ief._isocrona.cache_clear(),
+    }
+
+#Escenarios completos: nombre, número de elementos y función que prepara la
+#llamada
+def _escenario_R_eqM_batch():
+    p = parametros(10**5)
+    return lambda: ief.R_eqM_batch(p['t'], p['M'], p['Z'], p['E'], p['d'])
+
+def _escenario_R_eqM_bucle():
+    p = parametros(1000)
+    return lambda: [ief.R_eqM(*a) for a in zip(p['t'], p['M'], [p['Z']]*1000, p['E'], p['d'])]
+
+def _escenario_barrido():
+    import barridos
+    M, t = np.linspace(0.6, 1.4, 100), np.linspace(0.5, 3, 50)
+    E, d = np.geomspace(0.5e51, 2e51, 4), np.linspace(5, 50, 5)
+    return lambda: barridos.barrido(t, M, 0.02, E, d, workers=1)
+
+def _escenario_poblacion():
+    import poblaciones
+    return lambda: poblaciones.resumen(poblaciones.poblacion(10**5, semilla=0, Z=0.02))
+
+def _escenario_d_crit():
+    p = parametros(10**4)
+    return lambda: ief.d_crit(p['t'], p['M'], p['Z'], p['E'])
+
+def _escenario_historia():
+    t = np.linspace(0, 3e10, 1000)
+    R_p = np.linspace(0.8, 1.5, 1000)
+    return lambda: ief.historia_M_atm(t, 10**51, 10, R_p, 1, 1)
+
+def _escenario_paso_remanente():
+    p = parametros(1000)
+    return lambda: ief.paso_remanente(p['t'], p['M'], p['R'], p['E'], p['d'], a_p=1.0, pasos=10**4)
+
+ESCENARIOS = [
+    ('R_eqM_batch 1e5 puntos', 10**5, _escenario_R_eqM_batch),
+    ('R_eqM bucle 1e3 puntos', 1000, _escenario_R_eqM_bucle),
+    ('barrido 100x50x4x5', 10**5, _escenario_barrido),
+    ('poblacion 1e5 muestras', 10**5, _escenario_poblacion),
+    ('d_crit 1e4 puntos', 10**4, _escenario_d_crit),
+    ('historia_M_atm 1000x1000', 10**6, _escenario_historia),
+    ('paso_remanente 1000x1e4', 10**7, _escenario_paso_remanente),
+    ]
+
+#Medición de una llamada
+def medir(llamada, tiempo_min=0.2, repeticiones=3):
+    '''
+    Función que entrega el tiempo (En segundos) de una llamada, como el mejor
+    de 'repeticiones' grupos de llamadas que toman al menos tiempo_min
+    segundos cada uno.
+    '''
+
+    cronometro = timeit.Timer(llamada)
+
+    #Número de llamadas por grupo
+    numero = 1
+    while True:
+        t = cronometro.timeit(numero)
+        if t >= tiempo_min:
+            break
+        numero = max(numero*2, int(numero*1.2*tiempo_min/max(t, 1e-9)))
+
+    tiempos = [t] + [cronometro.timeit(numero) for _ in range(repeticiones - 1)]
+
+    return min(tiempos)/numero
+
+def _resultado(nombre, tamano, elementos, segundos):
+
+    return dict(nombre=nombre, tamano=tamano, s_por_llamada=segundos,
+                llamadas_por_s=1/segundos, ns_por_elemento=segundos/elementos*1e9)
+
+def _imprimir(r):
+
+    tamano = 'escalar' if r['tamano'] is None else r['tamano']
+    print(f"{r['nombre']:<28} {tamano:>9} {r['llamadas_por_s']:>14.1f} {r['ns_por_elemento']:>14.1f}", flush=True)
+
+#Todos los benchmarks
+def correr(tamanos=TAMANOS, escenarios=True, filtro='', tiempo_min=0.2):
+    '''
+    Función que mide todos los casos (y los escenarios si escenarios=True)
+    cuyo nombre contiene el texto filtro, y entrega la lista de resultados.
+    '''
+
+    print(f"{'caso':<28} {'tamaño':>9} {'llamadas/s':>14} {'ns/elemento':>14}")
+
+    resultados = []
+    for caso in CASOS:
+        nombre, argumentos = caso[:2]
+        solo_escalar = len(caso) > 2 and caso[2]
+        if filtro not in nombre:
+            continue
+
+        funcion = getattr(ief, nombre)
+        limpiar = CACHES.get(nombre, lambda: None)
+        for N in tamanos:
+            if solo_escalar and N is not None:
+                continue
+            args = argumentos(parametros(N))
+            r = _resultado(nombre, N, N or 1, medir(lambda: (limpiar(), funcion(*args)), tiempo_min))
+            _imprimir(r)
+            resultados.append(r)
+
+    if escenarios:
+        for nombre, elementos, preparar in ESCENARIOS:
+            if filtro not in nombre:
+                continue
+            r = _resultado(nombre, elementos, elementos, medir(preparar(), tiempo_min, repeticiones=2))
+            _imprimir(r)
+            resultados.append(r)
+
+    return resultados
+
+def funciones_sin_benchmark():
+    '''
+    Entrega las funciones públicas del módulo que no tienen un caso.
+    '''
+
+    casos = {c[0] for c in CASOS}
+    publicas = [k for k, v in vars(ief).items() if inspect.isfunction(v)
+                and v.__module__ == ief.__name__ and not k.startswith('_')]
+
+    return [k for k in publicas if k not in casos]
+
+def metadatos(backend='numpy'):
+    '''
+    Entrega un diccionario con el commit, la fecha, las versiones de python
+    y numpy y el backend con los que se corrieron los benchmarks.
+    '''
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return dict(commit=commit, fecha=time.strftime('%Y-%m-%dT%H:%M:%S'),
+                python=platform.python_version(), numpy=np.__version__,
+                maquina=platform.machine(), procesador=platform.processor(),
+                nucleos=os.cpu_count(), backend=backend)
+
+#Comparación de dos archivos de resultados
+def comparar(base, nuevo, umbral=0.2):
+    '''
+    Función que imprime la razón entre los tiempos de los resultados nuevo y
+    base (diccionarios leídos de los JSON) para los casos que están en ambos,
+    marcando los que cambian más que 'umbral' (20% por defecto). Entrega el
+    número de casos más lentos.
+    '''
+
+    tiempos = {(r['nombre'], r['tamano']): r['s_por_llamada'] for r in base['resultados']}
+
+    print(f"\nComparación con {base['metadatos'].get('commit')} (razón > 1: más lento)")
+    print(f"{'caso':<28} {'tamaño':>9} {'razón':>8}")
+
+    lentos = 0
+    for r in nuevo['resultados']:
+        clave = (r['nombre'], r['tamano'])
+        if clave not in tiempos:
+            continue
+        razon = r['s_por_llamada']/tiempos[clave]
+        marca = ''
+        if razon > 1 + umbral:
+            marca = '  más lento'
+            lentos += 1
+        elif razon < 1/(1 + umbral):
+            marca = '  más rápido'
+        tamano = 'escalar' if r['tamano'] is None else r['tamano']
+        print(f"{r['nombre']:<28} {tamano:>9} {razon:>8.2f}{marca}")
+
+    return lentos
+
+def _leer(archivo):
+
+    with open(archivo) as f:
+        return json.load(f)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Benchmarks de investigando_en_fisica')
+    parser.add_argument('--salida', help='archivo JSON donde se guardan los resultados')
+    parser.add_argument('--comparar', nargs='+', metavar='JSON',
+                        help='resultados base con los que se compara (con dos archivos, '
+                             'compara el segundo con el primero sin correr los benchmarks)')
+    parser.add_argument('--filtro', default='', help='mide solo los casos cuyo nombre contiene este texto')
+    parser.add_argument('--rapido', action='store_true', help='solo tamaños pequeños y sin escenarios')
+    parser.add_argument('--tiempo-min', type=float, default=0.2,
+                        help='tiempo mínimo de cada medición en segundos (por defecto %(default)s)')
+    parser.add_argument('--backend', choices=('numpy', 'numba'), default='numpy',
+                        help='backend de las funciones compiladas (ver compilado.py)')
+    args = parser.parse_args(argv)
+
+    if args.comparar and len(args.comparar) == 2:
+        comparar(_leer(args.comparar[0]), _leer(args.comparar[1]))
+        return 0
+
+    faltan = funciones_sin_benchmark()
+    if faltan:
+        print('Funciones sin benchmark: ' + ', '.join(faltan))
+
+    if args.backend != 'numpy':
+        import compilado
+        compilado.usar(args.backend)
+        args.backend = compilado.backend()
+
+    tamanos = TAMANOS_RAPIDO if args.rapido else TAMANOS
+    resultados = dict(metadatos=metadatos(args.backend),
+                      resultados=correr(tamanos, not args.rapido, args.filtro, args.tiempo_min))
+
+    if args.salida:
+        with open(args.salida, 'w') as f:
+            json.dump(resultados, f, indent=1)
+
+    if args.comparar:
+        comparar(_leer(args.comparar[0]), resultados)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,295 @@
+###############################################################################
+#CACHÉ EN DISCO DE RESULTADOS
+###############################################################################
+
+#Caché opcional que guarda en un archivo los resultados de las funciones (por
+#ejemplo R_eqM, R_HZM, L_MS y R_MS), para no volver a calcularlos en otras
+#ejecuciones. Cada resultado se guarda con una clave que es el hash del
+#nombre de la función, sus argumentos (normalizados) y la versión del modelo
+#(investigando_en_fisica.VERSION_MODELO).
+#
+#El caché es una base de datos sqlite, así que varios procesos pueden leerlo
+#y escribirlo a la vez. Tiene un tamaño máximo: cuando se supera se borran
+#los resultados que se usaron hace más tiempo (LRU).
+#
+#Uso:
+#
+#    cache = CacheDisco('resultados.sqlite')
+#    cache.R_eqM(1.0, 1.0, 0.02, 10**51, 10)      #se calcula y se guarda
+#    cache.R_eqM(1.0, 1.0, 0.02, 10**51, 10)      #se lee del disco
+#
+#    @cache.envolver                                #cualquier otra función
+#    def mi_funcion(...):
+#        ...
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import time
+import numpy as np
+import investigando_en_fisica as ief
+
+#Tamaño máximo por defecto del caché (En bytes)
+LIMITE = 2**30
+
+#Precisión (En segundos) de la hora de uso de cada resultado para el LRU
+TOQUE = 60
+
+#Funciones del módulo que el caché trae envueltas
+FUNCIONES = ('R_eqM', 'R_HZM', 'L_MS', 'R_MS')
+
+#Normalización de argumentos
+def _normalizar(x):
+    '''
+    Función que transforma un argumento en un valor que se puede usar en la
+    clave del caché, de modo que argumentos iguales den la misma clave (por
+    ejemplo 1, 1.0 y np.float64(1.0)). Los arrays se representan por su
+    forma y el hash de sus datos como floats (los de strings y de objetos,
+    por sus valores).
+    '''
+
+    if isinstance(x, str):
+        return x
+
+    if isinstance(x, (list, tuple)):
+        return ('tuple', tuple(_normalizar(v) for v in x))
+
+    if isinstance(x, dict):
+        return ('dict', tuple(sorted((k, _normalizar(v)) for k, v in x.items())))
+
+    if x is None or isinstance(x, (bool, np.bool_)):
+        return x
+
+    #Los números (incluso enteros grandes como 10**51) se guardan como float
+    if isinstance(x, (int, float, np.integer, np.floating)):
+        return float(x).hex()
+
+    if isinstance(x, np.ndarray):
+        a = x.astype(float) if x.dtype.kind in 'biuf' else x
+        if a.dtype.kind in 'US':
+            return ('array', a.shape, tuple(a.ravel().tolist()))
+        #Los bytes de un array de objetos son punteros, no los valores, así
+        #que se normaliza cada elemento
+        if a.dtype.kind == 'O':
+            return ('array', a.shape, tuple(_normalizar(v) for v in a.ravel().tolist()))
+        return ('array', a.shape, hashlib.sha256(np.ascontiguousarray(a).tobytes()).hexdigest())
+
+    return repr(x)
+
+#Caché en disco
+class CacheDisco:
+    '''
+    Clase que guarda los resultados de funciones en una base de datos sqlite.
+    Los resultados se guardan solo para las funciones envueltas con
+    envolver(funcion), y el objeto ya trae envueltas R_eqM, R_HZM, L_MS y
+    R_MS como atributos (cache.R_eqM(...), etc.).
+    Depende de:
+
+    ruta: Archivo de la base de datos (se crea si no existe)
+    limite: Tamaño máximo de los resultados guardados (En bytes)
+    version: Versión del modelo que entra en las claves (por defecto
+             investigando_en_fisica.VERSION_MODELO)
+    '''
+
+    def __init__(self, ruta, limite=LIMITE, version=None):
+
+        self.ruta = os.fspath(ruta)
+        self.limite = limite
+        self.version = ief.VERSION_MODELO if version is None else version
+        self.aciertos = 0
+        self.fallos = 0
+        self._conexion = None
+        self._pid = None
+
+        with self._transaccion() as c:
+            c.execute('CREATE TABLE IF NOT EXISTS resultados ('
+                      'clave TEXT PRIMARY KEY, valor BLOB, tamano INTEGER, uso REAL)')
+            c.execute('CREATE INDEX IF NOT EXISTS resultados_uso ON resultados (uso)')
+            c.execute('CREATE TABLE IF NOT EXISTS total (id INTEGER PRIMARY KEY CHECK (id = 0), tamano INTEGER)')
+            c.execute('INSERT OR IGNORE INTO total VALUES (0, 0)')
+
+        for nombre in FUNCIONES:
+            setattr(self, nombre, self.envolver(getattr(ief, nombre)))
+
+    def _conectar(self):
+        '''
+        Entrega la conexión a la base de datos del proceso actual (una
+        conexión no se puede compartir entre procesos, así que se abre una
+        nueva si el objeto pasó a otro proceso).
+        '''
+
+        if self._conexion is None or self._pid != os.getpid():
+            self._conexion = sqlite3.connect(self.ruta, timeout=60, isolation_level=None)
+            self._conexion.execute('PRAGMA journal_mode=WAL')
+            self._conexion.execute('PRAGMA synchronous=NORMAL')
+            self._pid = os.getpid()
+
+        return self._conexion
+
+    def _transaccion(self):
+        '''
+        Entrega un manejador de contexto con una transacción que bloquea la
+        escritura de los demás procesos hasta que termina.
+        '''
+
+        conexion = self._conectar()
+
+        class Transaccion:
+            def __enter__(self):
+                conexion.execute('BEGIN IMMEDIATE')
+                return conexion
+            def __exit__(self, tipo, *_):
+                conexion.execute('COMMIT' if tipo is None else 'ROLLBACK')
+
+        return Transaccion()
+
+    def clave(self, funcion, args, kwargs, firma=None):
+        '''
+        Entrega la clave (hash sha256) de la llamada funcion(*args, **kwargs).
+        Los argumentos se asocian a los parámetros de la función (con sus
+        valores por defecto), de modo que f(1, b=2) y f(1, 2) dan la misma
+        clave. firma es la firma de la función (inspect.signature), si ya se
+        tiene.
+        '''
+
+        try:
+            argumentos = (firma or inspect.signature(funcion)).bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            argumentos = argumentos.arguments
+        except (TypeError, ValueError):
+            argumentos = dict(enumerate(args), **kwargs)
+
+        nombre = f'{funcion.__module__}.{funcion.__qualname__}'
+        texto = repr((self.version, nombre, _normalizar(dict(argumentos))))
+
+        return hashlib.sha256(texto.encode()).hexdigest()
+
+    def leer(self, clave):
+        '''
+        Entrega la tupla (encontrado, valor) del resultado guardado con la
+        clave dada, y marca el resultado como recién usado.
+        '''
+
+        conexion = self._conectar()
+        fila = conexion.execute('SELECT valor, uso FROM resultados WHERE clave = ?', (clave,)).fetchone()
+
+        if fila is None:
+            return False, None
+
+        #Para no escribir en cada lectura, la hora de uso se actualiza solo si
+        #pasó más de TOQUE segundos desde la última vez
+        ahora = time.time()
+        if ahora - fila[1] > TOQUE:
+            conexion.execute('UPDATE resultados SET uso = ? WHERE clave = ?', (ahora, clave))
+
+        return True, pickle.loads(fila[0])
+
+    def escribir(self, clave, valor):
+        '''
+        Guarda un resultado con la clave dada y borra los resultados usados
+        hace más tiempo si el caché supera su tamaño máximo.
+        '''
+
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._transaccion() as c:
+            anterior = c.execute('SELECT tamano FROM resultados WHERE clave = ?', (clave,)).fetchone()
+            c.execute('INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?)', (clave, datos, len(datos), time.time()))
+            c.execute('UPDATE total SET tamano = tamano + ?', (len(datos) - (anterior[0] if anterior else 0),))
+
+            total = c.execute('SELECT tamano FROM total').fetchone()[0]
+            if total > self.limite:
+                self._desalojar(c, total)
+
+    def _desalojar(self, c, total):
+        '''
+        Borra los resultados usados hace más tiempo hasta que el caché queda
+        bajo el 90% de su tamaño máximo (para no tener que borrar en cada
+        escritura).
+        '''
+
+        objetivo = 0.9*self.limite
+        borrar = []
+        for clave, tamano in c.execute('SELECT clave, tamano FROM resultados ORDER BY uso'):
+            if total <= objetivo:
+                break
+            borrar.append((clave,))
+            total -= tamano
+
+        c.executemany('DELETE FROM resultados WHERE clave = ?', borrar)
+        c.execute('UPDATE total SET tamano = ?', (total,))
+
+    def envolver(self, funcion):
+        '''
+        Entrega una versión de la función que guarda sus resultados en el
+        caché. Se puede usar como decorador.
+        '''
+
+        firma = inspect.signature(funcion)
+
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+
+            clave = self.clave(funcion, args, kwargs, firma)
+            encontrado, valor = self.leer(clave)
+
+            if encontrado:
+                self.aciertos += 1
+                return valor
+
+            self.fallos += 1
+            valor = funcion(*args, **kwargs)
+            self.escribir(clave, valor)
+
+            return valor
+
+        return envuelta
+
+    def limpiar(self):
+        '''
+        Borra todos los resultados guardados.
+        '''
+
+        with self._transaccion() as c:
+            c.execute('DELETE FROM resultados')
+            c.execute('UPDATE total SET tamano = 0')
+
+    def estadisticas(self):
+        '''
+        Entrega un diccionario con el número de resultados guardados, su
+        tamaño (En bytes) y los aciertos y fallos de este objeto.
+        '''
+
+        conexion = self._conectar()
+        entradas = conexion.execute('SELECT COUNT(*) FROM resultados').fetchone()[0]
+        tamano = conexion.execute('SELECT tamano FROM total').fetchone()[0]
+
+        return dict(entradas=entradas, tamano=tamano, aciertos=self.aciertos, fallos=self.fallos)
+
+    def cerrar(self):
+        '''
+        Cierra la conexión a la base de datos.
+        '''
+
+        if self._conexion is not None and self._pid == os.getpid():
+            self._conexion.close()
+        self._conexion = None
+
+    def __getstate__(self):
+
+        #La conexión no se copia a otros procesos
+        estado = self.__dict__.copy()
+        estado['_conexion'] = None
+        for nombre in FUNCIONES:
+            estado.pop(nombre, None)
+
+        return estado
+
+    def __setstate__(self, estado):
+
+        self.__dict__.update(estado)
+        for nombre in FUNCIONES:
+            setattr(self, nombre, self.envolver(getattr(ief, nombre)))
@@ -0,0 +1,236 @@
+###############################################################################
+#EVALUACIÓN DE CATÁLOGOS DE SISTEMAS DESDE LA LÍNEA DE COMANDOS
+###############################################################################
+
+#Programa que lee un CSV con un sistema (estrella, supernova y planeta) por
+#fila y escribe otro CSV con las mismas columnas más el radio, la
+#luminosidad y la temperatura de la estrella, los límites de la zona
+#habitable, el radio de equilibrio y la pérdida de atmósfera del planeta.
+#
+#El archivo se lee y se escribe por bloques de filas, así que la memoria no
+#crece con el tamaño del catálogo (sirve para decenas de millones de filas),
+#y cada bloque se calcula con las funciones vectorizadas. Con --workers los
+#bloques se calculan en varios procesos, y la salida queda en el mismo orden
+#que la entrada.
+#
+#Uso:
+#
+#    python catalogo.py sistemas.csv resultados.csv --workers 4
+#    zcat sistemas.csv.gz | python catalogo.py - - > resultados.csv
+#
+#Columnas de la entrada (con encabezado, en cualquier orden):
+#
+#    t: Edad de la estrella (En Gyr)
+#    M: Masa de la estrella (En Masas solares)
+#    Z: Metalicidad de la estrella (adimensional)
+#    E: Energía liberada por la supernova (En ergios)
+#    d: Distancia a la que ocurre la supernova (En parsecs)
+#    n: Densidad del medio interestelar (cm^-3), por defecto 0.1
+#    tipo: Tipo de la supernova ('Ia' o 'II'), por defecto 'Ia'
+#    R_p: Radio del planeta (Radios terrestres), por defecto 1
+#    M_p: Masa del planeta (Masas terrestres), por defecto 1
+#    P_0: Presión atmosférica inicial del planeta (atm), por defecto 1
+#    alpha: Coeficiente de arrastre del planeta, por defecto 0.03
+#
+#Las demás columnas se copian tal cual a la salida. Cada fila del CSV tiene
+#que estar en una sola línea.
+
+import argparse
+import collections
+import csv
+import io
+import itertools
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import investigando_en_fisica as ief
+
+#Número de filas de cada bloque
+FILAS = 2**15
+
+#Columnas obligatorias y valores por defecto de las opcionales
+OBLIGATORIAS = ('t', 'M', 'Z', 'E', 'd')
+OPCIONALES = dict(n=0.1, tipo='Ia', R_p=1.0, M_p=1.0, P_0=1.0, alpha=0.03)
+
+#Columnas que se agregan a la salida
+RESULTADOS = ('R_MS', 'L_MS', 'T_eff', 'R_HZ_int', 'R_HZ_ext', 'R_eq', 'dM_atm', 'M_atm')
+
+#Cálculo de un bloque de sistemas
+def evaluar(t, M, Z, E, d, n=0.1, tipo='Ia', R_p=1, M_p=1, P_0=1, alpha=0.03, **kwargs):
+    '''
+    Función que calcula para cada sistema el radio (En Radios solares), la
+    luminosidad (En Luminosidades solares) y la temperatura efectiva (En K)
+    de la estrella, los límites de la zona habitable (En AU), el radio de
+    equilibrio (En AU, nan si no hay raíz dentro de [a, b]) y la masa
+    atmosférica que pierde el planeta mientras pasa todo el remanente y la
+    que le queda (En kg). Los parámetros son los de las columnas del CSV
+    (arrays o números) y kwargs se pasa a R_eq_batch.
+
+    Entrega un diccionario con un array por cada nombre de RESULTADOS.
+    '''
+
+    #La estrella da el radio, la luminosidad y la temperatura a la vez, con
+    #los coeficientes de cada metalicidad distinta calculados una sola vez
+    R, L, T = ief.StarTrack(M, ief.coeficientes(Z)).RLT(np.multiply(t, 1000))
+    R_HZ_int, R_HZ_ext = ief.R_HZ(L, R)
+    R_eq, _ = ief.R_eq_batch(t, M, R, E, d, n, tipo, **kwargs)
+
+    #Masa perdida y masa que queda después de que pasa todo el remanente
+    dM = ief.dM_atm(np.inf, E, d, R_p, alpha, n, tipo)
+    M_atm = ief.M_atm(np.inf, E, d, R_p, M_p, P_0, alpha, n, tipo)
+
+    return dict(R_MS=R, L_MS=L, T_eff=T, R_HZ_int=R_HZ_int, R_HZ_ext=R_HZ_ext,
+                R_eq=R_eq, dM_atm=dM, M_atm=M_atm)
+
+#Procesamiento de un bloque de líneas del CSV
+def _bloque(encabezado, lineas, kwargs):
+    '''
+    Función que recibe el encabezado (lista de columnas) y un bloque de
+    líneas de la entrada (tuplas (número de línea, texto)), y entrega el
+    texto CSV de la salida de esas filas. Arroja un ValueError si una fila
+    no tiene el mismo número de columnas que el encabezado.
+    '''
+
+    numeros = [numero for numero, _ in lineas]
+    filas = list(csv.reader(linea for _, linea in lineas))
+
+    for numero, fila in zip(numeros, filas):
+        if len(fila) != len(encabezado):
+            raise ValueError(f'la línea {numero} tiene {len(fila)} columnas y el encabezado tiene {len(encabezado)}')
+
+    parametros = {}
+    for j, nombre in enumerate(encabezado):
+        if nombre in OBLIGATORIAS or nombre in OPCIONALES:
+            valores = [fila[j] for fila in filas]
+            parametros[nombre] = np.array(valores) if nombre == 'tipo' else np.array(valores, dtype=float)
+
+    with np.errstate(all='ignore'):
+        resultados = evaluar(**parametros, **kwargs)
+
+    n = len(filas)
+    salida = io.StringIO()
+    escritor = csv.writer(salida, lineterminator='\n')
+    columnas = [np.broadcast_to(resultados[k], (n,)).tolist() for k in RESULTADOS]
+    escritor.writerows(fila + [c[i] for c in columnas] for i, fila in enumerate(filas))
+
+    return salida.getvalue()
+
+#Evaluación de un catálogo
+def procesar(entrada, salida, workers=1, filas=FILAS, progreso=None, **kwargs):
+    '''
+    Función que lee el catálogo de la entrada (archivo de texto abierto) por
+    bloques de 'filas' filas y escribe los resultados en la salida a medida
+    que se calculan, usando 'workers' procesos. Entrega un diccionario con el
+    número de filas, el tiempo total (En segundos) y las filas por segundo.
+    Depende de:
+
+    entrada, salida: Archivos de texto abiertos (CSV con encabezado)
+    workers: Número de procesos (con workers=1 se calcula en el mismo
+             proceso)
+    filas: Número de filas de cada bloque
+    progreso: Función progreso(filas, segundos) que se llama después de
+              escribir cada bloque (por ejemplo para informar el avance)
+    kwargs: Se pasan a R_eq_batch (a, b, method, xtol, rtol, maxiter)
+    '''
+
+    inicio = time.perf_counter()
+    primera = entrada.readline()
+    encabezado = next(csv.reader([primera]), None)
+    if not encabezado:
+        raise ValueError('la entrada no tiene encabezado')
+    encabezado = [c.strip() for c in encabezado]
+
+    faltan = [c for c in OBLIGATORIAS if c not in encabezado]
+    if faltan:
+        raise ValueError(f"faltan las columnas {', '.join(faltan)}")
+    repetidas = [c for c in RESULTADOS if c in encabezado]
+    if repetidas:
+        raise ValueError(f"la entrada ya tiene las columnas {', '.join(repetidas)}")
+
+    csv.writer(salida, lineterminator='\n').writerow(encabezado + list(RESULTADOS))
+
+    #Bloques de líneas con su número en el archivo (sin las líneas vacías)
+    lineas = ((numero, l) for numero, l in enumerate(entrada, 2) if l.strip())
+    bloques = iter(lambda: list(itertools.islice(lineas, filas)), [])
+
+    total = 0
+    def escribir(texto):
+        nonlocal total
+        salida.write(texto)
+        total += texto.count('\n')
+        if progreso is not None:
+            progreso(total, time.perf_counter() - inicio)
+
+    if workers <= 1:
+        for bloque in bloques:
+            escribir(_bloque(encabezado, bloque, kwargs))
+    else:
+        #Se mantienen a lo más 2 bloques por proceso en curso, para que la
+        #memoria no crezca si la lectura es más rápida que el cálculo
+        with ProcessPoolExecutor(workers) as pool:
+            pendientes = collections.deque()
+            for bloque in bloques:
+                pendientes.append(pool.submit(_bloque, encabezado, bloque, kwargs))
+                if len(pendientes) >= 2*workers:
+                    escribir(pendientes.popleft().result())
+            while pendientes:
+                escribir(pendientes.popleft().result())
+
+    duracion = time.perf_counter() - inicio
+
+    return dict(filas=total, segundos=duracion, filas_por_segundo=total/duracion if duracion > 0 else 0.0)
+
+#Informe del avance en stderr
+class _Progreso:
+
+    def __init__(self, intervalo=1.0):
+
+        self.intervalo = intervalo
+        self.ultimo = -np.inf
+
+    def __call__(self, filas, segundos):
+
+        if segundos - self.ultimo >= self.intervalo:
+            self.ultimo = segundos
+            print(f'\r{filas:>12,} filas  {segundos:8.1f} s  {filas/max(segundos, 1e-9):>10,.0f} filas/s',
+                  end='', file=sys.stderr, flush=True)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Evalúa un catálogo CSV de sistemas estrella-supernova-planeta')
+    parser.add_argument('entrada', help="CSV de entrada ('-' para la entrada estándar)")
+    parser.add_argument('salida', help="CSV de salida ('-' para la salida estándar)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help='número de procesos (por defecto %(default)s; 0 para uno por núcleo)')
+    parser.add_argument('--filas', type=int, default=FILAS, help='filas por bloque (por defecto %(default)s)')
+    parser.add_argument('--a', type=float, default=0.0001, help='límite inferior de R_eq en AU (por defecto %(default)s)')
+    parser.add_argument('--b', type=float, default=1000, help='límite superior de R_eq en AU (por defecto %(default)s)')
+    parser.add_argument('--silencioso', action='store_true', help='sin informe de avance')
+    args = parser.parse_args(argv)
+
+    workers = args.workers or os.cpu_count() or 1
+    progreso = None if args.silencioso else _Progreso()
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, newline='')
+    salida = sys.stdout if args.salida == '-' else open(args.salida, 'w', newline='')
+
+    try:
+        resumen = procesar(entrada, salida, workers, args.filas, progreso, a=args.a, b=args.b)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if salida is not sys.stdout:
+            salida.close()
+
+    if not args.silencioso:
+        print(f"\r{resumen['filas']:>12,} filas  {resumen['segundos']:8.1f} s  "
+              f"{resumen['filas_por_segundo']:>10,.0f} filas/s", file=sys.stderr)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
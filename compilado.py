@@ -0,0 +1,630 @@
+###############################################################################
+#BACKEND COMPILADO CON NUMBA (OPCIONAL)
+###############################################################################
+
+#Versiones compiladas con numba de las funciones seccionadas de la secuencia
+#principal (R_TMS, deltaR, alpha_R, beta_R, gamma, deltaL, alpha_L, beta_L y
+#eta), de R_MS y L_MS, y de la búsqueda de raíces de R_eq_batch. En vez de
+#evaluar todas las secciones para todos los elementos y elegir con np.select,
+#cada elemento se calcula en un ciclo compilado (nopython) que evalúa solo su
+#sección, y los ciclos se reparten entre los núcleos (prange).
+#
+#Uso:
+#
+#    import compilado
+#    compilado.usar('numba')     #las funciones del módulo usan este backend
+#    ief.R_eqM_batch(t, M, Z, E, d)
+#    compilado.usar('numpy')     #se vuelve a las funciones originales
+#
+#También se pueden llamar directamente (compilado.R_MS(t, M, Z), etc.). Si
+#numba no está instalado todo funciona igual con las funciones de numpy.
+#
+#Los resultados son los de las funciones de numpy salvo por el redondeo: la
+#diferencia relativa es menor que TOLERANCIA (absoluta en los coeficientes
+#adimensionales, que pueden valer cero), y la función verificar la mide sobre
+#una muestra aleatoria. La primera llamada compila las funciones (unos
+#segundos); el resultado queda guardado en __pycache__ para las siguientes
+#ejecuciones. El número de hilos se elige con numba.set_num_threads o la
+#variable de entorno NUMBA_NUM_THREADS.
+
+import functools
+import warnings
+import weakref
+import numpy as np
+import investigando_en_fisica as ief
+
+try:
+    import numba
+    NUMBA = True
+except ImportError:
+    numba = None
+    NUMBA = False
+
+#Diferencia relativa máxima con las funciones de numpy (absoluta en
+#deltaR, alpha_R, etc. cuando su valor es menor que 1)
+TOLERANCIA = 1e-12
+
+#Funciones del módulo que tienen versión compilada
+FUNCIONES = ('R_TMS', 'deltaR', 'alpha_R', 'beta_R', 'gamma', 'deltaL', 'alpha_L',
+             'beta_L', 'eta', 'R_MS', 'L_MS', 'R_eq_batch')
+
+#Versiones de numpy de las funciones, para volver a ellas
+_NUMPY = {nombre: getattr(ief, nombre) for nombre in FUNCIONES}
+
+#Sin numba las funciones compiladas son funciones normales de python que
+#nunca se llaman (se usan las de numpy)
+if NUMBA:
+    _compilar = numba.njit(cache=True)
+    _compilar_paralelo = numba.njit(cache=True, parallel=True)
+    _prange = numba.prange
+else:
+    _compilar = _compilar_paralelo = lambda funcion: funcion
+    _prange = range
+
+###############################################################################
+#Tabla de coeficientes
+
+#Los coeficientes de la metalicidad se pasan a las funciones compiladas como
+#una tabla con una fila por metalicidad distinta. Los coeficientes a1, ...,
+#a81 van en la columna de su número (las columnas 0 y 27 a 32 no se usan) y
+#los demás a continuación
+_OTROS = ('theta', 'iota', 'kappa', 'lamda', 'mu', 'nu', 'xi', 'omicron', 'pi',
+          'alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta',
+          'X', 'c1', 'M_x', 'y1', 'y2', 'M_hook',
+          'B_deltaR', 'B_alpha_R', 'C_alpha_R', 'B_beta_R', 'C_beta_R', 'B_gamma', 'C_gamma',
+          'B_deltaL', 'B_alpha_L', 'B_beta_L', 'eta_bajo')
+
+COLUMNAS = tuple(f'a{i}' for i in range(82)) + _OTROS
+
+(_THETA, _IOTA, _KAPPA, _LAMDA, _MU, _NU, _XI, _OMICRON, _PI,
+ _ALPHA, _BETA, _GAMMA, _DELTA, _EPSILON, _ZETA, _ETA,
+ _X, _C1, _M_X, _Y1, _Y2, _M_HOOK,
+ _B_DELTAR, _B_ALPHA_R, _C_ALPHA_R, _B_BETA_R, _C_BETA_R, _B_GAMMA, _C_GAMMA,
+ _B_DELTAL, _B_ALPHA_L, _B_BETA_L, _ETA_BAJO) = range(82, len(COLUMNAS))
+
+#Tablas ya armadas para cada objeto de coeficientes
+_tablas = weakref.WeakKeyDictionary()
+
+def _tabla(Z):
+    '''
+    Función que entrega la tupla (tabla, indices) con la tabla de
+    coeficientes de la metalicidad Z (un número, un array o un objeto de
+    coeficientes) y el array de enteros con la fila de la tabla de cada
+    elemento (con la forma de Z).
+    '''
+
+    c = ief.coeficientes(Z)
+
+    if c in _tablas:
+        return _tablas[c]
+
+    if isinstance(c, ief._CoeficientesIndexados):
+        fuente, indices = c._unicos, c._indices.reshape(c._forma)
+    else:
+        fuente = c
+        indices = np.arange(np.size(c.Z)).reshape(np.shape(c.Z))
+
+    forma = np.shape(fuente.Z)
+    tabla = np.full((np.size(fuente.Z), len(COLUMNAS)), np.nan)
+    for j, nombre in enumerate(COLUMNAS):
+        if hasattr(fuente, nombre):
+            tabla[:, j] = np.ravel(np.broadcast_to(getattr(fuente, nombre), forma))
+
+    _tablas[c] = tabla, indices
+
+    return tabla, indices
+
+###############################################################################
+#Fórmulas para un elemento
+
+#Son las mismas fórmulas de investigando_en_fisica, escritas con 'if' para
+#un solo valor de M y la fila k de la tabla de coeficientes. Las potencias
+#enteras se calculan con multiplicaciones (numpy usa pow), por eso los
+#resultados pueden diferir de los de numpy en los últimos bits
+
+#Máximo y mínimo que propagan nan, como np.maximum y np.minimum
+@_compilar
+def _max(x, y):
+
+    if x != x or y != y:
+        return np.nan
+
+    return x if x >= y else y
+
+@_compilar
+def _min(x, y):
+
+    if x != x or y != y:
+        return np.nan
+
+    return x if x <= y else y
+
+@_compilar
+def _R_ZAMS(M, k):
+
+    return ((k[_THETA]*M**2.5 + k[_IOTA]*M**6.5 + k[_KAPPA]*M**11 + k[_LAMDA]*M**19 + k[_MU]*M**19.5)
+            /(k[_NU] + k[_XI]*M**2 + k[_OMICRON]*M**8.5 + M**18.5 + k[_PI]*M**19.5))
+
+@_compilar
+def _tiempos(M, k):
+
+    tbgb = (k[1] + k[2]*M**4 + k[3]*M**5.5 + M**7)/(k[4]*M**2 + k[5]*M**7)
+    mu = _max(0.5, 1.0 - 0.01*_max(k[6]/(M**k[7]), k[8] + k[9]/(M**k[10])))
+    th = mu*tbgb
+
+    return th, _max(th, k[_X]*tbgb)
+
+@_compilar
+def _R_TMS(M, k):
+
+    R_bajo = (k[18] + k[19]*M**k[21])/(k[20] + M**k[22])
+    if M < 0.5:
+        R_bajo = _max(R_bajo, 1.5*_R_ZAMS(M, k))
+
+    if M <= k[17]:
+        return R_bajo
+    if M < k[_M_X]:
+        return ((k[_Y2] - k[_Y1])/(k[_M_X] - k[17]))*(M - k[17]) + k[_Y1]
+
+    return (k[_C1]*M**3 + k[23]*M**k[26] + k[24]*M**(k[26] + 1.5))/(k[25] + M**5)
+
+@_compilar
+def _deltaR(M, k):
+
+    m, a42, a43 = k[_M_HOOK], k[42], k[43]
+
+    if M <= m:
+        return 0.0
+    if M <= a42:
+        return a43*np.sqrt((M - m)/(a42 - m))
+    if M < 2.0:
+        return a43 + (k[_B_DELTAR] - a43)*((M - a42)/(2.0 - a42))**k[44]
+
+    return ((k[38] + k[39]*M**3.5)/(k[40]*M**3 + M**k[41])) - 1.0
+
+@_compilar
+def _alpha_R(M, k):
+
+    a62, a63, a64, a66, a67, a68 = k[62], k[63], k[64], k[66], k[67], k[68]
+
+    if M < 0.50:
+        return a62
+    if M < 0.65:
+        return a62 + (((a63 - a62)*(M - 0.5))/0.15)
+    if M < a68:
+        return a63 + ((a64 - a63)*(M - 0.65))/(a68 - 0.65)
+    if M < a66:
+        return a64 + ((k[_B_ALPHA_R] - a64)*(M - a68))/(a66 - a68)
+    if M <= a67:
+        return (k[58]*M**k[60])/(k[59] + M**k[61])
+
+    return k[_C_ALPHA_R] + k[65]*(M - a67)
+
+@_compilar
+def _beta_R(M, k):
+
+    a72, a74 = k[72], k[74]
+
+    if M <= 1.0:
+        beta = 1.06
+    elif M < a74:
+        beta = 1.06 + ((a72 - 1.06)*(M - 1.0))/(a74 - 1.06)
+    elif M < 2.0:
+        beta = a72 + ((k[_B_BETA_R] - a72)*(M - a74))/(2.0 - a74)
+    elif M <= 16.0:
+        beta = (k[69]*M**3.5)/(k[70] + M**k[71])
+    else:
+        beta = k[_C_BETA_R] + k[73]*(M - 16.0)
+
+    return beta - 1
+
+@_compilar
+def _gamma(M, k):
+
+    a75, B, C = k[75], k[_B_GAMMA], k[_C_GAMMA]
+
+    if M <= 1.0:
+        return k[76] + k[77]*(M - k[78])**k[79]
+    if M <= a75:
+        return B + (k[80] - B)*((M - 1.0)/(a75 - 1.0))**k[81]
+    if M < (a75 + 0.1):
+        return C - 10.0*(M - a75)*C
+
+    return 0.0
+
+@_compilar
+def _L_ZAMS(M, k):
+
+    return ((k[_ALPHA]*M**5.5 + k[_BETA]*M**11)
+            /(k[_GAMMA] + M**3 + k[_DELTA]*M**5 + k[_EPSILON]*M**7 + k[_ZETA]*M**8 + k[_ETA]*M**9.5))
+
+@_compilar
+def _L_TMS(M, k):
+
+    return (k[11]*M**3 + k[12]*M**4 + k[13]*M**(k[16] + 1.8))/(k[14] + k[15]*M**5 + M**k[16])
+
+@_compilar
+def _deltaL(M, k):
+
+    m, a33 = k[_M_HOOK], k[33]
+
+    if M <= m:
+        return 0.0
+    if M < a33:
+        return k[_B_DELTAL]*((M - m)/(a33 - m))**0.4
+
+    return _min(k[34]/(M**k[35]), k[36]/(M**k[37]))
+
+@_compilar
+def _alpha_L(M, k):
+
+    a49, a50, a51, a52, a53 = k[49], k[50], k[51], k[52], k[53]
+
+    if M < 0.50:
+        return a49
+    if M < 0.7:
+        return a49 + 5.0*(0.3 - a49)*(M - 0.5)
+    if M < a52:
+        return 0.3 + ((a50 - 0.3)*(M - 0.7))/(a52 - 0.7)
+    if M < a53:
+        return a50 + ((a51 - a50)*(M - a52))/(a53 - a52)
+    if M < 2.0:
+        return a51 + ((k[_B_ALPHA_L] - a51)*(M - a53))/(2.0 - a53)
+
+    return (k[45] + k[46]*M**k[48])/(M**0.4 + k[47]*M**1.9)
+
+@_compilar
+def _beta_L(M, k):
+
+    beta = _max(0.0, k[54] - k[55]*M**k[56])
+
+    if M > k[57] and beta > 0:
+        B = k[_B_BETA_L]
+        beta = _max(0.0, B - 10.0*(M - k[57])*B)
+
+    return beta
+
+@_compilar
+def _eta(M, k):
+
+    if k[_ETA_BAJO] != 1.0:
+        return 10.0
+    if M <= 1.0:
+        return 10.0
+    if M < 1.1:
+        return 100*M - 90
+
+    return 20.0
+
+@_compilar
+def _taus(t, th, tms):
+
+    ta1 = _min(1.0, t/th)
+    ta2 = _max(0.0, _min(1.0, (t - (1.0 - 0.01)*th)/(0.01*th)))
+
+    return t/tms, ta1, ta2
+
+@_compilar
+def _R_MS(t, M, k):
+
+    r_ZAMS = _R_ZAMS(M, k)
+    a_R = _alpha_R(M, k)
+    b_R = _beta_R(M, k)
+    g_R = _gamma(M, k)
+    th, tms = _tiempos(M, k)
+    ta, ta1, ta2 = _taus(t, th, tms)
+
+    exp = (a_R*ta + b_R*ta**10 + g_R*ta**40 + (np.log10(_R_TMS(M, k)/r_ZAMS) - a_R - b_R - g_R)*ta**3
+           - _deltaR(M, k)*(ta1**3 - ta2**3))
+
+    return r_ZAMS*10.0**exp
+
+@_compilar
+def _L_MS(t, M, k):
+
+    l_ZAMS = _L_ZAMS(M, k)
+    a_L = _alpha_L(M, k)
+    b_L = _beta_L(M, k)
+    th, tms = _tiempos(M, k)
+    ta, ta1, ta2 = _taus(t, th, tms)
+
+    exp = (a_L*ta + b_L*ta**_eta(M, k) + (np.log10(_L_TMS(M, k)/l_ZAMS) - a_L - b_L)*ta**2
+           - _deltaL(M, k)*(ta1**2 - ta2**2))
+
+    return l_ZAMS*10.0**exp
+
+###############################################################################
+#Ciclos paralelos
+
+#Número de cada función de M en el ciclo _ciclo_M
+_CODIGOS = {'R_TMS': 0, 'deltaR': 1, 'alpha_R': 2, 'beta_R': 3, 'gamma': 4,
+            'deltaL': 5, 'alpha_L': 6, 'beta_L': 7, 'eta': 8}
+_FORMULAS = (_R_TMS, _deltaR, _alpha_R, _beta_R, _gamma, _deltaL, _alpha_L, _beta_L, _eta)
+
+@_compilar_paralelo
+def _ciclo_M(codigo, M, indices, tabla, salida):
+
+    for i in _prange(M.size):
+        m, k = M[i], tabla[indices[i]]
+        if codigo == 0:
+            salida[i] = _R_TMS(m, k)
+        elif codigo == 1:
+            salida[i] = _deltaR(m, k)
+        elif codigo == 2:
+            salida[i] = _alpha_R(m, k)
+        elif codigo == 3:
+            salida[i] = _beta_R(m, k)
+        elif codigo == 4:
+            salida[i] = _gamma(m, k)
+        elif codigo == 5:
+            salida[i] = _deltaL(m, k)
+        elif codigo == 6:
+            salida[i] = _alpha_L(m, k)
+        elif codigo == 7:
+            salida[i] = _beta_L(m, k)
+        else:
+            salida[i] = _eta(m, k)
+
+@_compilar_paralelo
+def _ciclo_tM(codigo, t, M, indices, tabla, salida):
+
+    for i in _prange(M.size):
+        if codigo == 0:
+            salida[i] = _R_MS(t[i], M[i], tabla[indices[i]])
+        else:
+            salida[i] = _L_MS(t[i], M[i], tabla[indices[i]])
+
+#Método de Chandrupatla para un elemento, igual que _raiz_vectorizada con la
+#diferencia de presiones de R_eq_batch
+@_compilar
+def _diferencia(r, v1, dvdr_au, M_punto_si, P, au):
+
+    r_si = r*au
+    v_si = (v1 + (r - 1)*dvdr_au)*10.0**3
+    rho = M_punto_si/(4*np.pi*v_si*r_si**2)
+
+    return rho*(v_si)**2 - P
+
+@_compilar
+def _raiz(v1, dvdr_au, M_punto_si, P, a, b, au, xtol, rtol, maxiter):
+
+    fa = _diferencia(a, v1, dvdr_au, M_punto_si, P, au)
+    fb = _diferencia(b, v1, dvdr_au, M_punto_si, P, au)
+
+    if not np.sign(fa)*np.sign(fb) <= 0:
+        return np.nan, False
+    if fa == 0:
+        return a, True
+    if fb == 0:
+        return b, True
+
+    c, fc = a, fa
+    t = 0.5
+
+    for _ in range(maxiter):
+
+        xt = a + t*(b - a)
+        ft = _diferencia(xt, v1, dvdr_au, M_punto_si, P, au)
+
+        if np.sign(ft) == np.sign(fa):
+            c, fc = a, fa
+        else:
+            c, fc = b, fb
+            b, fb = a, fa
+        a, fa = xt, ft
+
+        if abs(fa) < abs(fb):
+            xm, fm = a, fa
+        else:
+            xm, fm = b, fb
+        tol = (xtol + rtol*abs(xm))/4
+        tlim = tol/abs(b - c)
+
+        if tlim > 0.5 or fm == 0:
+            return xm, True
+
+        xi = (a - b)/(c - b)
+        phi = (fa - fb)/(fc - fb)
+        if phi**2 < xi and (1 - phi)**2 < 1 - xi:
+            t = fa/(fb - fa)*fc/(fb - fc) + (c - a)/(b - a)*fa/(fc - fa)*fb/(fc - fb)
+        else:
+            t = 0.5
+        t = _min(1 - tlim, _max(tlim, t))
+
+    return np.nan, False
+
+@_compilar_paralelo
+def _ciclo_raiz(v1, dvdr_au, M_punto_si, P, a, b, au, xtol, rtol, maxiter, raiz, valido):
+
+    for i in _prange(v1.size):
+        raiz[i], valido[i] = _raiz(v1[i], dvdr_au[i], M_punto_si[i], P[i], a[i], b[i], au, xtol, rtol, maxiter)
+
+###############################################################################
+#Funciones públicas
+
+def _respaldo(funcion):
+    '''
+    Decorador que entrega la versión de numpy de la función si numba no está
+    instalado.
+    '''
+
+    return funcion if NUMBA else _NUMPY[funcion.__name__]
+
+def _plano(x, forma):
+
+    #Siempre se copia: np.broadcast_to (y np.broadcast_arrays) entregan vistas
+    #de solo lectura que numba compila aparte (y con las que avisa)
+    return np.array(np.broadcast_to(x, forma), dtype=float, copy=True).ravel()
+
+def _funcion_M(nombre):
+    '''
+    Entrega la versión compilada de la función de M y Z con el nombre dado.
+    '''
+
+    codigo = _CODIGOS[nombre]
+    formula = _FORMULAS[codigo]
+
+    @functools.wraps(_NUMPY[nombre])
+    def funcion(M, Z):
+
+        tabla, indices = _tabla(Z)
+
+        #Con números se evalúa la fórmula directamente, sin el ciclo
+        if indices.ndim == 0 and np.ndim(M) == 0:
+            return np.float64(formula(float(M), tabla[indices]))
+
+        forma = np.broadcast_shapes(np.shape(M), indices.shape)
+        salida = np.empty(forma)
+        _ciclo_M(codigo, _plano(M, forma), np.broadcast_to(indices, forma).ravel(), tabla, salida.reshape(-1))
+
+        return ief._escalar(salida)
+
+    funcion.__module__ = __name__
+
+    return _respaldo(funcion)
+
+R_TMS = _funcion_M('R_TMS')
+deltaR = _funcion_M('deltaR')
+alpha_R = _funcion_M('alpha_R')
+beta_R = _funcion_M('beta_R')
+gamma = _funcion_M('gamma')
+deltaL = _funcion_M('deltaL')
+alpha_L = _funcion_M('alpha_L')
+beta_L = _funcion_M('beta_L')
+eta = _funcion_M('eta')
+
+def _funcion_tM(codigo, t, M, Z):
+
+    tabla, indices = _tabla(Z)
+
+    if indices.ndim == 0 and np.ndim(t) == 0 and np.ndim(M) == 0:
+        return np.float64((_R_MS, _L_MS)[codigo](float(t), float(M), tabla[indices]))
+    forma = np.broadcast_shapes(np.shape(t), np.shape(M), indices.shape)
+    salida = np.empty(forma)
+    _ciclo_tM(codigo, _plano(t, forma), _plano(M, forma), np.broadcast_to(indices, forma).ravel(),
+              tabla, salida.reshape(-1))
+
+    return ief._escalar(salida)
+
+@_respaldo
+def R_MS(t, M, Z):
+    '''
+    Versión compilada de investigando_en_fisica.R_MS: radio de una estrella
+    en la secuencia principal (En radios solares) con t en Myr.
+    '''
+
+    return _funcion_tM(0, t, M, Z)
+
+@_respaldo
+def L_MS(t, M, Z):
+    '''
+    Versión compilada de investigando_en_fisica.L_MS: luminosidad de una
+    estrella en la secuencia principal (En luminosidades solares) con t en
+    Myr.
+    '''
+
+    return _funcion_tM(1, t, M, Z)
+
+@_respaldo
+def R_eq_batch(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, method='bracket', xtol=2e-12, rtol=4*np.finfo(float).eps, maxiter=100):
+    '''
+    Versión compilada de investigando_en_fisica.R_eq_batch: entrega la tupla
+    (R_eq, valido) con los mismos parámetros. Con method='bracket' cada raíz
+    se busca con el método de Chandrupatla en un ciclo compilado; con
+    method='analytic' se usa la función de numpy.
+    '''
+
+    if method != 'bracket':
+        return _NUMPY['R_eq_batch'](t, M, R, E, d, n, tipo, a, b, method, xtol, rtol, maxiter)
+
+    #a y b solo entran en la forma, y se llevan a ella con _plano
+    forma = np.broadcast_shapes(*[np.shape(p) for p in (t, M, R, E, d, n, tipo, a, b)])
+    t, M, R, E, d, n, tipo = [np.ravel(np.broadcast_to(p, forma)) for p in (t, M, R, E, d, n, tipo)]
+
+    #Los vientos y la presión del remanente se calculan con numpy (no
+    #dependen de r), y solo la búsqueda de la raíz es compilada
+    viento = ief.StellarWind(t, M, R)
+    v1, dvdr_au, M_punto_si = [_plano(p, t.shape) for p in (viento.v_1AU, viento.dvdr_au, viento.M_punto_si)]
+    P = _plano(ief.P_SNR(E, d, n, tipo), t.shape)
+
+    Req = np.empty(t.size)
+    valido = np.empty(t.size, dtype=bool)
+    _ciclo_raiz(v1, dvdr_au, M_punto_si, P, _plano(a, forma), _plano(b, forma), ief.SI.au,
+                float(xtol), float(rtol), int(maxiter), Req, valido)
+
+    return Req.reshape(forma), valido.reshape(forma)
+
+###############################################################################
+#Elección del backend
+
+_backend = 'numpy'
+
+def usar(backend):
+    '''
+    Función que elige el backend de las funciones del módulo
+    investigando_en_fisica que tienen versión compilada (ver FUNCIONES):
+    'numba' las reemplaza por las de este archivo y 'numpy' vuelve a las
+    originales. Las demás funciones del módulo (R_eqM_batch, StarTrack,
+    R_HZM, etc.) usan el backend elegido cuando llaman a estas. Si numba no
+    está instalado se avisa y se queda en 'numpy'.
+
+    Entrega el nombre del backend que estaba antes, para poder volver a él.
+    '''
+
+    global _backend
+
+    if backend not in ('numba', 'numpy'):
+        raise ValueError("backend debe ser 'numba' o 'numpy'")
+
+    if backend == 'numba' and not NUMBA:
+        warnings.warn('numba no está instalado, se usa el backend de numpy')
+        backend = 'numpy'
+
+    funciones = globals() if backend == 'numba' else _NUMPY
+    for nombre in FUNCIONES:
+        setattr(ief, nombre, funciones[nombre])
+
+    anterior, _backend = _backend, backend
+
+    return anterior
+
+def backend():
+    '''
+    Entrega el nombre del backend elegido con usar ('numba' o 'numpy').
+    '''
+
+    return _backend
+
+def verificar(N=10**5, semilla=0):
+    '''
+    Función que compara las funciones compiladas con las de numpy en N
+    puntos aleatorios (masas entre 0.1 y 100, metalicidades entre 0.0001 y
+    0.03, edades en la secuencia principal y supernovas entre 1 y 100 pc) y
+    entrega un diccionario {funcion: diferencia relativa máxima}. En los
+    coeficientes adimensionales (deltaR, alpha_R, ..., eta) la diferencia
+    es absoluta donde su valor es menor que 1. Los puntos donde ambas dan nan
+    no cuentan, y si solo una da nan la diferencia es infinita.
+    '''
+
+    rng = np.random.default_rng(semilla)
+    M = 10**rng.uniform(-1, 2, N)
+    Z = 10**rng.uniform(-4, np.log10(0.03), N)
+    t = rng.uniform(0, 1, N)*ief.t_MS(M, Z)
+    R = _NUMPY['R_MS'](t, M, Z)
+    E = 10**rng.uniform(50, 52, N)
+    d = 10**rng.uniform(0, 2, N)
+
+    def diferencia(x, y, minimo=0.0):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dif = np.where((x == y) | (np.isnan(x) & np.isnan(y)), 0.0, np.abs(x - y)/np.maximum(np.abs(y), minimo))
+        return float(np.max(np.where(np.isnan(dif), np.inf, dif)))
+
+    resultado = {}
+    for nombre in FUNCIONES[:9]:
+        resultado[nombre] = diferencia(globals()[nombre](M, Z), _NUMPY[nombre](M, Z), 0.0 if nombre == 'R_TMS' else 1.0)
+    for nombre in ('R_MS', 'L_MS'):
+        resultado[nombre] = diferencia(globals()[nombre](t, M, Z), _NUMPY[nombre](t, M, Z))
+    resultado['R_eq_batch'] = diferencia(R_eq_batch(t/1000, M, R, E, d)[0],
+                                         _NUMPY['R_eq_batch'](t/1000, M, R, E, d)[0])
+
+    return resultado
@@ -4,11 +4,120 @@
 
 #Autor: Alejandro Mauricio Guzmán Antonucci, estudiante PUCV :)
 
+import functools
+import importlib
+import types
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy import optimize
-import astropy.units as u
-import astropy.constants as cons
+
+#Versión del modelo físico. Se debe cambiar cada vez que cambie el resultado
+#de alguna función, para que los resultados guardados (ver cache_disco.py) de
+#versiones anteriores no se vuelvan a usar
+VERSION_MODELO = '2022.1'
+
+#Las librerías pesadas (astropy y scipy) no se importan al importar el módulo,
+#sino la primera vez que se necesitan, para que importar el módulo sea rápido.
+#astropy solo se usa para llenar la tabla de constantes SI y scipy solo para el
+#método de Brent de R_eq. matplotlib no lo usa ninguna función. Los nombres que
+#antes importaba el módulo (u, cons, optimize y plt) se pueden seguir usando
+#como atributos del módulo, y se importan al pedirlos
+_modulos_diferidos = {
+    'u': 'astropy.units',
+    'cons': 'astropy.constants',
+    'optimize': 'scipy.optimize',
+    'plt': 'matplotlib.pyplot',
+    }
+
+def __getattr__(nombre):
+    
+    if nombre in _modulos_diferidos:
+        modulo = importlib.import_module(_modulos_diferidos[nombre])
+        globals()[nombre] = modulo
+        return modulo
+    
+    raise AttributeError(f'module {__name__!r} has no attribute {nombre!r}')
+
+#Tabla de constantes físicas y factores de conversión
+def _constantes_SI():
+    '''
+    Función que entrega una tabla (un objeto con atributos) con las
+    constantes físicas y factores de conversión que usan las funciones, como
+    números (floats) en unidades del SI. Los valores se obtienen de astropy
+    una sola vez, para no leer las constantes de astropy ni convertir 
+    unidades cada vez que se evalúa una función.
+    '''
+    
+    import astropy.units as u
+    import astropy.constants as cons
+    
+    return types.SimpleNamespace(
+        G = cons.G.value,                       #Constante gravitacional (N*m**2/kg**2)
+        m_p = cons.m_p.value,                   #Masa de un protón (kg)
+        k_B = cons.k_B.value,                   #Constante de Boltzmann (J/K)
+        sigma_sb = cons.sigma_sb.value,         #Constante de Stefan-Boltzmann (W/(m**2*K**4))
+        M_sun = cons.M_sun.value,               #Masa solar (kg)
+        R_sun = cons.R_sun.value,               #Radio solar (m)
+        L_sun = cons.L_sun.value,               #Luminosidad solar (W)
+        M_earth = cons.M_earth.value,           #Masa terrestre (kg)
+        R_earth = cons.R_earth.value,           #Radio terrestre (m)
+        au = cons.au.value,                     #Unidad astronómica (m)
+        pc = cons.pc.value,                     #Parsec (m)
+        atm = cons.atm.value,                   #Atmósfera (Pa)
+        yr = u.yr.to(u.s),                      #Año (s)
+        R_sun_au = (cons.R_sun.to(u.AU)).value, #Radio solar (AU)
+        #Unidad de pérdida de masa de los vientos, 1.4e-14 Msol/año, en kg/s
+        M_punto_sol = (((1.4*1e-14)*cons.M_sun)/(1*u.yr.to(u.s))).value,
+        )
+
+#La tabla se llena la primera vez que se lee una constante (es en ese momento
+#cuando se importa astropy). Después de eso las constantes quedan guardadas
+#como atributos normales y leerlas no tiene costo extra
+class _TablaSI:
+    
+    def __getattr__(self, nombre):
+        
+        if nombre.startswith('__'):
+            raise AttributeError(nombre)
+        
+        self.__dict__.update(vars(_constantes_SI()))
+        
+        return object.__getattribute__(self, nombre)
+
+SI = _TablaSI()
+
+#Las funciones paramétricas están escritas con operaciones de numpy, de modo que
+#aceptan tanto números como arrays de numpy (con broadcasting) en sus
+#parámetros. Las secciones de las funciones seccionadas se eligen con np.where
+#y np.select en vez de 'if statements'. Como todas las secciones se evalúan
+#para todos los elementos, algunas pueden dar nan o infinito en elementos donde
+#no se usan, por eso silenciamos esos avisos dentro de estas funciones.
+_sin_avisos = dict(divide='ignore', invalid='ignore', over='ignore')
+
+#Función auxiliar para trabajar con arrays
+def _array(x):
+    '''
+    Función que transforma x en un array de numpy de tipo float (si x ya es un
+    array de floats se entrega tal cual, sin copiarlo).
+    '''
+
+    x = np.asarray(x)
+
+    if x.dtype.kind != 'f':
+        x = x.astype(float)
+
+    return x
+
+#Función auxiliar para entregar números cuando se evalúa con números
+def _escalar(x):
+    '''
+    Función que transforma un array de dimensión cero en un número, para que
+    las funciones entreguen un número cuando se evalúan con números y un array
+    cuando se evalúan con arrays.
+    '''
+
+    if isinstance(x, np.ndarray) and x.ndim == 0:
+        return x[()]
+
+    return x
 
 #Variable dseta que es de utilidad en las siguientes funciones
 def dseta(Z):
@@ -23,6 +132,323 @@ def dseta(Z):
     
     return np.log10(Z/0.02)
 
+#Coeficientes de las fórmulas de ajuste que dependen solo de la metalicidad
+class CoeficientesZ:
+    '''
+    Clase que calcula y guarda todos los coeficientes de las fórmulas de la
+    secuencia principal que dependen solo de la metalicidad de la estrella
+    (los polinomios en dseta y sus condiciones), junto con los límites en masa
+    de las funciones seccionadas (M_hook, a17, M_x, a42, a66, a67, a68, ...) y
+    los valores de las funciones en esos límites.
+
+    De esta forma los coeficientes se calculan una sola vez por metalicidad y
+    no en cada llamada a las funciones. Normalmente no se usa directamente,
+    sino a través de la función coeficientes(Z), que guarda los objetos ya
+    calculados.
+    Depende de:
+
+    Z: Metalicidad de la estrella (número o array de numpy)
+    '''
+
+    @np.errstate(**_sin_avisos)
+    def __init__(self, Z):
+
+        x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
+
+        #Obtenemos sigma, que es el logaritmo de la metalicidad
+        sigma = np.log10(Z)
+
+        self.Z = Z
+        self.x = x
+
+        #Potencias de dzeta, que se usan en casi todos los polinomios (se
+        #calculan una sola vez, lo que importa cuando Z es un array grande)
+        x2, x3, x4 = x**2, x**3, x**4
+
+        #######################################################################
+        #Coeficientes de R_ZAMS
+        self.theta   =  1.71535900 + 0.62246212*x -  0.92557761*x2 -  1.16996966*x3 - 0.30631491*x4
+        self.iota    =  6.59778800 - 0.42450044*x - 12.13339427*x2 - 10.73509484*x3 - 2.51487077*x4
+        self.kappa   = 10.08855000 - 7.11727086*x - 31.67119479*x2 - 24.24848322*x3 - 5.33608972*x4
+        self.lamda   =  1.01249500 + 0.32699690*x -  0.00923418*x2 -  0.03876858*x3 - 0.00412750*x4
+        self.mu      =  0.07490166 + 0.02410413*x +  0.07233664*x2 +  0.03040467*x3 + 0.00197741*x4
+        self.nu      =  0.01077422
+        self.xi      =  3.08223400 + 0.94472050*x -  2.15200882*x2 -  2.49219496*x3 - 0.63848738*x4
+        self.omicron = 17.84778000 - 7.45345690*x - 48.96066856*x2 - 40.05386135*x3 - 9.09331816*x4
+        self.pi      =  0.00022582 - 0.00186899*x +  0.00388783*x2 +  0.00142402*x3 - 0.00007671*x4
+
+        #######################################################################
+        #Coeficientes de L_ZAMS
+        self.alpha   = 0.39704170 -  0.32913574*x +  0.34776688*x2 +  0.37470851*x3 + 0.09011915*x4
+        self.beta    = 8.52762600 - 24.41225973*x + 56.43597107*x2 + 37.06152575*x3 + 5.45624060*x4
+        self.gamma   = 0.00025546 -  0.00123461*x -  0.00023246*x2 +  0.00045519*x3 + 0.00016176*x4
+        self.delta   = 5.43288900 -  8.62157806*x + 13.44202049*x2 + 14.51584135*x3 + 3.39793084*x4
+        self.epsilon = 5.56357900 - 10.32345224*x + 19.44322980*x2 + 18.97361347*x3 + 4.16903097*x4
+        self.zeta    = 0.78866060 -  2.90870942*x +  6.54713531*x2 +  4.05606657*x3 + 0.53287322*x4
+        self.eta     = 0.00586685 -  0.01704237*x +  0.03872348*x2 +  0.02570041*x3 + 0.00383376*x4
+
+        #######################################################################
+        #Masa de "enganche"
+        self.M_hook = 1.0185 + 0.16015*x + 0.0892*x2
+
+        #######################################################################
+        #Coeficientes de t_BGB
+        self.a1 = 1.593890*(10**3)  + 2.053038*(10**3)*x  + 1.231226*(10**3)*x2  + 2.327785*(10**2)*x3
+        self.a2 = 2.706708*(10**3)  + 1.483131*(10**3)*x  + 5.772723*(10**2)*x2  + 7.411230*(10**1)*x3
+        self.a3 = 1.466143*(10**2)  - 1.048442*(10**2)*x  - 6.795374*(10**1)*x2  - 1.391127*(10**1)*x3
+        self.a4 = 4.141960*(10**-2) + 4.564888*(10**-2)*x + 2.958542*(10**-2)*x2 + 5.571483*(10**-3)*x3
+        self.a5 = 3.426349*(10**-1)
+
+        #######################################################################
+        #Coeficientes de t_hook
+        self.a6  = 1.949814*(10**1)  + 1.758178*(10**0)*x  - 6.008212*(10**0)*x2  - 4.470533*(10**0)*x3
+        self.a7  = 4.903830*(10**0)
+        self.a8  = 5.212154*(10**-2) + 3.166411*(10**-2)*x - 2.750074*(10**-3)*x2 - 2.271549*(10**-3)*x3
+        self.a9  = 1.312179*(10**0)  - 3.294936*(10**-1)*x + 9.231860*(10**-2)*x2 + 2.610989*(10**-2)*x3
+        self.a10 = 8.073972*(10**-1)
+
+        #######################################################################
+        #Coeficiente x de t_MS
+        self.X = np.maximum(0.95, np.minimum(0.95 - 0.03*(x + 0.30103), 0.99))
+
+        #######################################################################
+        #Coeficientes de L_TMS
+        a11_p    = 1.031538*(10**0)  - 2.434480*(10**-1)*x  + 7.732821*(10**0)*x2  + 6.460705*(10**0)*x3 + 1.374484*(10**0)*x4
+        a12_p    = 1.043715*(10**0)  - 1.577474*(10**0)*x   - 5.168234*(10**0)*x2  - 5.596506*(10**0)*x3 - 1.299394*(10**0)*x4
+        self.a13 = 7.859573*(10**2)  - 8.542048*(10**0)*x   - 2.642511*(10**1)*x2  - 9.585707*(10**0)*x3
+        self.a14 = 3.858911*(10**3)  + 2.459681*(10**3)*x   - 7.630093*(10**1)*x2  - 3.486057*(10**2)*x3 - 4.861703*(10**1)*x4
+        self.a15 = 2.888720*(10**2)  + 2.952979*(10**2)*x   + 1.850341*(10**2)*x2  + 3.797254*(10**1)*x3
+        self.a16 = 7.196580*(10**0)  + 5.613746*(10**-1)*x  + 3.805871*(10**-1)*x2 + 8.398728*(10**-2)*x3
+        self.a11 = a11_p*self.a14
+        self.a12 = a12_p*self.a14
+
+        #######################################################################
+        #Coeficientes de R_TMS
+        self.a17 = 10**(np.maximum(0.097 - 0.1072*(sigma + 3), np.maximum(0.097, np.minimum(0.1461, 0.1461 + 0.1237*(sigma + 2)))))
+        a18_p    = 2.187715*(10**-1) - 2.154437*(10**0)*x  - 3.768678*(10**0)*x2  - 1.975518*(10**0)*x3 - 3.021475*(10**-1)*x4
+        a19_p    = 1.466440*(10**0)  + 1.839725*(10**0)*x  + 6.442199*(10**0)*x2  + 4.023635*(10**0)*x3 + 6.957529*(10**-1)*x4
+        self.a20 = 2.652091*(10**1)  + 8.178458*(10**1)*x  + 1.156058*(10**2)*x2  + 7.633811*(10**1)*x3 + 1.950698*(10**1)*x4
+        self.a21 = 1.472103*(10**0)  - 2.947609*(10**0)*x  - 3.312828*(10**0)*x2  - 9.945065*(10**-1)*x3
+        self.a22 = 3.071048*(10**0)  - 5.679941*(10**0)*x  - 9.745523*(10**0)*x2  - 3.594543*(10**0)*x3
+        self.a23 = 2.617890*(10**0)  + 1.019135*(10**0)*x  - 3.292551*(10**-2)*x2 - 7.445123*(10**-2)*x3
+        self.a24 = 1.075567*(10**-2) + 1.773287*(10**-2)*x + 9.610479*(10**-3)*x2 + 1.732469*(10**-3)*x3
+        self.a25 = 1.476246*(10**0)  + 1.899331*(10**0)*x  + 1.195010*(10**0)*x2  + 3.035051*(10**-1)*x3
+        self.a26 = 5.502535*(10**0)  - 6.601663*(10**-2)*x + 9.968707*(10**-2)*x2 + 3.599801*(10**-2)*x3
+        self.a18 = a18_p*self.a20
+        self.a19 = a19_p*self.a20
+        self.c1  = -8.672073*10**-2 #Este es un coeficiente cuyo valor es entregado
+
+        #Obtenemos M_x, que va a ser un límite para la función seccionada
+        self.M_x = self.a17 + 0.1
+
+        #Valores de R_TMS en los límites de cada sección, que sirven para
+        #hacer la interpolación lineal entre a17 y M_x
+        self.y1 = (self.a18 + self.a19*self.a17**self.a21)/(self.a20 + self.a17**self.a22)
+        self.y2 = (self.c1*self.M_x**3 + self.a23*self.M_x**self.a26 + self.a24*self.M_x**(self.a26 + 1.5))/(self.a25 + self.M_x**5)
+
+        #######################################################################
+        #Coeficientes de deltaL
+        self.a34 = 1.910302*(10**-1) + 1.158624*(10**-1)*x + 3.348990*(10**-2)*x2 + 2.599706*(10**-3)*x3
+        self.a35 = 3.931056*(10**-1) + 7.277637*(10**-2)*x - 1.366593*(10**-1)*x2 - 4.508946*(10**-2)*x3
+        self.a36 = 3.267776*(10**-1) + 1.204424*(10**-1)*x + 9.988332*(10**-2)*x2 + 2.455361*(10**-2)*x3
+        self.a37 = 5.990212*(10**-1) + 5.570264*(10**-2)*x + 6.207626*(10**-2)*x2 + 1.777283*(10**-2)*x3
+        self.a33 = np.minimum(1.4, 1.5135 + 0.3769*x)
+        self.a33 = np.maximum(0.6355 - 0.4192*x, np.maximum(1.25, self.a33))
+
+        #El valor de deltaL cuando M = a33
+        self.B_deltaL = np.minimum(self.a34/(self.a33**self.a35), self.a36/(self.a33**self.a37))
+
+        #######################################################################
+        #Coeficientes de deltaR
+        self.a38 = 7.330122*(10**-1) + 5.192827*(10**-1)*x + 2.316416*(10**-1)*x2 + 8.346941*(10**-3)*x3
+        self.a39 = 1.172768*(10**0)  - 1.209262*(10**-1)*x - 1.193023*(10**-1)*x2 - 2.859837*(10**-2)*x3
+        self.a40 = 3.982622*(10**-1) - 2.296279*(10**-1)*x - 2.262539*(10**-1)*x2 - 5.219837*(10**-2)*x3
+        self.a41 = 3.571038*(10**0)  - 2.223625*(10**-2)*x - 2.611794*(10**-2)*x2 - 6.359648*(10**-3)*x3
+        self.a42 = 1.9848*(10**0)    + 1.1386*(10**0)*x    + 3.5640*(10**-1)*x2
+        self.a43 = 6.300*(10**-2)    + 4.810*(10**-2)*x    + 9.840*(10**-3)*x2
+        self.a44 = 1.200*(10**0)     + 2.450*(10**0)*x
+
+        self.a42 = np.minimum(1.25, np.maximum(1.10, self.a42))
+        self.a44 = np.minimum(1.30, np.maximum(0.45, self.a44))
+
+        #El valor de deltaR cuando M = 2
+        self.B_deltaR = ((self.a38 + self.a39*2.0**3.5)/(self.a40*2.0**3 + 2.0**self.a41)) - 1.0
+
+        #######################################################################
+        #Coeficientes de alpha_L
+        self.a45 = 2.321400*(10**-1) + 1.828075*(10**-3)*x - 2.232007*(10**-2)*x2 - 3.378734*(10**-3)*x3
+        self.a46 = 1.163659*(10**-2) + 3.427682*(10**-3)*x + 1.421393*(10**-3)*x2 - 3.710666*(10**-3)*x3
+        self.a47 = 1.048020*(10**-2) - 1.231921*(10**-2)*x - 1.686860*(10**-2)*x2 - 4.234354*(10**-3)*x3
+        self.a48 = 1.555590*(10**0)  - 3.223927*(10**-1)*x - 5.197429*(10**-1)*x2 - 1.066441*(10**-1)*x3
+        self.a49 = 9.7700*(10**-2)   - 2.3100*(10**-1)*x   - 7.5300*(10**-2)*x2
+        self.a50 = 2.4000*(10**-1)   + 1.8000*(10**-1)*x   + 5.9500*(10**-1)*x2
+        self.a51 = 3.3000*(10**-1)   + 1.3200*(10**-1)*x   + 2.1800*(10**-1)*x2
+        self.a52 = 1.1064*(10**0)    + 4.1500*(10**-1)*x   + 1.8000*(10**-1)*x2
+        self.a53 = 1.1900*(10**0)    + 3.7700*(10**-1)*x   + 1.7600*(10**-1)*x2
+
+        self.a49 = np.maximum(self.a49, 0.145)
+        self.a50 = np.minimum(self.a50, 0.306 + 0.053*x)
+        self.a51 = np.minimum(self.a51, 0.3625 + 0.062*x)
+        self.a52 = np.maximum(self.a52, 0.9)
+        self.a52 = np.where(Z > 0.01, np.minimum(self.a52, 1.0), self.a52)
+        self.a53 = np.maximum(self.a53, 1.0)
+        self.a53 = np.where(Z > 0.01, np.minimum(self.a53, 1.1), self.a53)
+
+        #El valor de alpha_L cuando M = 2.0
+        self.B_alpha_L = (self.a45 + self.a46*2.0**self.a48)/(2.0**0.4 + self.a47*2.0**1.9)
+
+        #######################################################################
+        #Coeficientes de beta_L
+        self.a54 = 3.855707*(10**-1) - 6.104166*(10**-1)*x + 5.676742*(10**0)*x2 + 1.060894*(10**1)*x3 + 5.284014*(10**0)*x4
+        self.a55 = 3.579064*(10**-1) - 6.442936*(10**-1)*x + 5.494644*(10**0)*x2 + 1.054952*(10**1)*x3 + 5.280991*(10**0)*x4
+        self.a56 = 9.587587*(10**-1) + 8.777464*(10**-1)*x + 2.017321*(10**-1)*x2
+        self.a57 = np.minimum(1.4, 1.5135 + 0.3769*x)
+        self.a57 = np.maximum(0.6355 - 0.4192*x, np.maximum(1.25, self.a57))
+
+        #El valor de beta_L cuando M = a57
+        self.B_beta_L = np.maximum(0.0, self.a54 - self.a55*self.a57**self.a56)
+
+        #######################################################################
+        #Coeficientes de alpha_R
+        self.a58 = 4.907546*(10**-1) - 1.683928*(10**-1)*x - 3.108742*(10**-1)*x2 - 7.202918*(10**-2)*x3
+        self.a59 = 4.537070*(10**0)  - 4.465455*(10**0)*x  - 1.612690*(10**0)*x2  - 1.623246*(10**0)*x3
+        self.a60 = 1.796220*(10**0)  + 2.814020*(10**-1)*x + 1.423325*(10**0)*x2  + 3.421036*(10**-1)*x3
+        self.a61 = 2.256216*(10**0)  + 3.773400*(10**-1)*x + 1.537867*(10**0)*x2  + 4.396373*(10**-1)*x3
+        self.a62 = 8.4300*(10**-2)   - 4.7500*(10**-2)*x   - 3.5200*(10**-2)*x2
+        self.a63 = 7.3600*(10**-2)   + 7.4900*(10**-2)*x   + 4.4260*(10**-2)*x2
+        self.a64 = 1.3600*(10**-1)   + 3.5200*(10**-2)*x
+        self.a65 = 1.564231*(10**-3) + 1.653042*(10**-3)*x - 4.439786*(10**-3)*x2 - 4.951011*(10**-3)*x3 -1.216530*(10**-3)*x4
+        self.a66 = 1.4770*(10**0)    + 2.9600*(10**-1)*x
+        self.a67 = 5.210157*(10**0)  - 4.143695*(10**0)*x  - 2.120870*(10**0)*x2
+        self.a68 = 1.1160*(10**0)    + 1.6600*(10**-1)*x
+
+        self.a62 = np.maximum(0.065, self.a62)
+        self.a63 = np.where(Z < 0.004, np.minimum(0.055, self.a63), self.a63)
+        self.a64 = np.maximum(0.091, np.minimum(0.121, self.a64))
+        self.a66 = np.maximum(self.a66, np.minimum(1.6, -0.308 - 1.046*x))
+        self.a66 = np.maximum(0.8, np.minimum(0.8-2*x, self.a66))
+        self.a68 = np.maximum(0.9, np.minimum(self.a68, 1.0))
+
+        #El valor de alpha_R cuando M = a66
+        self.B_alpha_R = (self.a58*self.a66**self.a60)/(self.a59 + self.a66**self.a61)
+        #El valor de alpha_R cuando M = a67
+        self.C_alpha_R = (self.a58*self.a67**self.a60)/(self.a59 + self.a67**self.a61)
+
+        self.a64 = np.where(self.a68 > self.a66, self.B_alpha_R, self.a64)
+        self.a68 = np.minimum(self.a68, self.a66)
+
+        #######################################################################
+        #Coeficientes de beta_R
+        self.a69 = 1.071489*(10**0)  - 1.164852*(10**-1)*x - 8.623831*(10**-2)*x2 - 1.582349*(10**-2)*x3
+        self.a70 = 7.108492*(10**-1) + 7.935927*(10**-1)*x + 3.926983*(10**-1)*x2 + 3.622146*(10**-2)*x3
+        self.a71 = 3.478514*(10**0)  - 2.585474*(10**-2)*x - 1.512955*(10**-2)*x2 - 2.833691*(10**-3)*x3
+        self.a72 = 9.132108*(10**-1) - 1.653695*(10**-1)*x + 3.636784*(10**-2)*x3
+        self.a73 = 3.969331*(10**-3) + 4.539076*(10**-3)*x + 1.720906*(10**-3)*x2 + 1.897857*(10**-4)*x3
+        self.a74 = 1.600*(10**0)     + 7.640*(10**-1)*x    + 3.322*(10**-1)*x2
+
+        self.a72 = np.where(Z > 0.01, np.maximum(self.a72, 0.95), self.a72)
+        self.a74 = np.maximum(1.4, np.minimum(self.a74, 1.6))
+
+        #El valor de beta_R cuando M = 2
+        self.B_beta_R = (self.a69*2**3.5)/(self.a70 + 2**self.a71)
+        #El valor de beta_R cuando M = 16
+        self.C_beta_R = (self.a69*16**3.5)/(self.a70 + 16**self.a71)
+
+        #######################################################################
+        #Coeficientes de gamma
+        self.a75 =  8.109*(10**-1)    - 6.282*(10**-1)*x
+        self.a76 =  1.192334*(10**-2) + 1.083057*(10**-2)*x + 1.230969*(10**0)*x2  + 1.551656*(10**0)*x3
+        self.a77 = -1.668868*(10**-1) + 5.818123*(10**-1)*x - 1.105027*(10**1)*x2  - 1.668070*(10**1)*x3
+        self.a78 =  7.615495*(10**-1) + 1.068243*(10**-1)*x - 2.011333*(10**-1)*x2 - 9.371415*(10**-2)*x3
+        self.a79 =  9.409838*(10**0)  + 1.522928*(10**0)*x
+        self.a80 = -2.7110*(10**-1)   - 5.7560*(10**-1)*x   - 8.3800*(10**-2)*x2
+        self.a81 =  2.4930 *(10**0)   + 1.1475*(10**0)*x
+
+        self.a75 = np.maximum(1.0, np.minimum(self.a75, 1.27))
+        self.a75 = np.maximum(self.a75, 0.6355 - 0.4192*x)
+        self.a76 = np.maximum(self.a76, -0.1015564 - 0.2161264*x - 0.05182516*x2)
+        self.a77 = np.maximum(-0.3868776 - 0.5457078*x - 0.1463472*x2, np.minimum(0.0, self.a77))
+        self.a78 = np.maximum(0.0, np.minimum(self.a78, 7.454 + 9.046*x))
+        self.a79 = np.minimum(self.a79, np.maximum(2.0, -13.3 - 18.6*x))
+        self.a80 = np.maximum(0.0585542, self.a80)
+        self.a81 = np.minimum(1.5, np.maximum(0.4, self.a81))
+
+        #El valor de gamma cuando M = 1
+        self.B_gamma = self.a76 + self.a77*(1.0 - self.a78)**self.a79
+        self.C_gamma = np.where(self.a75 == 1.0, self.B_gamma, self.a80)
+
+        #######################################################################
+        #Condición de metalicidad del exponente eta
+        self.eta_bajo = Z <= 0.0009
+
+#Objeto de coeficientes para un array de metalicidades
+class _CoeficientesIndexados:
+    '''
+    Objeto que se usa como un CoeficientesZ cuando la metalicidad es un array.
+    Los coeficientes se calculan solo para las metalicidades distintas del
+    array y se copian a la forma del array cuando se piden por primera vez.
+    '''
+
+    def __init__(self, unicos, indices, forma):
+        self._unicos = unicos
+        self._indices = indices
+        self._forma = forma
+
+    def __getattr__(self, nombre):
+
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+
+        valor = getattr(self._unicos, nombre)
+        
+        #Los coeficientes que no dependen de Z (constantes) se entregan tal cual
+        if np.ndim(valor) > 0:
+            valor = valor[self._indices].reshape(self._forma)
+        
+        setattr(self, nombre, valor)
+
+        return valor
+
+#Número máximo de metalicidades distintas que se guardan en el caché
+MAX_METALICIDADES = 128
+
+#Caché de los coeficientes para metalicidades dadas como números
+@functools.lru_cache(maxsize=MAX_METALICIDADES)
+def _coeficientes_Z(Z):
+
+    return CoeficientesZ(Z)
+
+#Coeficientes asociados a una metalicidad
+def coeficientes(Z):
+    '''
+    Función que entrega el objeto CoeficientesZ con todos los coeficientes de
+    las fórmulas de la secuencia principal que dependen de la metalicidad Z.
+
+    Si Z es un número, el objeto se guarda en un caché LRU (de tamaño
+    MAX_METALICIDADES), de modo que los coeficientes se calculan una sola vez
+    por metalicidad. Si Z es un array, los coeficientes se calculan una vez
+    para cada metalicidad distinta del array. Si Z ya es un objeto de
+    coeficientes, se entrega tal cual.
+    Depende de:
+
+    Z: Metalicidad de la estrella
+    '''
+
+    if isinstance(Z, (CoeficientesZ, _CoeficientesIndexados)):
+        return Z
+
+    if np.ndim(Z) == 0:
+        return _coeficientes_Z(float(Z))
+
+    Z = _array(Z)
+    unicos, indices = np.unique(Z, return_inverse=True)
+
+    #Si todos los elementos tienen la misma metalicidad usamos el caché
+    if unicos.size == 1:
+        return _coeficientes_Z(float(unicos[0]))
+
+    return _CoeficientesIndexados(CoeficientesZ(unicos), indices.ravel(), Z.shape)
+
 #Radio estelar a edad cero de la secuancia principal
 def R_ZAMS(M, Z):
     '''
@@ -36,21 +462,10 @@ def R_ZAMS(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    # Calculamos los coeficientes en función de dseta
-    theta   =  1.71535900 + 0.62246212*x -  0.92557761*x**2 -  1.16996966*x**3 - 0.30631491*x**4
-    iota    =  6.59778800 - 0.42450044*x - 12.13339427*x**2 - 10.73509484*x**3 - 2.51487077*x**4
-    kappa   = 10.08855000 - 7.11727086*x - 31.67119479*x**2 - 24.24848322*x**3 - 5.33608972*x**4
-    lamda   =  1.01249500 + 0.32699690*x -  0.00923418*x**2 -  0.03876858*x**3 - 0.00412750*x**4
-    mu      =  0.07490166 + 0.02410413*x +  0.07233664*x**2 +  0.03040467*x**3 + 0.00197741*x**4
-    nu      =  0.01077422
-    xi      =  3.08223400 + 0.94472050*x -  2.15200882*x**2 -  2.49219496*x**3 - 0.63848738*x**4
-    omicron = 17.84778000 - 7.45345690*x - 48.96066856*x**2 - 40.05386135*x**3 - 9.09331816*x**4
-    pi      =  0.00022582 - 0.00186899*x +  0.00388783*x**2 +  0.00142402*x**3 - 0.00007671*x**4
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
     #Calculamos el radio en función de los coeficientes y la masa estelar
-    R_ZAMS = (theta*(M**2.5) + iota*(M**6.5) + kappa*(M**11) + lamda*(M**19) + mu*(M**19.5))/(nu + xi*(M**2) + omicron*(M**8.5) + M**18.5 + pi*(M**19.5))
+    R_ZAMS = (c.theta*(M**2.5) + c.iota*(M**6.5) + c.kappa*(M**11) + c.lamda*(M**19) + c.mu*(M**19.5))/(c.nu + c.xi*(M**2) + c.omicron*(M**8.5) + M**18.5 + c.pi*(M**19.5))
 
     return R_ZAMS
 
@@ -66,10 +481,8 @@ def M_hook(Z):
     Z: Metalicidad de la estrella
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    #Calculamos M_hook
-    M_hook = 1.0185 + 0.16015*x + 0.0892*x**2
+    #Obtenemos M_hook de los coeficientes asociados a la metalicidad
+    M_hook = coeficientes(Z).M_hook
     
     return M_hook
 
@@ -86,17 +499,10 @@ def t_BGB(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    #Obtenemos los coeficientes en función de dseta
-    a1 = 1.593890*(10**3)  + 2.053038*(10**3)*x  + 1.231226*(10**3)*x**2  + 2.327785*(10**2)*x**3
-    a2 = 2.706708*(10**3)  + 1.483131*(10**3)*x  + 5.772723*(10**2)*x**2  + 7.411230*(10**1)*x**3
-    a3 = 1.466143*(10**2)  - 1.048442*(10**2)*x  - 6.795374*(10**1)*x**2  - 1.391127*(10**1)*x**3
-    a4 = 4.141960*(10**-2) + 4.564888*(10**-2)*x + 2.958542*(10**-2)*x**2 + 5.571483*(10**-3)*x**3
-    a5 = 3.426349*(10**-1)
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
     #Calculamos t_BGB en función de la masa y la metalicidad
-    t_BGB = (a1 + a2*M**4 + a3*M**5.5 + M**7)/(a4*M**2 + a5*M**7)
+    t_BGB = (c.a1 + c.a2*M**4 + c.a3*M**5.5 + M**7)/(c.a4*M**2 + c.a5*M**7)
     
     return t_BGB
 
@@ -113,22 +519,36 @@ def t_hook(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    #Obtenemos los coeficientes en función de dseta
-    a6  = 1.949814*(10**1)  + 1.758178*(10**0)*x  - 6.008212*(10**0)*x**2  - 4.470533*(10**0)*x**3
-    a7  = 4.903830*(10**0)
-    a8  = 5.212154*(10**-2) + 3.166411*(10**-2)*x - 2.750074*(10**-3)*x**2 - 2.271549*(10**-3)*x**3
-    a9  = 1.312179*(10**0)  - 3.294936*(10**-1)*x + 9.231860*(10**-2)*x**2 + 2.610989*(10**-2)*x**3
-    a10 = 8.073972*(10**-1)
+    #Calculamos el coeficiente mu y lo multiplicamos por t_BGB
+    t_hook = _mu_hook(M, c)*t_BGB(M, c)
     
-    #Calculamos el coeficiente mu
-    mu = max(0.5, 1.0 - 0.01*max((a6/(M**a7)), a8 + (a9/(M**a10))))
+    return t_hook
+
+#Coeficiente mu de t_hook
+def _mu_hook(M, c):
+    '''
+    Función que entrega el coeficiente mu (t_hook/t_BGB) a partir de la masa
+    M y los coeficientes c de la metalicidad.
+    '''
     
-    #Obtenemos t_BGB en función de M y Z
-    t_hook = mu*t_BGB(M,Z)
+    mu = np.maximum(0.5, 1.0 - 0.01*np.maximum((c.a6/(M**c.a7)), c.a8 + (c.a9/(M**c.a10))))
     
-    return t_hook
+    return mu
+
+#t_hook y t_MS calculando t_BGB una sola vez
+def _tiempos(M, c):
+    '''
+    Función que entrega la tupla (t_hook, t_MS) a partir de la masa M y los
+    coeficientes c de la metalicidad, calculando t_BGB una sola vez.
+    '''
+    
+    tbgb = t_BGB(M, c)
+    th = _mu_hook(M, c)*tbgb
+    tms = np.maximum(th, c.X*tbgb)
+    
+    return th, tms
 
 #Tiempo que pasará la estrella en la secuencia principal
 def t_MS(M, Z):
@@ -143,13 +563,10 @@ def t_MS(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    #Calculamos el coeficiente x
-    X = max(0.95, min(0.95 - 0.03*(x + 0.30103), 0.99))
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
     #Obtenemos t_MS en función de M y Z
-    t_MS = max(t_hook(M, Z), X*t_BGB(M, Z))
+    t_MS = _tiempos(M, c)[1]
     
     return t_MS
 
@@ -172,6 +589,7 @@ def tau(t, M, Z):
     return tau
 
 #Radio de la estrella al término de la secuencia principal
+@np.errstate(**_sin_avisos)
 def R_TMS(M, Z): 
     '''
     Función que entrega el radio de una estrella cuando sale de la secuencia 
@@ -184,53 +602,28 @@ def R_TMS(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    #Obtenemos sigma, que es el logaritmo de la metalicidad
-    sigma = np.log10(Z)     
-    
-    #Obtenemos los coeficientes a partir de dseta y sigma
-    a17   = 10**(max(0.097 - 0.1072*(sigma + 3), max(0.097, min(0.1461, 0.1461 + 0.1237*(sigma + 2)))))
-    a18_p = 2.187715*(10**-1) - 2.154437*(10**0)*x  - 3.768678*(10**0)*x**2  - 1.975518*(10**0)*x**3 - 3.021475*(10**-1)*x**4
-    a19_p = 1.466440*(10**0)  + 1.839725*(10**0)*x  + 6.442199*(10**0)*x**2  + 4.023635*(10**0)*x**3 + 6.957529*(10**-1)*x**4
-    a20   = 2.652091*(10**1)  + 8.178458*(10**1)*x  + 1.156058*(10**2)*x**2  + 7.633811*(10**1)*x**3 + 1.950698*(10**1)*x**4
-    a21   = 1.472103*(10**0)  - 2.947609*(10**0)*x  - 3.312828*(10**0)*x**2  - 9.945065*(10**-1)*x**3 
-    a22   = 3.071048*(10**0)  - 5.679941*(10**0)*x  - 9.745523*(10**0)*x**2  - 3.594543*(10**0)*x**3  
-    a23   = 2.617890*(10**0)  + 1.019135*(10**0)*x  - 3.292551*(10**-2)*x**2 - 7.445123*(10**-2)*x**3
-    a24   = 1.075567*(10**-2) + 1.773287*(10**-2)*x + 9.610479*(10**-3)*x**2 + 1.732469*(10**-3)*x**3
-    a25   = 1.476246*(10**0)  + 1.899331*(10**0)*x  + 1.195010*(10**0)*x**2  + 3.035051*(10**-1)*x**3
-    a26   = 5.502535*(10**0)  - 6.601663*(10**-2)*x + 9.968707*(10**-2)*x**2 + 3.599801*(10**-2)*x**3 
-    a18   = a18_p*a20
-    a19   = a19_p*a20
-    c1    = -8.672073*10**-2 #Este es un coeficiente cuyo valor es entregado
-    
-    #Obtenemos M_x, que va a ser un límite para nuestra función seccionada
-    M_x = a17 + 0.1
-    
-    #Calculamos unos coeficientes que nos serviran para hacer una interpolación
-    #lineal entre los límites de ambas secciones de la función. Son simplemente
-    #la función evaluada en los límites de cada sección.
-    y1 = (a18 + a19*a17**a21)/(a20 + a17**a22)
-    y2 = (c1*M_x**3 + a23*M_x**a26 + a24*M_x**(a26 + 1.5))/(a25 + M_x**5)
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
+    
     ###########################################################################
     #Ahora calculamos R_TMS, pero cómo se calcula depende del valor de M:
     
-    if M <= a17: #Forma de calcularlo si M <= a17
-        R_TMS = (a18 + a19*M**a21)/(a20 + M**a22)
-            
-        if M < 0.5: #Esta es una condición extra que ocurre cuando M < 0.5
-                R_TMS = max(R_TMS, 1.5*R_ZAMS(M, Z))
-        else:
-            pass
-        
-    elif a17 < M < M_x: #Esta es la interpolación lineal entre a17 y M_x
-        R_TMS = ((y2 - y1)/(M_x - a17))*(M - a17) + y1
-        
-    elif M >= M_x: #Forma de calcularlo si M >= M_x
-        R_TMS = (c1*M**3 + a23*M**a26 + a24*M**(a26 + 1.5))/(a25 + M**5)     
+    #Forma de calcularlo si M <= a17
+    R_bajo = (c.a18 + c.a19*M**c.a21)/(c.a20 + M**c.a22)
+    
+    #Esta es una condición extra que ocurre cuando M < 0.5
+    R_bajo = np.where(M < 0.5, np.maximum(R_bajo, 1.5*R_ZAMS(M, c)), R_bajo)
+    
+    #Esta es la interpolación lineal entre a17 y M_x (a17 < M < M_x), los
+    #coeficientes y1 e y2 son la función evaluada en los límites de cada
+    #sección
+    R_medio = ((c.y2 - c.y1)/(c.M_x - c.a17))*(M - c.a17) + c.y1
     
+    #Forma de calcularlo si M >= M_x
+    R_alto = (c.c1*M**3 + c.a23*M**c.a26 + c.a24*M**(c.a26 + 1.5))/(c.a25 + M**5)
     
-    return R_TMS
+    R_TMS = np.select([M <= c.a17, M < c.M_x], [R_bajo, R_medio], R_alto)
+    
+    return _escalar(R_TMS)
 
 #Tau_1
 def tau_1(t, M, Z):
@@ -245,7 +638,7 @@ def tau_1(t, M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    tau_1 = min(1.0, t/t_hook(M, Z))
+    tau_1 = np.minimum(1.0, t/t_hook(M, Z))
     
     return tau_1
 
@@ -262,11 +655,25 @@ def tau_2(t, M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    tau_2 = max(0.0, min(1.0, (t - (1.0 - 0.01)*t_hook(M, Z))/(0.01*t_hook(M, Z))))
+    tau_2 = np.maximum(0.0, np.minimum(1.0, (t - (1.0 - 0.01)*t_hook(M, Z))/(0.01*t_hook(M, Z))))
     
     return tau_2
 
+#Tau, tau_1 y tau_2 con t_hook y t_MS ya calculados
+def _taus(t, th, tms):
+    '''
+    Función que entrega la tupla (tau, tau_1, tau_2) cuando ya se conocen
+    t_hook (th) y t_MS (tms), para no volver a calcularlos en cada una.
+    '''
+    
+    ta = t/tms
+    ta1 = np.minimum(1.0, t/th)
+    ta2 = np.maximum(0.0, np.minimum(1.0, (t - (1.0 - 0.01)*th)/(0.01*th)))
+    
+    return ta, ta1, ta2
+
 #Delta R
+@np.errstate(**_sin_avisos)
 def deltaR(M, Z): 
     '''
     Función que entrega deltaR.
@@ -278,46 +685,29 @@ def deltaR(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a38 = 7.330122*(10**-1) + 5.192827*(10**-1)*x + 2.316416*(10**-1)*x**2 + 8.346941*(10**-3)*x**3
-    a39 = 1.172768*(10**0)  - 1.209262*(10**-1)*x - 1.193023*(10**-1)*x**2 - 2.859837*(10**-2)*x**3
-    a40 = 3.982622*(10**-1) - 2.296279*(10**-1)*x - 2.262539*(10**-1)*x**2 - 5.219837*(10**-2)*x**3
-    a41 = 3.571038*(10**0)  - 2.223625*(10**-2)*x - 2.611794*(10**-2)*x**2 - 6.359648*(10**-3)*x**3
-    a42 = 1.9848*(10**0)    + 1.1386*(10**0)*x    + 3.5640*(10**-1)*x**2
-    a43 = 6.300*(10**-2)    + 4.810*(10**-2)*x    + 9.840*(10**-3)*x**2
-    a44 = 1.200*(10**0)     + 2.450*(10**0)*x
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    #Aplicamos condiciones sobre los valores de algunos coeficientes
-    a42 = min(1.25, max(1.10, a42))
-    a44 = min(1.30, max(0.45, a44))
-    
-    #Calculamos el valor B, que viene a ser deltaR cuando M = 2
-    B   = ((a38 + a39*2.0**3.5)/(a40*2.0**3 + 2.0**a41)) - 1.0
-    
-    #Obtenemos M_hook
-    m   = M_hook(Z)
+    #Obtenemos M_hook, a42, a43 y a44, y el valor B, que viene a ser deltaR
+    #cuando M = 2
+    m, a42, a43, a44, B = c.M_hook, c.a42, c.a43, c.a44, c.B_deltaR
     
     ###########################################################################
     #Ahora calculamos deltaR, pero la forma de calcularla depende de M
     
-    if M <= m: #Forma de calcular deltaR cuando M <= M_{hook}
-        deltaR = 0.0
-                    
-    elif m < M <= a42: #Forma de calcular deltaR cuando M_{hook} < M <= a42
-        deltaR = a43*((M - m)/(a42 - m))**0.5
-                    
-    elif a42 < M < 2.0: #Forma de calcular deltaR cuando a42 < M < 2
-        deltaR = a43 + (B - a43)*((M - a42)/(2.0 - a42))**a44
-        
-    elif 2.0 <= M: #Forma de calcular deltaR cuando 2 <= M
-        deltaR = ((a38 + a39*M**3.5)/(a40*M**3 + M**a41)) - 1.0 
-    
-    
-    return deltaR
+    deltaR = np.select(
+        [M <= m,     #Forma de calcular deltaR cuando M <= M_{hook}
+         M <= a42,   #Forma de calcular deltaR cuando M_{hook} < M <= a42
+         M < 2.0],   #Forma de calcular deltaR cuando a42 < M < 2
+        [0.0,
+         a43*((M - m)/(a42 - m))**0.5,
+         a43 + (B - a43)*((M - a42)/(2.0 - a42))**a44],
+        #Forma de calcular deltaR cuando 2 <= M
+        ((c.a38 + c.a39*M**3.5)/(c.a40*M**3 + M**c.a41)) - 1.0)
+    
+    return _escalar(deltaR)
 
 #Alpha R
+@np.errstate(**_sin_avisos)
 def alpha_R(M, Z): 
     '''
     Función que entrega alpha_R.
@@ -329,68 +719,34 @@ def alpha_R(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a58 = 4.907546*(10**-1) - 1.683928*(10**-1)*x - 3.108742*(10**-1)*x**2 - 7.202918*(10**-2)*x**3
-    a59 = 4.537070*(10**0)  - 4.465455*(10**0)*x  - 1.612690*(10**0)*x**2  - 1.623246*(10**0)*x**3
-    a60 = 1.796220*(10**0)  + 2.814020*(10**-1)*x + 1.423325*(10**0)*x**2  + 3.421036*(10**-1)*x**3
-    a61 = 2.256216*(10**0)  + 3.773400*(10**-1)*x + 1.537867*(10**0)*x**2  + 4.396373*(10**-1)*x**3
-    a62 = 8.4300*(10**-2)   - 4.7500*(10**-2)*x   - 3.5200*(10**-2)*x**2
-    a63 = 7.3600*(10**-2)   + 7.4900*(10**-2)*x   + 4.4260*(10**-2)*x**2
-    a64 = 1.3600*(10**-1)   + 3.5200*(10**-2)*x
-    a65 = 1.564231*(10**-3) + 1.653042*(10**-3)*x - 4.439786*(10**-3)*x**2 - 4.951011*(10**-3)*x**3 -1.216530*(10**-3)*x**4
-    a66 = 1.4770*(10**0)    + 2.9600*(10**-1)*x
-    a67 = 5.210157*(10**0)  - 4.143695*(10**0)*x  - 2.120870*(10**0)*x**2
-    a68 = 1.1160*(10**0)    + 1.6600*(10**-1)*x
-    
-    #Aplicamos condiciones sobre los valores de algunos coeficientes
-    a62 = max(0.065, a62)
-    
-    if Z < 0.004:
-        a63 = min(0.055, a63)
-    else:
-        pass
-    
-    a64 = max(0.091, min(0.121, a64))
-    a66 = max(a66, min(1.6, -0.308 - 1.046*x))
-    a66 = max(0.8, min(0.8-2*x, a66))
-    a68 = max(0.9, min(a68, 1.0))
-    
-    B = (a58*a66**a60)/(a59 + a66**a61) #El valor de alpha_R cuando M = a66
-    C = (a58*a67**a60)/(a59 + a67**a61) #El valor de alpha_R cuando M = a67
-    
-    if a68 > a66:
-         a64 = B
-    else:
-        pass
-            
-    a68 = min(a68, a66)
-    ###########################################################################
-    #Ahora calculamos alpha_R, pero la forma de calcularla depende de M
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    if M < 0.50: #Forma de calcular alpha_R cuando M < 0.5
-        alpha_R = a62
-                    
-    elif 0.50 <= M < 0.65: #Forma de calcular alpha_R cuando 0.5 <= M <0.65  
-        alpha_R = a62 + (((a63 - a62)*(M - 0.5))/0.15)
-                    
-    elif 0.65 <= M < a68: #Forma de calcular alpha_R cuando 0.65 <= M < a68
-        alpha_R = a63 + ((a64 - a63)*(M - 0.65))/(a68 - 0.65)
-        
-    elif a68 <= M < a66: #Forma de calcular alpha_R cuando a68 <= M < a66
-        alpha_R = a64 + ((B - a64)*(M - a68))/(a66 - a68)
-                                    
-    elif a66 <= M <= a67: #Forma de calcular alpha_R cuando a66 <= M <= a67  
-        alpha_R = (a58*M**a60)/(a59 + M**a61)
-                                    
-    elif a67 < M: #Forma de calcular alpha_R cuando a67 < M
-        alpha_R = C + a65*(M - a67)     
+    #Obtenemos los coeficientes que definen las secciones, B (el valor de 
+    #alpha_R cuando M = a66) y C (el valor de alpha_R cuando M = a67)
+    a62, a63, a64, a66, a67, a68 = c.a62, c.a63, c.a64, c.a66, c.a67, c.a68
+    B, C = c.B_alpha_R, c.C_alpha_R
     
+    ###########################################################################
+    #Ahora calculamos alpha_R, pero la forma de calcularla depende de M
     
-    return alpha_R
+    alpha_R = np.select(
+        [M < 0.50,   #Forma de calcular alpha_R cuando M < 0.5
+         M < 0.65,   #Forma de calcular alpha_R cuando 0.5 <= M <0.65
+         M < a68,    #Forma de calcular alpha_R cuando 0.65 <= M < a68
+         M < a66,    #Forma de calcular alpha_R cuando a68 <= M < a66
+         M <= a67],  #Forma de calcular alpha_R cuando a66 <= M <= a67
+        [a62,
+         a62 + (((a63 - a62)*(M - 0.5))/0.15),
+         a63 + ((a64 - a63)*(M - 0.65))/(a68 - 0.65),
+         a64 + ((B - a64)*(M - a68))/(a66 - a68),
+         (c.a58*M**c.a60)/(c.a59 + M**c.a61)],
+        #Forma de calcular alpha_R cuando a67 < M
+        C + c.a65*(M - a67))
+    
+    return _escalar(alpha_R)
 
 #Beta R
+@np.errstate(**_sin_avisos)
 def beta_R(M, Z): 
     '''
     Función que entrega beta_R.
@@ -402,49 +758,31 @@ def beta_R(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a69 = 1.071489*(10**0)  - 1.164852*(10**-1)*x - 8.623831*(10**-2)*x**2 - 1.582349*(10**-2)*x**3
-    a70 = 7.108492*(10**-1) + 7.935927*(10**-1)*x + 3.926983*(10**-1)*x**2 + 3.622146*(10**-2)*x**3
-    a71 = 3.478514*(10**0)  - 2.585474*(10**-2)*x - 1.512955*(10**-2)*x**2 - 2.833691*(10**-3)*x**3
-    a72 = 9.132108*(10**-1) - 1.653695*(10**-1)*x + 3.636784*(10**-2)*x**3
-    a73 = 3.969331*(10**-3) + 4.539076*(10**-3)*x + 1.720906*(10**-3)*x**2 + 1.897857*(10**-4)*x**3
-    a74 = 1.600*(10**0)     + 7.640*(10**-1)*x    + 3.322*(10**-1)*x**2
-    
-    #Aplicamos condiciones sobre los valores de algunos coeficientes
-    if Z > 0.01:
-        a72 = max(a72, 0.95)
-    else:
-        pass
-            
-    a74 = max(1.4, min(a74, 1.6))
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    B   = (a69*2**3.5)/(a70 + 2**a71)   #El valor de beta_R cuando M = 2
-    C   = (a69*16**3.5)/(a70 + 16**a71) #El valor de beta_R cuando M = 16
+    #Obtenemos a72, a74, B (el valor de beta_R cuando M = 2) y C (el valor de
+    #beta_R cuando M = 16)
+    a72, a74, B, C = c.a72, c.a74, c.B_beta_R, c.C_beta_R
     
     ###########################################################################
     #Ahora calculamos beta_R, pero la forma de calcularla depende de M
     
-    if M <= 1.0: #Forma de calcular beta_R cuando M <=1
-        beta_R = 1.06
-                    
-    elif 1.0 < M < a74: #Forma de calcular beta_R cuando 1 < M <a74  
-        beta_R = 1.06 + ((a72 - 1.06)*(M - 1.0))/(a74 - 1.06)
-                    
-    elif a74 <= M < 2.0: #Forma de calcular beta_R cuando a74 <= M <2
-        beta_R = a72 + ((B - a72)*(M - a74))/(2.0 - a74)
-        
-    elif 2.0 <= M <= 16.0: #Forma de calcular beta_R cuando 2 <= M <= 16
-        beta_R = (a69*M**3.5)/(a70 + M**a71)
-                                    
-    elif 16.0 < M: #Forma de calcular beta_R cuando 16 < M  
-        beta_R = C + a73*(M - 16.0)    
-    
-    
-    return beta_R - 1
+    beta_R = np.select(
+        [M <= 1.0,   #Forma de calcular beta_R cuando M <=1
+         M < a74,    #Forma de calcular beta_R cuando 1 < M <a74
+         M < 2.0,    #Forma de calcular beta_R cuando a74 <= M <2
+         M <= 16.0], #Forma de calcular beta_R cuando 2 <= M <= 16
+        [1.06,
+         1.06 + ((a72 - 1.06)*(M - 1.0))/(a74 - 1.06),
+         a72 + ((B - a72)*(M - a74))/(2.0 - a74),
+         (c.a69*M**3.5)/(c.a70 + M**c.a71)],
+        #Forma de calcular beta_R cuando 16 < M
+        C + c.a73*(M - 16.0))
+    
+    return _escalar(beta_R - 1)
 
 #Gamma
+@np.errstate(**_sin_avisos)
 def gamma(M, Z): 
     '''
     Función que entrega gamma.
@@ -456,51 +794,25 @@ def gamma(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    #Calculamos los coeficientes que dependen de dseta
-    a75 =  8.109*(10**-1)    - 6.282*(10**-1)*x
-    a76 =  1.192334*(10**-2) + 1.083057*(10**-2)*x + 1.230969*(10**0)*x**2  + 1.551656*(10**0)*x**3 
-    a77 = -1.668868*(10**-1) + 5.818123*(10**-1)*x - 1.105027*(10**1)*x**2  - 1.668070*(10**1)*x**3
-    a78 =  7.615495*(10**-1) + 1.068243*(10**-1)*x - 2.011333*(10**-1)*x**2 - 9.371415*(10**-2)*x**3
-    a79 =  9.409838*(10**0)  + 1.522928*(10**0)*x
-    a80 = -2.7110*(10**-1)   - 5.7560*(10**-1)*x   - 8.3800*(10**-2)*x**2
-    a81 =  2.4930 *(10**0)   + 1.1475*(10**0)*x
-   
-    #Aplicamos condiciones sobre los valores de algunos coeficientes
-    a75 = max(1.0, min(a75, 1.27))
-    a75 = max(a75, 0.6355 - 0.4192*x)
-    a76 = max(a76, -0.1015564 - 0.2161264*x - 0.05182516*x**2)
-    a77 = max(-0.3868776 - 0.5457078*x - 0.1463472*x**2, min(0.0, a77))
-    a78 = max(0.0, min(a78, 7.454 + 9.046*x))
-    a79 = min(a79, max(2.0, -13.3 - 18.6*x))
-    a80 = max(0.0585542, a80)
-    a81 = min(1.5, max(0.4, a81))
-    
-    B   = a76 + a77*(1.0 - a78)**a79 #El valor de gamma cuando M = 1
-    
-    if a75 == 1.0:
-        C = B
-    else:
-        C = a80
+    #Obtenemos a75, a80, B (el valor de gamma cuando M = 1) y C
+    a75, a80, B, C = c.a75, c.a80, c.B_gamma, c.C_gamma
 
     ###########################################################################
     #Ahora calculamos gamma, pero la forma de calcularla depende de M
     
-    if M <= 1.0: #Forma de calcular gamma cuando M <= 1
-        gamma = a76 + a77*(M - a78)**a79
-                    
-    elif 1.0 < M <= a75: #Forma de calcular gamma cuando 1 < M <= a75 
-        gamma = B + (a80 - B)*((M - 1.0)/(a75 - 1.0))**a81
-                    
-    elif a75 < M < (a75 + 0.1): #Forma de calcular gamma cuando a75<M<(a75+0.1)
-        gamma = C - 10.0*(M - a75)*C
-        
-    elif (a75 + 0.1) <= M: #Forma de calcular gamma cuando (a75 + 0.1) <= M
-        gamma = 0  
-    
-    
-    return gamma
+    gamma = np.select(
+        [M <= 1.0,          #Forma de calcular gamma cuando M <= 1
+         M <= a75,          #Forma de calcular gamma cuando 1 < M <= a75
+         M < (a75 + 0.1)],  #Forma de calcular gamma cuando a75<M<(a75+0.1)
+        [c.a76 + c.a77*(M - c.a78)**c.a79,
+         B + (a80 - B)*((M - 1.0)/(a75 - 1.0))**c.a81,
+         C - 10.0*(M - a75)*C],
+        #Forma de calcular gamma cuando (a75 + 0.1) <= M
+        0.0)
+    
+    return _escalar(gamma)
 
 #Radio de la estrella en la secuencia principal
 def R_MS(t, M, Z):
@@ -513,18 +825,22 @@ def R_MS(t, M, Z):
     t: Tiempo de vida de la estrella en la secuencia principal (En Myr)
     Z: Metalicidad de la estrella
     M: Masa de la estrella (Masas solares)
+    
+    t, M y Z pueden ser números o arrays de numpy (con broadcasting), en cuyo
+    caso se entrega un array con el valor para cada combinación.
     '''
     
+    #Obtenemos una sola vez los coeficientes asociados a la metalicidad
+    c = coeficientes(Z)
+    
     #Evaluamos todos los coeficientes y variables definidos con anterioridad
-    r_ZAMS = R_ZAMS(M, Z)
-    a_R = alpha_R(M, Z)
-    b_R = beta_R(M, Z)
-    g_R = gamma(M, Z)
-    r_TMS = R_TMS(M, Z)
-    dR = deltaR(M, Z)
-    ta = tau(t, M, Z)
-    ta1 = tau_1(t, M, Z)
-    ta2 = tau_2(t, M, Z)
+    r_ZAMS = R_ZAMS(M, c)
+    a_R = alpha_R(M, c)
+    b_R = beta_R(M, c)
+    g_R = gamma(M, c)
+    r_TMS = R_TMS(M, c)
+    dR = deltaR(M, c)
+    ta, ta1, ta2 = _taus(t, *_tiempos(M, c))
     
     #Evaluamos todo para obtener el valor del lado derecho de la ecuación
     exp = a_R*ta + b_R*ta**10 + g_R*ta**40 + (np.log10(r_TMS/r_ZAMS) - a_R - b_R - g_R)*ta**3 - dR*(ta1**3 - ta2**3)
@@ -548,19 +864,10 @@ def L_ZAMS(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad
-    
-    # Calculamos los coeficientes en función de dseta
-    alpha   = 0.39704170 -  0.32913574*x +  0.34776688*x**2 +  0.37470851*x**3 + 0.09011915*x**4
-    beta    = 8.52762600 - 24.41225973*x + 56.43597107*x**2 + 37.06152575*x**3 + 5.45624060*x**4
-    gamma   = 0.00025546 -  0.00123461*x -  0.00023246*x**2 +  0.00045519*x**3 + 0.00016176*x**4
-    delta   = 5.43288900 -  8.62157806*x + 13.44202049*x**2 + 14.51584135*x**3 + 3.39793084*x**4
-    epsilon = 5.56357900 - 10.32345224*x + 19.44322980*x**2 + 18.97361347*x**3 + 4.16903097*x**4
-    zeta    = 0.78866060 -  2.90870942*x +  6.54713531*x**2 +  4.05606657*x**3 + 0.53287322*x**4
-    eta     = 0.00586685 -  0.01704237*x +  0.03872348*x**2 +  0.02570041*x**3 + 0.00383376*x**4
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
     #Calculamos la luminosidad en función de los coeficientes y la masa estelar
-    L_ZAMS = (alpha*(M**5.5) + beta*(M**11))/(gamma + M**3 + delta*(M**5) + epsilon*(M**7) + zeta*(M**8) + eta*(M**9.5))
+    L_ZAMS = (c.alpha*(M**5.5) + c.beta*(M**11))/(c.gamma + M**3 + c.delta*(M**5) + c.epsilon*(M**7) + c.zeta*(M**8) + c.eta*(M**9.5))
 
     return L_ZAMS
 
@@ -577,27 +884,18 @@ def L_TMS(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dzeta a partir de la metalicidad    
-    
-    #Obtenemos los coeficientes a partir de dseta y sigma
-    a11_p = 1.031538*(10**0)  - 2.434480*(10**-1)*x  + 7.732821*(10**0)*x**2  + 6.460705*(10**0)*x**3 + 1.374484*(10**0)*x**4
-    a12_p = 1.043715*(10**0)  - 1.577474*(10**0)*x   - 5.168234*(10**0)*x**2  - 5.596506*(10**0)*x**3 - 1.299394*(10**0)*x**4
-    a13   = 7.859573*(10**2)  - 8.542048*(10**0)*x   - 2.642511*(10**1)*x**2  - 9.585707*(10**0)*x**3 
-    a14   = 3.858911*(10**3)  + 2.459681*(10**3)*x   - 7.630093*(10**1)*x**2  - 3.486057*(10**2)*x**3 - 4.861703*(10**1)*x**4 
-    a15   = 2.888720*(10**2)  + 2.952979*(10**2)*x   + 1.850341*(10**2)*x**2  + 3.797254*(10**1)*x**3  
-    a16   = 7.196580*(10**0)  + 5.613746*(10**-1)*x  + 3.805871*(10**-1)*x**2 + 8.398728*(10**-2)*x**3
-    a11   = a11_p*a14
-    a12   = a12_p*a14
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
    
     ###########################################################################
     #Ahora calculamos L_TMS:
     
-    L_TMS = (a11*(M**3) + a12*(M**4) + a13*(M**(a16 + 1.8)))/(a14 + a15*(M**5) + M**a16)
+    L_TMS = (c.a11*(M**3) + c.a12*(M**4) + c.a13*(M**(c.a16 + 1.8)))/(c.a14 + c.a15*(M**5) + M**c.a16)
     
     
     return L_TMS
 
 #Delta L 
+@np.errstate(**_sin_avisos)
 def deltaL(M, Z): 
     '''
     Función que entrega deltaL.
@@ -609,37 +907,26 @@ def deltaL(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a34 = 1.910302*(10**-1) + 1.158624*(10**-1)*x + 3.348990*(10**-2)*x**2 + 2.599706*(10**-3)*x**3
-    a35 = 3.931056*(10**-1) + 7.277637*(10**-2)*x - 1.366593*(10**-1)*x**2 - 4.508946*(10**-2)*x**3
-    a36 = 3.267776*(10**-1) + 1.204424*(10**-1)*x + 9.988332*(10**-2)*x**2 + 2.455361*(10**-2)*x**3
-    a37 = 5.990212*(10**-1) + 5.570264*(10**-2)*x + 6.207626*(10**-2)*x**2 + 1.777283*(10**-2)*x**3
-    a33 = min(1.4, 1.5135 + 0.3769*x)
-    a33 = max(0.6355 - 0.4192*x, max(1.25, a33))
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    #Calculamos el valor B, que viene a ser deltaL cuando M = a33
-    B   = min(a34/(a33**a35), a36/(a33**a37))
-    
-    #Obtenemos M_hook
-    m   = M_hook(Z)
+    #Obtenemos M_hook, a33 y el valor B, que viene a ser deltaL cuando M = a33
+    m, a33, B = c.M_hook, c.a33, c.B_deltaL
     
     ###########################################################################
     #Ahora calculamos deltaL, pero la forma de calcularla depende de M
     
-    if M <= m: #Forma de calcular deltaR cuando M <= M_{hook}
-        deltaL = 0.0
-                    
-    elif m < M < a33: #Forma de calcular deltaR cuando M_{hook} < M < a33
-        deltaL = B*((M - m)/(a33 - m))**0.4
-                    
-    elif a33 <= M: #Forma de calcular deltaR cuando a33 <= M 
-        deltaL = min(a34/(M**a35), a36/(M**a37))
+    deltaL = np.select(
+        [M <= m,    #Forma de calcular deltaR cuando M <= M_{hook}
+         M < a33],  #Forma de calcular deltaR cuando M_{hook} < M < a33
+        [0.0,
+         B*((M - m)/(a33 - m))**0.4],
+        #Forma de calcular deltaR cuando a33 <= M
+        np.minimum(c.a34/(M**c.a35), c.a36/(M**c.a37)))
      
-    return deltaL
+    return _escalar(deltaL)
 
 #Alpha L
+@np.errstate(**_sin_avisos)
 def alpha_L(M, Z): 
     '''
     Función que entrega alpha_L.
@@ -651,65 +938,33 @@ def alpha_L(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a45 = 2.321400*(10**-1) + 1.828075*(10**-3)*x - 2.232007*(10**-2)*x**2 - 3.378734*(10**-3)*x**3
-    a46 = 1.163659*(10**-2) + 3.427682*(10**-3)*x + 1.421393*(10**-3)*x**2 - 3.710666*(10**-3)*x**3
-    a47 = 1.048020*(10**-2) - 1.231921*(10**-2)*x - 1.686860*(10**-2)*x**2 - 4.234354*(10**-3)*x**3
-    a48 = 1.555590*(10**0)  - 3.223927*(10**-1)*x - 5.197429*(10**-1)*x**2 - 1.066441*(10**-1)*x**3
-    a49 = 9.7700*(10**-2)   - 2.3100*(10**-1)*x   - 7.5300*(10**-2)*x**2
-    a50 = 2.4000*(10**-1)   + 1.8000*(10**-1)*x   + 5.9500*(10**-1)*x**2
-    a51 = 3.3000*(10**-1)   + 1.3200*(10**-1)*x   + 2.1800*(10**-1)*x**2
-    a52 = 1.1064*(10**0)    + 4.1500*(10**-1)*x   + 1.8000*(10**-1)*x**2 
-    a53 = 1.1900*(10**0)    + 3.7700*(10**-1)*x   + 1.7600*(10**-1)*x**2
-    
-    #Aplicamos condiciones sobre los valores de algunos coeficientes
-    a49 = max(a49, 0.145)
-    a50 = min(a50, 0.306 + 0.053*x)
-    a51 = min(a51, 0.3625 + 0.062*x)
-    a52 = max(a52, 0.9)
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    if Z > 0.01:
-        a52 = min(a52, 1.0)
-    else:
-        pass
-    
-    a53 = max(a53, 1.0)
-    
-    if Z > 0.01:
-        a53 = min(a53, 1.1)
-    else:
-        pass
-    
-    #El valor de alpha_L cuando M = 2.0
-    B = (a45 + a46*2.0**a48)/(2.0**0.4 + a47*2.0**1.9) 
+    #Obtenemos los coeficientes que definen las secciones y el valor de 
+    #alpha_L cuando M = 2.0
+    a49, a50, a51, a52, a53, B = c.a49, c.a50, c.a51, c.a52, c.a53, c.B_alpha_L
 
     ###########################################################################
     #Ahora calculamos alpha_L, pero la forma de calcularla depende de M
     
-    if M < 0.50: #Forma de calcular alpha_L cuando M < 0.5
-        alpha_L = a49
-                    
-    elif 0.50 <= M < 0.7: #Forma de calcular alpha_L cuando 0.5 <= M <0.7  
-        alpha_L = a49 + 5.0*(0.3 - a49)*(M - 0.5)
-                    
-    elif 0.7 <= M < a52: #Forma de calcular alpha_L cuando 0.7 <= M < a52
-        alpha_L = 0.3 + ((a50 - 0.3)*(M - 0.7))/(a52 - 0.7)
-        
-    elif a52 <= M < a53: #Forma de calcular alpha_L cuando a52 <= M < a53
-        alpha_L = a50 + ((a51 - a50)*(M - a52))/(a53 - a52)
-                                    
-    elif a53 <= M < 2.0: #Forma de calcular alpha_L cuando a53 <= M < 2.0  
-        alpha_L = a51 + ((B - a51)*(M - a53))/(2.0 - a53)
-                                    
-    elif 2.0 <= M: #Forma de calcular alpha_L cuando 2.0 <= M
-        alpha_L = (a45 + a46*M**a48)/(M**0.4 + a47*M**1.9)     
-    
-    
-    return alpha_L
+    alpha_L = np.select(
+        [M < 0.50,  #Forma de calcular alpha_L cuando M < 0.5
+         M < 0.7,   #Forma de calcular alpha_L cuando 0.5 <= M <0.7
+         M < a52,   #Forma de calcular alpha_L cuando 0.7 <= M < a52
+         M < a53,   #Forma de calcular alpha_L cuando a52 <= M < a53
+         M < 2.0],  #Forma de calcular alpha_L cuando a53 <= M < 2.0
+        [a49,
+         a49 + 5.0*(0.3 - a49)*(M - 0.5),
+         0.3 + ((a50 - 0.3)*(M - 0.7))/(a52 - 0.7),
+         a50 + ((a51 - a50)*(M - a52))/(a53 - a52),
+         a51 + ((B - a51)*(M - a53))/(2.0 - a53)],
+        #Forma de calcular alpha_L cuando 2.0 <= M
+        (c.a45 + c.a46*M**c.a48)/(M**0.4 + c.a47*M**1.9))
+    
+    return _escalar(alpha_L)
 
 #Beta L
+@np.errstate(**_sin_avisos)
 def beta_L(M, Z): 
     '''
     Función que entrega beta_L.
@@ -721,27 +976,19 @@ def beta_L(M, Z):
     M: Masa de la estrella (Masas solares)
     '''
     
-    x = dseta(Z)     #Obtenemos dseta a partir de la metalicidad
-    
-    #Calculamos los coeficientes que dependen de dseta
-    a54 = 3.855707*(10**-1) - 6.104166*(10**-1)*x + 5.676742*(10**0)*x**2 + 1.060894*(10**1)*x**3 + 5.284014*(10**0)*x**4
-    a55 = 3.579064*(10**-1) - 6.442936*(10**-1)*x + 5.494644*(10**0)*x**2 + 1.054952*(10**1)*x**3 + 5.280991*(10**0)*x**4
-    a56 = 9.587587*(10**-1) + 8.777464*(10**-1)*x + 2.017321*(10**-1)*x**2
-    a57 = min(1.4, 1.5135 + 0.3769*x)
-    a57 = max(0.6355 - 0.4192*x, max(1.25, a57))
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
     
-    B   = max(0.0, a54 - a55*a57**a56)   #El valor de beta_L cuando M = a57
+    #Obtenemos a57 y B, el valor de beta_L cuando M = a57
+    a57, B = c.a57, c.B_beta_L
     
     ###########################################################################
     #Ahora calculamos beta_L, pero la forma de calcularla depende de M
     
-    beta_L = max(0.0, a54 - a55*M**a56)
+    beta_L = np.maximum(0.0, c.a54 - c.a55*M**c.a56)
     
-    if M > a57 and beta_L > 0:
-        
-        beta_L = max(0.0, B - 10.0*(M - a57)*B)
+    beta_L = np.where((M > a57) & (beta_L > 0), np.maximum(0.0, B - 10.0*(M - a57)*B), beta_L)
     
-    return beta_L
+    return _escalar(beta_L)
 
 #eta
 def eta(M, Z):
@@ -754,17 +1001,12 @@ def eta(M, Z):
     Z: Metalicidad de la estrella
     M: Masa de la estrella (Masas solares)
     '''
-    if Z <= 0.0009:
-        if M <= 1.0:
-            eta = 10
-        elif 1.0 < M < 1.1:
-            eta = 100*M - 90
-        elif 1.1 <= M:
-            eta = 20
-    else:
-        eta = 10
+    
+    c = coeficientes(Z)     #Obtenemos los coeficientes asociados a la metalicidad
+    
+    eta = np.where(c.eta_bajo, np.select([M <= 1.0, M < 1.1], [10.0, 100*M - 90], 20.0), 10.0)
         
-    return eta
+    return _escalar(eta)
 
 #Luminosidad de la estrella en la secuencia principal
 def L_MS(t, M, Z):
@@ -778,18 +1020,22 @@ def L_MS(t, M, Z):
     t: Tiempo de vida de la estrella en la secuencia principal (En Myr)
     Z: Metalicidad de la estrella
     M: Masa de la estrella (Masas solares)
+    
+    t, M y Z pueden ser números o arrays de numpy (con broadcasting), en cuyo
+    caso se entrega un array con el valor para cada combinación.
     '''
     
+    #Obtenemos una sola vez los coeficientes asociados a la metalicidad
+    c = coeficientes(Z)
+    
     #Evaluamos todos los coeficientes y variables definidos con anterioridad
-    l_ZAMS = L_ZAMS(M, Z)
-    a_L = alpha_L(M, Z)
-    b_L = beta_L(M, Z)
-    et = eta(M, Z)
-    l_TMS = L_TMS(M, Z)
-    dL = deltaL(M, Z)
-    ta = tau(t, M, Z)
-    ta1 = tau_1(t, M, Z)
-    ta2 = tau_2(t, M, Z)
+    l_ZAMS = L_ZAMS(M, c)
+    a_L = alpha_L(M, c)
+    b_L = beta_L(M, c)
+    et = eta(M, c)
+    l_TMS = L_TMS(M, c)
+    dL = deltaL(M, c)
+    ta, ta1, ta2 = _taus(t, *_tiempos(M, c))
     
     #Evaluamos todo para obtener el valor del lado derecho de la ecuación
     exp = a_L*ta + b_L*ta**et + (np.log10(l_TMS/l_ZAMS) - a_L - b_L)*ta**2 - dL*(ta1**2 - ta2**2)
@@ -800,6 +1046,115 @@ def L_MS(t, M, Z):
     
     return L_MS
 
+#Camino de una estrella por la secuencia principal
+class StarTrack:
+    '''
+    Clase que representa el camino de una estrella de masa M y metalicidad Z
+    por la secuencia principal. Al crearla se calcula todo lo que no depende
+    del tiempo (R_ZAMS, R_TMS, L_ZAMS, L_TMS, alpha, beta, gamma, eta, delta,
+    t_hook y t_MS), de modo que evaluar el radio, la luminosidad o la
+    temperatura efectiva para muchas edades cuesta solo unas pocas
+    operaciones con arrays.
+    
+    Los valores que entrega son los mismos que los de R_MS, L_MS y T_eff.
+    Depende de:
+    
+    M: Masa de la estrella (Masas solares)
+    Z: Metalicidad de la estrella
+    
+    M y Z pueden ser arrays, en ese caso las edades con las que se evalúa
+    deben tener una forma compatible (broadcasting) con la de M y Z.
+    '''
+    
+    def __init__(self, M, Z):
+        
+        #Obtenemos los coeficientes asociados a la metalicidad
+        c = coeficientes(Z)
+        
+        self.M = M
+        self.Z = Z
+        
+        #Tiempos característicos de la secuencia principal (En Myr)
+        self.t_hook, self.t_MS = _tiempos(M, c)
+        
+        #Términos del radio
+        self.R_ZAMS = R_ZAMS(M, c)
+        self.R_TMS = R_TMS(M, c)
+        self.alpha_R = alpha_R(M, c)
+        self.beta_R = beta_R(M, c)
+        self.gamma = gamma(M, c)
+        self.deltaR = deltaR(M, c)
+        
+        #Términos de la luminosidad
+        self.L_ZAMS = L_ZAMS(M, c)
+        self.L_TMS = L_TMS(M, c)
+        self.alpha_L = alpha_L(M, c)
+        self.beta_L = beta_L(M, c)
+        self.eta = eta(M, c)
+        self.deltaL = deltaL(M, c)
+        
+        #Coeficientes de tau**3 y tau**2 en los exponentes de R_MS y L_MS
+        self._c3_R = np.log10(self.R_TMS/self.R_ZAMS) - self.alpha_R - self.beta_R - self.gamma
+        self._c2_L = np.log10(self.L_TMS/self.L_ZAMS) - self.alpha_L - self.beta_L
+    
+    def tau(self, t):
+        '''
+        Entrega la fracción t/t_MS del tiempo de vida en la secuencia
+        principal para la edad t (En Myr).
+        '''
+        
+        return t/self.t_MS
+    
+    def _R(self, ta, ta1, ta2):
+        
+        exp = self.alpha_R*ta + self.beta_R*ta**10 + self.gamma*ta**40 + self._c3_R*ta**3 - self.deltaR*(ta1**3 - ta2**3)
+        
+        return self.R_ZAMS*10**exp
+    
+    def _L(self, ta, ta1, ta2):
+        
+        exp = self.alpha_L*ta + self.beta_L*ta**self.eta + self._c2_L*ta**2 - self.deltaL*(ta1**2 - ta2**2)
+        
+        return self.L_ZAMS*10**exp
+    
+    def R(self, t):
+        '''
+        Entrega el radio de la estrella (En radios solares) a la edad t
+        (En Myr), igual que R_MS(t, M, Z).
+        '''
+        
+        return self._R(*_taus(t, self.t_hook, self.t_MS))
+    
+    def L(self, t):
+        '''
+        Entrega la luminosidad de la estrella (En luminosidades solares) a la
+        edad t (En Myr), igual que L_MS(t, M, Z).
+        '''
+        
+        return self._L(*_taus(t, self.t_hook, self.t_MS))
+    
+    def T_eff(self, t):
+        '''
+        Entrega la temperatura efectiva de la estrella (En Kelvin) a la edad t
+        (En Myr), igual que T_eff(L_MS(t, M, Z), R_MS(t, M, Z)).
+        '''
+        
+        taus = _taus(t, self.t_hook, self.t_MS)
+        
+        return T_eff(self._L(*taus), self._R(*taus))
+    
+    def RLT(self, t):
+        '''
+        Entrega la tupla (R, L, T_eff) de la estrella a la edad t (En Myr),
+        calculando tau, tau_1 y tau_2 una sola vez.
+        '''
+        
+        taus = _taus(t, self.t_hook, self.t_MS)
+        R = self._R(*taus)
+        L = self._L(*taus)
+        
+        return R, L, T_eff(L, R)
+
 #Temperatura base de vientos solares
 def T_0(M, R, output='mean'):
     '''
@@ -818,10 +1173,10 @@ def T_0(M, R, output='mean'):
     #Primero vamos a definir algunos parámetros y constantes
     
     #Constante gravitacional (en (N*m**2)/kg**2)
-    G = cons.G.value  
+    G = SI.G  
     
     #Masa de un proton (en kg)
-    m_p = cons.m_p.value
+    m_p = SI.m_p
     
     #Masa promedio por partícula en unidades de m_p (adimensional)
     mu = 0.6 
@@ -830,7 +1185,7 @@ def T_0(M, R, output='mean'):
     gamma = 5/3 
     
     #Constante de Boltzmann (J/K)
-    k_B = cons.k_B.value 
+    k_B = SI.k_B 
     
     #Cociente entre la velocidad base del sonido y la de escapeen la superficie
     #para vientos lentos (adimensional)
@@ -841,8 +1196,8 @@ def T_0(M, R, output='mean'):
     cv_fast = 0.478
     
     #Ahora vamos a convertir las unidades de medida de M y R al SI
-    m = M*cons.M_sun.value #De masas solares a kg
-    r = R*cons.R_sun.value #De radios solares a m
+    m = M*SI.M_sun #De masas solares a kg
+    r = R*SI.R_sun #De radios solares a m
     
     #Calculamos la temperatura base para cada tipo de viento, lo multiplicamos
     #por 10^-6 para entregar la temperatura en MK
@@ -860,6 +1215,21 @@ def T_0(M, R, output='mean'):
     elif output == 'fast':
         return T_0_fast
 
+#Coeficientes de los ajustes de los vientos, que comparten v_1AU, dvdr, omega,
+#M_punto y las derivadas de R_eq_grad:
+#
+#    v_1AU = c0 + c1*T + c2*T**2 + c3*T**3 (En km/s, T en MK)
+#    dvdr = c0 + c1*T + c2*T**2 + c3*T**3 (En km/(s*R_sol), T en MK)
+#    omega = OMEGA_0*M**EXP_OMEGA_M*(t/2)**EXP_OMEGA_T
+#    M_punto = R**2*omega**EXP_M_PUNTO_OMEGA*M**EXP_M_PUNTO_M
+COEF_V_1AU = (73.39, 224.14, -11.28, 0.28)
+COEF_DVDR = (0.19, 0.066, -0.0035, 9.97*10**-5)
+OMEGA_0 = 1.667
+EXP_OMEGA_M = 0.652
+EXP_OMEGA_T = -0.566
+EXP_M_PUNTO_OMEGA = 1.33
+EXP_M_PUNTO_M = -3.36
+
 #Rapidez de los vientos a 1 AU    
 def v_1AU(M, R):
     '''
@@ -873,8 +1243,20 @@ def v_1AU(M, R):
     R: Radio de la estrella (En Radios solares)
     '''
     
-    #Calculamos la rapidez
-    v = 73.39 + 224.14*T_0(M, R) - 11.28*T_0(M, R)**2 + 0.28*T_0(M, R)**3 
+    #Calculamos la rapidez a partir de la temperatura base
+    v = _v_1AU_T0(T_0(M, R))
+    
+    return v
+
+#Rapidez de los vientos a 1 AU en función de la temperatura base
+def _v_1AU_T0(T):
+    '''
+    Función que entrega la rapidez de los vientos a 1 AU (En km/s) a partir de
+    la temperatura base T de los vientos (En MK).
+    '''
+    
+    c0, c1, c2, c3 = COEF_V_1AU
+    v = c0 + c1*T + c2*T**2 + c3*T**3
     
     return v
 
@@ -891,9 +1273,20 @@ def dvdr(M, R):
     R: Radio de la estrella (En Radios solares)
     '''
     
-    #Calculamos el cambio de rapidez
-    dvdr = 0.19 + 0.066*T_0(M, R) - 0.0035*T_0(M, R)**2 + (9.97*10**-5)*T_0(M, R)**3
-   
+    #Calculamos el cambio de rapidez a partir de la temperatura base
+    dvdr = _dvdr_T0(T_0(M, R))
+    
+    return dvdr
+
+#Cambio de rapidez de los vientos en función de la temperatura base
+def _dvdr_T0(T):
+    '''
+    Función que entrega el cambio de rapidez de los vientos (En km/(s*R_sol))
+    a partir de la temperatura base T de los vientos (En MK).
+    '''
+    
+    c0, c1, c2, c3 = COEF_DVDR
+    dvdr = c0 + c1*T + c2*T**2 + c3*T**3
     
     return dvdr
 
@@ -911,11 +1304,14 @@ def v_sw(r, M, R):
     R: Radio de la estrella (En Radios solares)
     '''
    
+    #Calculamos la temperatura base una sola vez
+    T = T_0(M, R)
+    
     #Primero vamos a cambiar las unidades de dv/dr
-    dvdr_au = dvdr(M, R)/((cons.R_sun.to(u.AU)).value)  #De km/(s*R_sol) a km/(s*AU)
+    dvdr_au = _dvdr_T0(T)/SI.R_sun_au  #De km/(s*R_sol) a km/(s*AU)
     
     #Calculamos la rapidez
-    v = v_1AU(M, R) + (r - 1)*dvdr_au
+    v = _v_1AU_T0(T) + (r - 1)*dvdr_au
     
     return v
 
@@ -933,7 +1329,7 @@ def omega(t, M):
     '''
     
     #Calculamos la rapidez angular
-    omega_s = (1.667*M**0.652)*(t/2)**-0.566 
+    omega_s = (OMEGA_0*M**EXP_OMEGA_M)*(t/2)**EXP_OMEGA_T 
     
     return omega_s
 
@@ -953,7 +1349,7 @@ def M_punto(t, M, R):
     '''
     
     #Calculamos la perdida de masa por unidad de tiempo
-    Mpunto = (R**2)*(omega(t, M)**1.33)*(M**-3.36)
+    Mpunto = (R**2)*(omega(t, M)**EXP_M_PUNTO_OMEGA)*(M**EXP_M_PUNTO_M)
     
     return Mpunto
 
@@ -973,20 +1369,8 @@ def rho_SW(t, r, M, R):
     R: Radio de la estrella (En Radios solares)
     '''
     
-    #Primero vamos a calcular M_punto y v_SW, y pasaremos sus unidades junto 
-    #con la de r a unidades del SI
-    
-    #M_punto lo calculamos y lo pasamos a kg/s
-    M_punto_si = M_punto(t, M, R)*(((1.4*1e-14)*cons.M_sun)/(1*u.yr.to(u.s))).value
-    
-    #r lo pasamos a metros
-    r_si = r*cons.au.value
-    
-    #v_SW lo pasamos a m/s (recordar que v_SW entrega v en km/s)
-    v_si = v_sw(r, M, R)*10**3 
-    
-    #Calculamos la densidad del viento estelar
-    rho = M_punto_si/(4*np.pi*v_si*r_si**2)
+    #Calculamos la densidad con el perfil de los vientos de la estrella
+    rho = StellarWind(t, M, R).density(r)
     
     return rho
 
@@ -1006,14 +1390,133 @@ def P_SW(t, r, M, R):
     R: Radio de la estrella (En Radios solares)
     '''
     
-    #Primero tomamos la velocidad y pasamos sus unidades a unidades del SI
-    v_si = v_sw(r, M, R)*10**3 
-    
-    #Calculamos la presión
-    P = rho_SW(t, r, M, R)*(v_si)**2
+    #Calculamos la presión con el perfil de los vientos de la estrella
+    P = StellarWind(t, M, R).pressure(r)
     
     return P
 
+#Perfil radial de los vientos estelares
+def _perfil_viento(r, v1, dvdr_au, M_punto_si):
+    '''
+    Función que entrega la tupla (v_si, rho, P) con la rapidez (En m/s), la
+    densidad (En kg/m**3) y la presión (En pascales) de los vientos a una 
+    distancia r (En AU), a partir de la rapidez a 1 AU v1 (En km/s), el
+    cambio de rapidez dvdr_au (En km/(s*AU)) y la pérdida de masa M_punto_si
+    (En kg/s).
+    '''
+    
+    #r lo pasamos a metros
+    r_si = r*SI.au
+    
+    #v_SW lo pasamos a m/s
+    v_si = (v1 + (r - 1)*dvdr_au)*10**3
+    
+    #Calculamos la densidad y la presión del viento estelar
+    rho = M_punto_si/(4*np.pi*v_si*r_si**2)
+    P = rho*(v_si)**2
+    
+    return v_si, rho, P
+
+#Vientos de una estrella
+class StellarWind:
+    '''
+    Clase que representa los vientos de una estrella de masa M, radio R y que
+    lleva un tiempo t en la secuencia principal. Al crearla se calculan una
+    sola vez la temperatura base T_0, la rapidez a 1 AU, el cambio de rapidez
+    dv/dr y la pérdida de masa en kg/s, y después se pueden evaluar la 
+    rapidez, la densidad y la presión para arrays de distancias r (En AU).
+    
+    Los valores que entrega son los mismos de v_sw, rho_SW y P_SW.
+    Depende de:
+    
+    t: Tiempo en la secuencia principal  (En Gyr)
+    M: Masa de la estrella (En Masas solares)
+    R: Radio de la estrella (En Radios solares)
+    '''
+    
+    def __init__(self, t, M, R):
+        
+        self.t = t
+        self.M = M
+        self.R = R
+        
+        #Temperatura base (MK), rapidez a 1 AU (km/s) y cambio de rapidez
+        #(km/(s*R_sol) y km/(s*AU))
+        self.T_0 = T_0(M, R)
+        self.v_1AU = _v_1AU_T0(self.T_0)
+        self.dvdr = _dvdr_T0(self.T_0)
+        self.dvdr_au = self.dvdr/SI.R_sun_au
+        
+        #Pérdida de masa en unidades solares y en kg/s
+        self.M_punto = M_punto(t, M, R)
+        self.M_punto_si = self.M_punto*SI.M_punto_sol
+    
+    def velocity(self, r):
+        '''
+        Entrega la rapidez de los vientos (En km/s) a la distancia r (En AU).
+        '''
+        
+        return self.v_1AU + (r - 1)*self.dvdr_au
+    
+    def density(self, r):
+        '''
+        Entrega la densidad de los vientos (En kg/m**3) a la distancia r (En
+        AU).
+        '''
+        
+        return _perfil_viento(r, self.v_1AU, self.dvdr_au, self.M_punto_si)[1]
+    
+    def pressure(self, r):
+        '''
+        Entrega la presión de los vientos (En pascales) a la distancia r (En
+        AU).
+        '''
+        
+        return _perfil_viento(r, self.v_1AU, self.dvdr_au, self.M_punto_si)[2]
+    
+    def profile(self, r):
+        '''
+        Entrega la tupla (v, rho, P) con la rapidez (En km/s), la densidad (En
+        kg/m**3) y la presión (En pascales) de los vientos a las distancias r
+        (En AU), calculadas en una sola pasada. Sirve para graficar perfiles 
+        radiales.
+        '''
+        
+        v_si, rho, P = _perfil_viento(r, self.v_1AU, self.dvdr_au, self.M_punto_si)
+        
+        return v_si*10**-3, rho, P
+    
+    @np.errstate(**_sin_avisos)
+    def equilibrium_radius(self, P):
+        '''
+        Entrega la distancia (En AU) a la que la presión de los vientos es 
+        igual a P (En pascales), calculada directamente.
+        
+        Como rho_SW = M_punto/(4*pi*v_sw*r**2), la presión de los vientos es
+        P_SW = rho_SW*v_sw**2 = A*v_sw(r)/r**2, con A = M_punto/(4*pi) y v_sw
+        lineal en r: v_sw = v_1AU + (r - 1)*dv/dr. Entonces P_SW = P es la 
+        ecuación cuadrática P*r**2 - A*(dv/dr)*r - A*(v_1AU - dv/dr) = 0, cuya
+        raíz física es la positiva.
+        '''
+        
+        #Rapidez a 1 AU (m/s) y cambio de rapidez (m/(s*AU))
+        v1 = self.v_1AU*10**3
+        k = self.dvdr_au*10**3
+        
+        #A con r en AU, de modo que P_SW = A*(v1 + (r - 1)*k)/r**2
+        A = self.M_punto_si/(4*np.pi*SI.au**2)
+        
+        #Raíz positiva de la ecuación cuadrática
+        Req = (A*k + np.sqrt((A*k)**2 + 4*P*A*(v1 - k)))/(2*P)
+        
+        return Req
+
+#Constante adiabática del remanente (adimensional) y factor numérico de 
+#Sedov-Taylor que depende de ella (adimensional), que comparten las funciones
+#del remanente y SedovTaylor
+GAMMA_SNR = 5/3
+BETA_SNR = 1.1517
+
 #Grosor del remanente de supernova
 def DeltaR_SNR(d):
     '''
@@ -1026,7 +1529,7 @@ def DeltaR_SNR(d):
     d: Distancia del remanente a el punto de origen de la supernova (pc)
     '''
     #Constante adiabática
-    gamma = 5/3
+    gamma = GAMMA_SNR
     
     #Calculamos el valor de DeltaR
     DeltaR_SNR = ((gamma - 1)*d)/(3*(gamma + 1))
@@ -1048,10 +1551,10 @@ def rho_SNR(d, n=0.1, tipo='Ia'):
           es de tipo Ia o II.
     '''
     #Constante adiabática (adimensional)
-    gamma = 5/3
+    gamma = GAMMA_SNR
     
     #Calculamos la densidad del medio interestelar en kg/m^3
-    rho_ISM = n*(cons.m_p.value)*(10**6) 
+    rho_ISM = n*(SI.m_p)*(10**6) 
     
     #Calculamos la densidad del remanente de supernova en kg/m^3
     rho_SNR = ((gamma + 1)/(gamma - 1))*rho_ISM
@@ -1059,30 +1562,24 @@ def rho_SNR(d, n=0.1, tipo='Ia'):
     #Aplicamos condiciones sobre rho_SNR
     
     #Calculamos DeltaR en metros
-    dr = DeltaR_SNR(d)*cons.pc.value 
+    dr = DeltaR_SNR(d)*SI.pc 
     #Calculamos d en metros
-    r = d*cons.pc.value
+    r = d*SI.pc
     #Calculamos el volumen del remanente en m^3
     V = (4/3)*np.pi*((r+dr/2)**3 - (r-dr/2)**3) 
     #Calculamos la masa del remanente (shell) y la pasamos a M_sol
-    M_sh = (rho_SNR*V)/(cons.M_sun.value)
+    M_sh = (rho_SNR*V)/(SI.M_sun)
     
     #Si la supernova es de tipo Ia y el remanente supera una masa de 1.4 Msol,
     #La densidad se redefine rho_SNR de tal manera que la masa sea 1.4 Msol. 
     #SI la supernova es de tipo II, el proceso es el mismo, pero para masa de
     #5 Msol.
-    if tipo == 'Ia':
-        if M_sh < 1.4:
-            rho_SNR = (1.4*cons.M_sun.value)/V #Msol a kg y se divide por V
-        else:
-            pass
-    elif tipo == 'II':
-        if M_sh < 5.0:
-            rho_SNR = (5.0*cons.M_sun.value)/V #Msol a kg y se divide por V
-        else:
-            pass
-        
-    return rho_SNR
+    tipo = np.asarray(tipo)
+    M_min = np.select([tipo == 'Ia', tipo == 'II'], [1.4, 5.0], 0.0)
+    
+    rho_SNR = np.where(M_sh < M_min, (M_min*SI.M_sun)/V, rho_SNR) #Msol a kg y se divide por V
+        
+    return _escalar(rho_SNR)
 
 #Rapidez del remanente
 def v_SNR(E, d, n=0.1):
@@ -1102,22 +1599,19 @@ def v_SNR(E, d, n=0.1):
     #Pasamos la energía a joules
     E = E*10**-7
     #Pasamos la distancia a metros
-    d = d*cons.pc.value 
+    d = d*SI.pc 
     #Calculamos la densidad del ISM en kg/m^3
-    rho_ISM = n*(cons.m_p.value)*(10**6) 
+    rho_ISM = n*(SI.m_p)*(10**6) 
     #Constante adiabática (adimensional)
-    gamma = 5/3
+    gamma = GAMMA_SNR
     #Factor numperico adimensional que depende de gamma
-    beta = 1.1517
+    beta = BETA_SNR
     
     #Calculamos la rapidez en m/s
     v = (4/5)*((beta**2.5)/(gamma + 1))*(E/(rho_ISM*d**3))**0.5 
     
     #Agregamos una condición para que v no sea mayor a 10.000 km/s
-    if v > 10000000:
-        v = 10000000
-    else:
-        pass
+    v = np.minimum(v, 10000000)
     
     return v*10**-3 #Entregamos la rapidez en km/s
 
@@ -1141,10 +1635,20 @@ def P_SNR(E, d, n = 0.1, tipo='Ia'):
     rho = rho_SNR(d, n, tipo)
     #Calculamos la rapidez del remanente en m/s
     v = v_SNR(E, d, n)*10**3
+    
+    return _P_SNR(rho, v, n)
+
+#Presión del remanente con su densidad y su rapidez
+def _P_SNR(rho, v, n):
+    '''
+    Función con la fórmula de P_SNR (En pascales) para la densidad rho (En 
+    kg/m^3) y la rapidez v (En m/s) del remanente, que usa también 
+    SedovTaylor cuando ya las calculó.
+    '''
     #Constante adiabática (adimensional)
-    gamma = 5/3
+    gamma = GAMMA_SNR
     #Calculamos la densidad del medio interestelar en kg/m^3
-    rho_ISM = n*(cons.m_p.value)*(10**6) 
+    rho_ISM = n*(SI.m_p)*(10**6) 
     
     #Calculamos la "ram pressure" del remanente en pascales
     P_ram = rho*v**2
@@ -1154,7 +1658,7 @@ def P_SNR(E, d, n = 0.1, tipo='Ia'):
     return P_ram + P_term #Entregamos la suma de ambas presiones
 
 #Radio de equilibrio
-def R_eq(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000):
+def R_eq(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, method='brentq'):
     '''
     Función que nos entrega el radio de equilibrio en el cual la presión del 
     remanente de una supernova en la fase de Sedov-Taylor y la presión de 
@@ -1176,8 +1680,24 @@ def R_eq(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000):
           es de tipo Ia o II (Trabajaremos con Ia preferentemente).
     a y b: Números que representan los límites sobre los que la función de
            optimización busca la raiz
+    method: String que nos dice si la raíz se busca con el método de Brent
+            ('brentq') o se calcula directamente de la fórmula cuadrática
+            ('analytic', ver StellarWind.equilibrium_radius). En ambos casos se arroja un
+            ValueError si la raíz no está dentro de [a, b].
     '''
     
+    if method == 'analytic':
+        
+        Req = StellarWind(t, M, R).equilibrium_radius(P_SNR(E, d, n, tipo))
+        
+        if not a <= Req <= b:
+            raise ValueError('No hay una raíz de P_SW - P_SNR dentro del intervalo [a, b]')
+        
+        return Req
+    
+    elif method != 'brentq':
+        raise ValueError("method debe ser 'brentq' o 'analytic'")
+    
     #Esta función genera otra función (función anidada) que depende de una 
     #variable r, que vendría a ser la distancia a la que se encuentra la 
     #estrella. Esta función ya tiene reemplazados los parámetros de la primera 
@@ -1186,21 +1706,27 @@ def R_eq(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000):
     #scipy. De esta forma se obtiene el valor de r que hace que se igualen las
     #presiones del remanente y de los vientos
     
+    #Los vientos de la estrella y la presión del remanente no cambian entre
+    #las iteraciones, así que se calculan una sola vez
+    viento = StellarWind(t, M, R)
+    P = P_SNR(E, d, n, tipo)
+    
     #Generamos la función
     def fun(r):
         
-        f = P_SW(t, r, M, R)-P_SNR(E, d, n, tipo) 
+        f = viento.pressure(r) - P
         
         return f
     
     #Buscamos el valor de r que es raiz y lo entregamos 
+    from scipy import optimize
     sol = optimize.root_scalar(fun, bracket=[a, b], method='brentq')
     
     return sol.root
 
 #Radio de equilibrio calculando el radio estelar en función de la masa, 
 #metalicidad y tiempo en la secuencia principal
-def R_eqM(t, M, Z, E, d, n=0.1, tipo='Ia', a = 0.0001, b = 1000):
+def R_eqM(t, M, Z, E, d, n=0.1, tipo='Ia', a = 0.0001, b = 1000, method='brentq'):
     '''
     Función que calcula el radio de equilibrio entre la presión de los vientos
     estelares y la presión de una supernova en fase de Sedov-Taylor. Se 
@@ -1223,6 +1749,8 @@ def R_eqM(t, M, Z, E, d, n=0.1, tipo='Ia', a = 0.0001, b = 1000):
           es de tipo Ia o II.
     a y b: Números que representan los límites sobre los que la función de
            optimización busca la raiz
+    method: Método con el que se calcula la raíz ('brentq' o 'analytic'),
+            ver R_eq.
     '''
     
     #Calcula el radio de la estrella, el tiempo se multiplica por mil para 
@@ -1231,10 +1759,405 @@ def R_eqM(t, M, Z, E, d, n=0.1, tipo='Ia', a = 0.0001, b = 1000):
     
     #Calcula el radio de equilibrio utilizando los parámetros entregados
     #y el radio
-    Req = R_eq(t, M, R, E, d, n, tipo, a, b)
+    Req = R_eq(t, M, R, E, d, n, tipo, a, b, method)
     
     return Req
 
+#Búsqueda de raíces vectorizada
+def _raiz_vectorizada(fun, a, b, xtol=2e-12, rtol=4*np.finfo(float).eps, maxiter=100, fa=None, fb=None, secante=False):
+    '''
+    Función que busca a la vez las raíces de muchas funciones continuas, cada
+    una dentro de su intervalo [a, b], con el método de Chandrupatla (un método
+    de intervalo como el de Brent, que combina bisección e interpolación
+    cuadrática inversa). Cada iteración evalúa la función solo en los
+    elementos que todavía no convergen.
+    
+    Entrega la tupla (raiz, valido, evaluaciones), donde valido indica los
+    elementos en los que la función cambia de signo en [a, b] y el método
+    convergió (en los demás la raíz es nan), y evaluaciones es el número
+    total de evaluaciones de la función (por elemento).
+    Depende de:
+    
+    fun: Función fun(x, i) que entrega el valor de la función de los 
+         elementos de índices i (array de enteros) en los puntos x
+    a y b: Arrays de una dimensión con los límites de cada intervalo
+    xtol y rtol: Tolerancias absoluta y relativa de la raíz
+    maxiter: Número máximo de iteraciones
+    fa y fb: Valores de la función en a y b, si ya se calcularon (no se
+             cuentan en las evaluaciones)
+    secante: True para que el primer paso sea de secante en vez de
+             bisección (conviene cuando el intervalo ya es angosto)
+    '''
+    
+    a = np.array(a, dtype=float)
+    b = np.array(b, dtype=float)
+    indices = np.arange(a.size)
+    evaluaciones = 0
+    
+    if fa is None:
+        fa = fun(a, indices)
+        evaluaciones += a.size
+    if fb is None:
+        fb = fun(b, indices)
+        evaluaciones += b.size
+    
+    #Raíces en los límites y elementos donde la función cambia de signo
+    raiz = np.where(fa == 0, a, np.where(fb == 0, b, np.nan))
+    valido = (np.sign(fa)*np.sign(fb) <= 0)
+    
+    #Solo iteramos los elementos que tienen una raíz dentro del intervalo
+    activo = valido & (fa != 0) & (fb != 0)
+    i = indices[activo]
+    a, b, fa, fb = a[activo], b[activo], fa[activo], fb[activo]
+    c, fc = a, fa
+    with np.errstate(**_sin_avisos):
+        t = np.clip(fa/(fa - fb), 0, 1) if secante else np.full(i.size, 0.5)
+    
+    with np.errstate(**_sin_avisos):
+        for _ in range(maxiter):
+            if i.size == 0:
+                break
+            
+            #Nuevo punto y nuevo intervalo [a, b] que contiene a la raíz
+            xt = a + t*(b - a)
+            ft = fun(xt, i)
+            evaluaciones += i.size
+            
+            igual = np.sign(ft) == np.sign(fa)
+            c, fc = np.where(igual, a, b), np.where(igual, fa, fb)
+            b, fb = np.where(igual, b, a), np.where(igual, fb, fa)
+            a, fa = xt, ft
+            
+            #Mejor aproximación y criterio de convergencia
+            mejor = np.abs(fa) < np.abs(fb)
+            xm = np.where(mejor, a, b)
+            fm = np.where(mejor, fa, fb)
+            tol = (xtol + rtol*np.abs(xm))/4
+            tlim = tol/np.abs(b - c)
+            listo = (tlim > 0.5) | (fm == 0)
+            
+            raiz[i[listo]] = xm[listo]
+            
+            #Seguimos iterando solo los elementos que no han convergido
+            sigue = ~listo
+            i, a, b, c = i[sigue], a[sigue], b[sigue], c[sigue]
+            fa, fb, fc, tlim = fa[sigue], fb[sigue], fc[sigue], tlim[sigue]
+            
+            #Usamos interpolación cuadrática inversa si es seguro, si no,
+            #bisección
+            xi = (a - b)/(c - b)
+            phi = (fa - fb)/(fc - fb)
+            iqi = (phi**2 < xi) & ((1 - phi)**2 < 1 - xi)
+            t = np.where(iqi, fa/(fb - fa)*fc/(fb - fc) + (c - a)/(b - a)*fa/(fc - fa)*fb/(fc - fb), 0.5)
+            t = np.minimum(1 - tlim, np.maximum(tlim, t))
+    
+    #Los elementos que no convergieron no son válidos
+    valido[i] = False
+    raiz[~valido] = np.nan
+    
+    return raiz, valido, evaluaciones
+
+#Radio de equilibrio para muchos parámetros a la vez
+def R_eq_batch(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, method='bracket', xtol=2e-12, rtol=4*np.finfo(float).eps, maxiter=100):
+    '''
+    Función que calcula el radio de equilibrio entre la presión de los vientos
+    estelares y la presión del remanente de supernova (igual que R_eq) para
+    arrays de parámetros, resolviendo todas las ecuaciones P_SW = P_SNR a la
+    vez con un método de intervalo vectorizado.
+    
+    Los parámetros son los mismos de R_eq y pueden ser arrays (con
+    broadcasting). Entrega la tupla (R_eq, valido), donde R_eq es un array
+    con los radios (En AU) y valido es un array de booleanos que es False en
+    los puntos que no tienen raíz dentro de [a, b] (en esos puntos R_eq es
+    nan, en vez de arrojar un error como R_eq).
+    method: 'bracket' para resolver con el método de intervalo o 'analytic'
+            para calcular la raíz directamente (ver 
+            StellarWind.equilibrium_radius).
+    xtol, rtol y maxiter son las tolerancias y el número máximo de
+    iteraciones del método de intervalo.
+    '''
+    
+    #Llevamos todos los parámetros a una misma forma y los aplanamos
+    t, M, R, E, d, n, tipo, a, b = np.broadcast_arrays(t, M, R, E, d, n, tipo, a, b)
+    forma = t.shape
+    t, M, R, E, d, n, tipo, a, b = [np.ravel(p) for p in (t, M, R, E, d, n, tipo, a, b)]
+    
+    #Los vientos y la presión del remanente no dependen de r, así que se 
+    #calculan una sola vez
+    viento = StellarWind(t, M, R)
+    v1, dvdr_au, M_punto_si = [np.broadcast_to(p, t.shape) for p in (viento.v_1AU, viento.dvdr_au, viento.M_punto_si)]
+    P = np.broadcast_to(P_SNR(E, d, n, tipo), t.shape)
+    
+    if method == 'analytic':
+        
+        Req = viento.equilibrium_radius(P)
+        valido = (a <= Req) & (Req <= b)
+        Req = np.where(valido, Req, np.nan)
+        
+        return Req.reshape(forma), valido.reshape(forma)
+    
+    elif method != 'bracket':
+        raise ValueError("method debe ser 'bracket' o 'analytic'")
+    
+    #Diferencia de presiones de los elementos de índices i
+    def fun(r, i):
+        
+        f = _perfil_viento(r, v1[i], dvdr_au[i], M_punto_si[i])[2] - P[i]
+        
+        return f
+    
+    Req, valido, _ = _raiz_vectorizada(fun, a, b, xtol, rtol, maxiter)
+    
+    return Req.reshape(forma), valido.reshape(forma)
+
+#Radio de equilibrio para muchos parámetros a la vez, calculando el radio
+#estelar en función de la masa, metalicidad y tiempo en la secuencia principal
+def R_eqM_batch(t, M, Z, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, **kwargs):
+    '''
+    Función que calcula el radio de equilibrio igual que R_eqM, pero para 
+    arrays de parámetros (con broadcasting), usando R_eq_batch.
+    
+    Entrega la tupla (R_eq, valido), con R_eq en AU (nan en los puntos sin
+    raíz dentro de [a, b]). Los parámetros son los mismos de R_eqM (t en Gyr)
+    y kwargs se pasa a R_eq_batch.
+    '''
+    
+    #Calcula el radio de la estrella, el tiempo se multiplica por mil para 
+    #pasar el tiempo de Gyr a Myr (R_MS depende de t en Myr)
+    R = R_MS(np.multiply(t, 1000), M, Z)
+    
+    return R_eq_batch(t, M, R, E, d, n, tipo, a, b, **kwargs)
+
+#Semiancho inicial (en ln r) del intervalo alrededor de la raíz anterior en
+#R_eq_sweep, y factor con el que se ensancha cuando no contiene la raíz
+ANCHO_CONTINUACION = 1e-3
+AMPLIACION_CONTINUACION = 16
+
+#Radio de equilibrio a lo largo de barridos ordenados
+@np.errstate(**_sin_avisos)
+def R_eq_sweep(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, axis=-1, xtol=2e-12, rtol=4*np.finfo(float).eps, maxiter=100, info=False):
+    '''
+    Función que calcula el radio de equilibrio igual que R_eq_batch, pero a
+    lo largo de un eje ordenado en que los parámetros cambian suavemente (por
+    ejemplo la distancia d o la edad t), usando continuación: cada punto se
+    resuelve en un intervalo angosto alrededor de la raíz que se predice de
+    los puntos anteriores del eje, en vez de partir de [a, b].
+    
+    La predicción extrapola ln(R_eq) de las raíces anteriores (con un
+    polinomio de grado 2 si hay tres), y el paso inicial (en ln r) es el
+    doble del error de la predicción del punto anterior (ANCHO_CONTINUACION
+    en el segundo punto). Desde la predicción se dan dos pasos de secante, y
+    si el segundo es menor que la tolerancia (con la raíz encerrada entre
+    los puntos evaluados) el punto queda resuelto con 3 evaluaciones de la
+    diferencia de presiones, en vez de las ~15 de R_eq_batch. Si no, se usa
+    el método de intervalo en el intervalo que encierran esos puntos, o en
+    uno alrededor de la predicción que se ensancha en un factor
+    AMPLIACION_CONTINUACION hasta llegar a [a, b]. El primer punto de cada
+    barrido (y los que siguen a un punto sin raíz) se resuelven en [a, b].
+    
+    Los puntos se recorren uno a uno a lo largo del eje 'axis', y los
+    barridos de los demás ejes se calculan a la vez. Si la presión de los
+    vientos no es monótona y hay dos raíces en [a, b], la continuación
+    sigue la rama de la raíz del primer punto.
+    
+    Los parámetros son los mismos de R_eq_batch (con broadcasting). Entrega
+    la tupla (R_eq, valido), o (R_eq, valido, info) si info es True, donde
+    info es un diccionario con las evaluaciones de la función con
+    continuación ('evaluaciones'), las que necesita R_eq_batch para los
+    mismos puntos ('evaluaciones_frio', que se calculan resolviendo también
+    sin continuación), las ahorradas ('ahorradas'), la razón entre ambas
+    ('factor') y el número de veces que se ensanchó un intervalo
+    ('ampliaciones').
+    '''
+    
+    #Llevamos todos los parámetros a una misma forma, con el eje del barrido
+    #al final, y los dejamos como (barridos, puntos del eje)
+    t, M, R, E, d, n, tipo, a, b = np.broadcast_arrays(t, M, R, E, d, n, tipo, a, b)
+    forma = t.shape
+    if t.ndim == 0:
+        raise ValueError('R_eq_sweep necesita al menos un parámetro que sea un array')
+    forma_eje = np.moveaxis(np.empty(forma, dtype=bool), axis, -1).shape
+    N = forma_eje[-1]
+    t, M, R, E, d, n, tipo, a, b = [np.moveaxis(p, axis, -1).reshape(-1, N) for p in (t, M, R, E, d, n, tipo, a, b)]
+    
+    viento = StellarWind(t, M, R)
+    v1, dvdr_au, M_punto_si = [np.broadcast_to(p, t.shape) for p in (viento.v_1AU, viento.dvdr_au, viento.M_punto_si)]
+    P = np.broadcast_to(P_SNR(E, d, n, tipo), t.shape)
+    
+    S = t.shape[0]
+    Req = np.full((S, N), np.nan)
+    valido = np.zeros((S, N), dtype=bool)
+    error = np.full(S, np.nan)
+    evaluaciones = ampliaciones = 0
+    
+    for k in range(N):
+        
+        #Diferencia de presiones de los barridos de índices i en el punto k
+        def fun(r, i):
+            return _perfil_viento(r, v1[i, k], dvdr_au[i, k], M_punto_si[i, k])[2] - P[i, k]
+        
+        #Los barridos sin raíz en el punto anterior se resuelven en [a, b]
+        frio = np.flatnonzero(~valido[:, k - 1]) if k > 0 else np.arange(S)
+        if frio.size:
+            Req[frio, k], valido[frio, k], ev = _raiz_vectorizada(lambda r, j: fun(r, frio[j]), a[frio, k], b[frio, k], xtol, rtol, maxiter)
+            evaluaciones += ev
+            error[frio] = np.nan
+        
+        i = np.flatnonzero(valido[:, k - 1]) if k > 0 else np.array([], dtype=int)
+        if i.size == 0:
+            continue
+        
+        #Predicción de ln(R_eq) y semiancho del intervalo
+        ln0 = np.log(Req[i, k - 1])
+        if k > 2:
+            ln0 = np.where(valido[i, k - 2] & valido[i, k - 3],
+                           3*ln0 - 3*np.log(Req[i, k - 2]) + np.log(Req[i, k - 3]),
+                           np.where(valido[i, k - 2], 2*ln0 - np.log(Req[i, k - 2]), ln0))
+        elif k > 1:
+            ln0 = np.where(valido[i, k - 2], 2*ln0 - np.log(Req[i, k - 2]), ln0)
+        ln0 = np.where(np.isfinite(ln0), ln0, np.log(Req[i, k - 1]))
+        w = np.where(np.isnan(error[i]), ANCHO_CONTINUACION, np.maximum(2*error[i], 1e-12))
+        
+        #Dos pasos de secante desde la predicción: si el segundo paso es
+        #menor que la tolerancia y la raíz queda encerrada entre los puntos
+        #evaluados, se acepta sin más evaluaciones
+        aik, bik = a[i, k], b[i, k]
+        x0 = np.clip(np.exp(ln0), aik, bik)
+        x1 = np.clip(np.exp(ln0 + w), aik, bik)
+        f0, f1 = fun(x0, i), fun(x1, i)
+        x2 = np.clip(x1 - f1*(x1 - x0)/(f1 - f0), aik, bik)
+        f2 = fun(x2, i)
+        evaluaciones += 3*i.size
+        x3 = x2 - f2*(x2 - x1)/(f2 - f1)
+        
+        con1 = np.sign(f2)*np.sign(f1) <= 0
+        encierra = con1 | (np.sign(f2)*np.sign(f0) <= 0)
+        listo = encierra & (np.abs(x3 - x2) < (xtol + rtol*np.abs(x2))/2) & (aik <= x3) & (x3 <= bik)
+        Req[i[listo], k] = x3[listo]
+        valido[i[listo], k] = True
+        
+        #Los demás se resuelven con el método de intervalo, en el intervalo
+        #que encierran los puntos evaluados si lo hay, y si no en uno
+        #alrededor de la predicción que se ensancha hasta llegar a [a, b]
+        #(donde no hay raíz, igual que en R_eq_batch)
+        resto = np.flatnonzero(~listo)
+        otro, fotro = np.where(con1, x1, x0)[resto], np.where(con1, f1, f0)[resto]
+        lo, hi = np.minimum(x2[resto], otro), np.maximum(x2[resto], otro)
+        flo = np.where(x2[resto] <= otro, f2[resto], fotro)
+        fhi = np.where(x2[resto] <= otro, fotro, f2[resto])
+        
+        falta = np.flatnonzero(~encierra[resto])
+        while falta.size:
+            j = i[resto[falta]]
+            ln, ancho = ln0[resto[falta]], w[resto[falta]]
+            lo[falta] = np.clip(np.exp(ln - ancho), a[j, k], b[j, k])
+            hi[falta] = np.clip(np.exp(ln + ancho), a[j, k], b[j, k])
+            flo[falta], fhi[falta] = fun(lo[falta], j), fun(hi[falta], j)
+            evaluaciones += 2*falta.size
+            
+            contiene = np.sign(flo[falta])*np.sign(fhi[falta]) <= 0
+            completo = (lo[falta] <= a[j, k]) & (hi[falta] >= b[j, k])
+            falta = falta[~contiene & ~completo]
+            w[resto[falta]] *= AMPLIACION_CONTINUACION
+            ampliaciones += falta.size
+        
+        if resto.size:
+            j = i[resto]
+            Req[j, k], valido[j, k], ev = _raiz_vectorizada(lambda r, m: fun(r, j[m]), lo, hi, xtol, rtol, maxiter, flo, fhi, secante=True)
+            evaluaciones += ev
+        
+        #Error de la predicción, que da el ancho del intervalo siguiente
+        error[i] = np.abs(np.log(Req[i, k]) - ln0)
+    
+    Req = np.moveaxis(Req.reshape(forma_eje), -1, axis)
+    valido = np.moveaxis(valido.reshape(forma_eje), -1, axis)
+    
+    if not info:
+        return Req, valido
+    
+    #Evaluaciones que necesita el método de intervalo sin continuación
+    def fun_frio(r, i):
+        return _perfil_viento(r, v1.ravel()[i], dvdr_au.ravel()[i], M_punto_si.ravel()[i])[2] - P.ravel()[i]
+    
+    _, _, frio = _raiz_vectorizada(fun_frio, a.ravel(), b.ravel(), xtol, rtol, maxiter)
+    
+    return Req, valido, dict(evaluaciones=evaluaciones, evaluaciones_frio=frio, ahorradas=frio - evaluaciones,
+                             factor=frio/evaluaciones, ampliaciones=ampliaciones)
+
+#Radio de equilibrio y sus derivadas respecto a los parámetros
+@np.errstate(**_sin_avisos)
+def R_eq_grad(t, M, R, E, d, n=0.1, tipo='Ia', a=0.0001, b=1000, **kwargs):
+    '''
+    Función que calcula el radio de equilibrio (igual que R_eq_batch) y sus
+    derivadas exactas respecto a t, M, R, E, d y n, con el costo de una sola
+    búsqueda de raíces.
+    
+    Como R_eq está definido por F(r) = P_SW(r) - P_SNR = 0, el teorema de la
+    función implícita da dR_eq/dx = -(dF/dx)/(dF/dr) en r = R_eq, y las 
+    derivadas parciales de las presiones se calculan directamente de sus 
+    fórmulas (T_0 es proporcional a M/R, M_punto es una potencia de t, M y
+    R, v_sw es lineal en r y v_SNR y rho_SNR son potencias de E, d y n). 
+    Usando que en R_eq las dos presiones son iguales, queda:
+    
+    dR_eq/dx = -(dln(P_SW)/dx)/(dln(P_SW)/dr) para x = t, M o R
+    dR_eq/dx = (dln(P_SNR)/dx)/(dln(P_SW)/dr) para x = E, d o n
+    
+    Entrega la tupla (R_eq, gradiente), donde R_eq es el array de R_eq_batch
+    (En AU, nan en los puntos sin raíz dentro de [a, b]) y gradiente es un 
+    diccionario {'t', 'M', 'R', 'E', 'd', 'n'} con las derivadas (En AU por
+    unidad de cada parámetro: Gyr, masas solares, radios solares, ergios, 
+    parsecs y cm^-3). En los bordes de las secciones (el límite de rapidez 
+    de v_SNR y la masa mínima de rho_SNR) se usa la derivada de la sección
+    que se evaluó.
+    Los parámetros son los de R_eq_batch y kwargs se pasa a R_eq_batch.
+    '''
+    
+    Req, _ = R_eq_batch(t, M, R, E, d, n, tipo, a, b, **kwargs)
+    t, M, R, E, d, n, tipo = np.broadcast_arrays(t, M, R, E, d, n, tipo)
+    
+    #Vientos: P_SW = M_punto*v_sw(r)/r**2 (salvo constantes), con v_sw en
+    #km/s y M_punto proporcional a R**2*omega**EXP_M_PUNTO_OMEGA*M**EXP_M_PUNTO_M
+    viento = StellarWind(t, M, R)
+    T = viento.T_0
+    w = viento.velocity(Req)
+    dlnP_dr = viento.dvdr_au/w - 2/Req
+    
+    #Derivadas de v_sw(R_eq) respecto a T_0 (T_0 es proporcional a M/R)
+    _, c1, c2, c3 = COEF_V_1AU
+    dv1_dT = c1 + 2*c2*T + 3*c3*T**2
+    _, c1, c2, c3 = COEF_DVDR
+    ddvdr_dT = (c1 + 2*c2*T + 3*c3*T**2)/SI.R_sun_au
+    dw_dT = dv1_dT + (Req - 1)*ddvdr_dT
+    
+    dlnPSW_dt = EXP_M_PUNTO_OMEGA*EXP_OMEGA_T/t
+    dlnPSW_dM = (EXP_M_PUNTO_OMEGA*EXP_OMEGA_M + EXP_M_PUNTO_M)/M + dw_dT*(T/M)/w
+    dlnPSW_dR = 2/R - dw_dT*(T/R)/w
+    
+    #Remanente: P_SNR = v**2*(rho + ((gamma + 1)/2)*rho_ISM), con v 
+    #proporcional a (E/(n*d**3))**0.5 si no llega al límite de 10.000 km/s y
+    #rho igual a 4*rho_ISM, o proporcional a d**-3 si se usa la masa mínima
+    gamma = GAMMA_SNR
+    rho_ISM = n*(SI.m_p)*(10**6)
+    rho = rho_SNR(d, n, tipo)
+    libre = v_SNR(E, d, n) < 10000000*10**-3
+    minima = rho != ((gamma + 1)/(gamma - 1))*rho_ISM
+    Q = rho + ((gamma + 1)/2)*rho_ISM
+    
+    dlnPSNR_dE = np.where(libre, 1/E, 0.0)
+    dlnPSNR_dd = np.where(libre, -3/d, 0.0) + np.where(minima, -3*rho/d, 0.0)/Q
+    dlnPSNR_dn = np.where(libre, -1/n, 0.0) + (np.where(minima, 0.0, rho) + ((gamma + 1)/2)*rho_ISM)/(n*Q)
+    
+    gradiente = {
+        't': -dlnPSW_dt/dlnP_dr,
+        'M': -dlnPSW_dM/dlnP_dr,
+        'R': -dlnPSW_dR/dlnP_dr,
+        'E': dlnPSNR_dE/dlnP_dr,
+        'd': dlnPSNR_dd/dlnP_dr,
+        'n': dlnPSNR_dn/dlnP_dr,
+        }
+    
+    return Req, {x: np.asarray(g) for x, g in gradiente.items()}
+
 #Temperatura efectiva de la estrella
 def T_eff(L, R):
     '''
@@ -1248,13 +2171,13 @@ def T_eff(L, R):
     R: Radio de la estrella (Radios estelares)
     '''
     #Constante de Stefan-Boltzmann (W/m^2*K^4)
-    sigma = cons.sigma_sb.value
+    sigma = SI.sigma_sb
     
     #Pasamos R de Rsol a m
-    R = R*cons.R_sun.value
+    R = R*SI.R_sun
     
     #Pasamos L de Lsol a W
-    L = L*cons.L_sun.value
+    L = L*SI.L_sun
     
     #Calculamos T_eff en K
     T = (L/(4*np.pi*(R**2)*sigma))**(1/4)
@@ -1349,6 +2272,167 @@ def R_HZM(t, M, Z):
     
     return R_HZm
 
+#Isocrona de la secuencia principal
+class Isochrone:
+    '''
+    Clase con los resultados de isochrone: las estrellas de una misma edad t
+    (En Gyr) y metalicidad Z que siguen en la secuencia principal. Los 
+    arrays son de solo lectura, porque se guardan en el caché.
+    
+    M: Masas de las estrellas que siguen en la secuencia principal (En 
+       masas solares)
+    L, R, T_eff: Luminosidad (En luminosidades solares), radio (En radios 
+                 solares) y temperatura efectiva (En Kelvin) de cada una
+    R_HZ_int, R_HZ_ext: Límites de la zona habitable de cada una (En AU)
+    en_MS: Array de booleanos, del largo de las masas pedidas, que es True
+           en las masas que siguen en la secuencia principal
+    '''
+    
+    def __init__(self, t, Z, M, L, R, T_eff, R_HZ_int, R_HZ_ext, en_MS):
+        
+        self.t = t
+        self.Z = Z
+        self.M = M
+        self.L = L
+        self.R = R
+        self.T_eff = T_eff
+        self.R_HZ_int = R_HZ_int
+        self.R_HZ_ext = R_HZ_ext
+        self.en_MS = en_MS
+
+#Número máximo de isocronas que se guardan en el caché
+MAX_ISOCRONAS = 128
+
+#Masas por defecto de las isocronas (En masas solares)
+_MASAS_ISOCRONA = np.geomspace(0.1, 100, 1000)
+
+#Caché de las isocronas, con las masas como bytes para poder usarlas de clave
+@functools.lru_cache(maxsize=MAX_ISOCRONAS)
+def _isocrona(t, Z, masas):
+    
+    M = np.frombuffer(masas)
+    c = coeficientes(Z)
+    
+    #Solo se calculan las estrellas que no han salido de la secuencia 
+    #principal (t en Myr)
+    en_MS = t*10**3 <= _tiempos(M, c)[1]
+    M = M[en_MS]
+    R, L, T = StarTrack(M, c).RLT(t*10**3)
+    R_HZ_int, R_HZ_ext = R_HZ(L, R)
+    
+    for x in (M, L, R, T, R_HZ_int, R_HZ_ext, en_MS):
+        x.flags.writeable = False
+    
+    return Isochrone(t, Z, M, L, R, T, R_HZ_int, R_HZ_ext, en_MS)
+
+#Isocrona: estrellas de una misma edad y metalicidad
+def isochrone(t, Z, masses=None):
+    '''
+    Función que entrega la isocrona de edad t y metalicidad Z: la 
+    luminosidad, el radio, la temperatura efectiva y los límites de la zona
+    habitable de estrellas de distintas masas (los valores de L_MS, R_MS, 
+    T_eff y R_HZ), calculados a la vez para todas las masas y sin incluir 
+    las estrellas que ya salieron de la secuencia principal (t > t_MS).
+    
+    Entrega un objeto Isochrone. Las isocronas se guardan en un caché LRU 
+    (de tamaño MAX_ISOCRONAS) según t, Z y las masas, de modo que pedir otra
+    vez la misma isocrona (por ejemplo al volver a dibujar un diagrama HR) 
+    no la vuelve a calcular.
+    Depende de:
+    
+    t: Edad de las estrellas (En Gyr)
+    Z: Metalicidad de las estrellas
+    masses: Array de una dimensión con las masas (En masas solares), en el 
+            orden en que se quieren los resultados. Por defecto son 1000 
+            masas espaciadas logarítmicamente entre 0.1 y 100 (los límites de
+            las fórmulas de la secuencia principal)
+    '''
+    
+    if masses is None:
+        masses = _MASAS_ISOCRONA
+    
+    masses = np.ascontiguousarray(np.ravel(masses), dtype=float)
+    
+    return _isocrona(float(t), float(Z), masses.tobytes())
+
+#Distancia crítica de la supernova
+def d_crit(t, M, Z, E, n=0.1, tipo='Ia', d_min=0.001, d_max=10000, xtol=1e-12, rtol=4*np.finfo(float).eps, maxiter=100):
+    '''
+    Función que calcula las distancias críticas de una supernova, es decir, 
+    las distancias d a las que el radio de equilibrio R_eqM(t, M, Z, E, d, n,
+    tipo) es igual al límite interno y al límite externo de la zona habitable
+    R_HZM(t, M, Z). Si la supernova ocurre más cerca que la distancia crítica,
+    el remanente entra más allá de ese límite.
+    
+    Como la presión de los vientos disminuye con la distancia a la estrella,
+    R_eq es igual a un límite cuando la presión del remanente P_SNR es igual 
+    a la presión de los vientos en ese límite. P_SNR disminuye con d, así que
+    la distancia se busca con el método de intervalo vectorizado en log10(d),
+    dentro de [d_min, d_max], para todos los parámetros a la vez.
+    
+    Entrega la tupla (d_int, d_ext) con las distancias críticas (En parsecs)
+    de los límites interno y externo (nan donde no están dentro de 
+    [d_min, d_max] o donde la estrella ya salió de la secuencia principal,
+    t > t_MS). Los parámetros pueden ser arrays (con broadcasting).
+    Depende de:
+    
+    t: Tiempo de vida de la estrella en la secuencia principal (En Gyr)
+    M: Masa de la estrella (En Masas solares)
+    Z: Metalicidad de la estrella (adimensional)
+    E: Energía liberada por la supernova (En ergios)
+    n: Número de partículas por centímetro cúbico en el medio 
+       interestelar (cm^-3)
+    tipo: String que nos dice si la supernova con la que se está tratando 
+          es de tipo Ia o II.
+    d_min y d_max: Intervalo de distancias en el que se buscan (En parsecs)
+    xtol, rtol y maxiter: Tolerancias (de log10(d)) y número máximo de 
+                          iteraciones del método de intervalo
+    '''
+    
+    t, M = np.asarray(t, dtype=float), np.asarray(M, dtype=float)
+    
+    #Radio, luminosidad y límites de la zona habitable de la estrella
+    estrella = StarTrack(M, Z)
+    R, L = estrella.RLT(np.multiply(t, 1000))[:2]
+    R_int, R_ext = R_HZ(L, R)
+    
+    #Presión de los vientos en los límites de la zona habitable. R_MS se 
+    #extrapola más allá de t_MS (y la presión puede dar valores finitos o 
+    #inf), así que las estrellas que ya salieron de la secuencia principal
+    #se descartan explícitamente, igual que en isochrone
+    viento = StellarWind(t, M, R)
+    en_MS = np.multiply(t, 1000) <= estrella.t_MS
+    with np.errstate(**_sin_avisos):
+        P_int = np.where(en_MS, viento.pressure(R_int), np.nan)
+        P_ext = np.where(en_MS, viento.pressure(R_ext), np.nan)
+    
+    #Llevamos todo a una misma forma y resolvemos los dos límites juntos
+    P_int, P_ext, E, n, tipo = np.broadcast_arrays(P_int, P_ext, E, n, tipo)
+    forma = P_int.shape
+    logP = np.log10(np.concatenate([np.ravel(P_int), np.ravel(P_ext)]))
+    E, n, tipo = [np.tile(np.ravel(p), 2) for p in (E, n, tipo)]
+    
+    #Diferencia de log10 de las presiones de los elementos de índices i
+    def fun(x, i):
+        
+        f = np.log10(P_SNR(E[i], 10**x, n[i], tipo[i])) - logP[i]
+        
+        return f
+    
+    a = np.full(logP.size, np.log10(d_min))
+    b = np.full(logP.size, np.log10(d_max))
+    
+    with np.errstate(invalid='ignore'):
+        x, _, _ = _raiz_vectorizada(fun, a, b, xtol, rtol, maxiter)
+    
+    #Donde la presión de los vientos es nan (la estrella ya salió de la
+    #secuencia principal) no hay distancia crítica
+    x = np.where(np.isnan(logP), np.nan, x)
+    
+    d = (10**x).reshape((2,) + forma)
+    
+    return _escalar(d[0]), _escalar(d[1])
+
 #Tasa de erosión atmosférica
 def M_punto_atm(E, d, R_p, alpha=0.03, n=0.1, tipo='Ia'):
     '''
@@ -1373,13 +2457,21 @@ def M_punto_atm(E, d, R_p, alpha=0.03, n=0.1, tipo='Ia'):
     rho = rho_SNR(d, n, tipo)
     #Obtenemos la rapidez del remanente en m/s
     v = v_SNR(E, d, n)*10**3
-    #Pasamos el radio del planeta a metros
-    R_p = R_p*cons.R_earth.value
     
     #Calculamos la tasa y la entregamos
-    M_punto=2*np.pi*alpha*(R_p**2)*rho*v
+    return _M_punto_atm(rho, v, R_p, alpha)
+
+#Tasa de erosión atmosférica con la densidad y la rapidez del remanente
+def _M_punto_atm(rho, v, R_p, alpha):
+    '''
+    Función con la fórmula de M_punto_atm (En kg/s) para la densidad rho (En
+    kg/m^3) y la rapidez v (En m/s) del remanente, que usan también M_atm,
+    dM_atm y paso_remanente cuando ya las calcularon.
+    '''
+    #Pasamos el radio del planeta a metros
+    R_p = R_p*SI.R_earth
     
-    return M_punto 
+    return 2*np.pi*alpha*(R_p**2)*rho*v
 
 #Tiempo de cruce de supernova
 def t_cross(E, d, n=0.1):
@@ -1397,13 +2489,28 @@ def t_cross(E, d, n=0.1):
        interestelar (cm^-3)
     '''
     #Calculamos el grosor del remanente y lo pasamos a metros
-    dR = DeltaR_SNR(d)*cons.pc.value
+    dR = DeltaR_SNR(d)*SI.pc
     #Calculamos la rapidez del remanente y lo pasamos a m/s
     v = v_SNR(E, d, n)*10**3
     
     #Entregamos el cociente entre el grosor y la velocidad
     return dR/v 
 
+#Densidad, rapidez y tiempo de cruce del remanente en el planeta
+def _remanente_en_planeta(E, d, n=0.1, tipo='Ia'):
+    '''
+    Función que entrega la tupla (rho, v, t_c) con la densidad (En kg/m^3), 
+    la rapidez (En m/s) y el tiempo de cruce (En segundos) del remanente de 
+    una supernova con energía E a una distancia d, calculando v_SNR una sola
+    vez. Son los valores que usan M_punto_atm y t_cross.
+    '''
+    
+    rho = rho_SNR(d, n, tipo)
+    v = v_SNR(E, d, n)*10**3
+    t_c = (DeltaR_SNR(d)*SI.pc)/v
+    
+    return rho, v, t_c
+
 #Masa atmosférica del planeta earth-like mientras pasa el remanente
 def M_atm(t, E, d, R_p, M_p, P_0, alpha=0.03, n=0.1, tipo='Ia'):
     '''
@@ -1412,7 +2519,9 @@ def M_atm(t, E, d, R_p, M_p, P_0, alpha=0.03, n=0.1, tipo='Ia'):
     distancia d) lleva pasando un tiempo t por un planeta 'earth-like' 
     con radio R_p y masa M_p.
     
-    La masa entregada está en kg.
+    La masa entregada está en kg. Todos los parámetros pueden ser arrays 
+    (con broadcasting), por ejemplo t con forma (T,) y los parámetros de los 
+    planetas con forma (P, 1) entregan un array (P, T) (ver historia_M_atm).
     Depende de:
     
     t: Tiempo que lleva pasando el remanente (segundos)
@@ -1427,26 +2536,26 @@ def M_atm(t, E, d, R_p, M_p, P_0, alpha=0.03, n=0.1, tipo='Ia'):
     tipo: String que nos dice si la supernova con la que se está tratando 
           es de tipo Ia o II.
     '''
-    #Calculamos la tasa de erosión atmosférica en kg/m
-    Mpunto = M_punto_atm(E, d, R_p, alpha, n, tipo) 
+    #Calculamos la densidad, la rapidez y el tiempo de cruce del remanente 
+    #una sola vez
+    rho, v, t_c = _remanente_en_planeta(E, d, n, tipo)
+    #Calculamos la tasa de erosión atmosférica en kg/s
+    Mpunto = _M_punto_atm(rho, v, R_p, alpha)
     #Pasamos el radio del planeta a metros
-    R_p = R_p*cons.R_earth.value
+    R_p = R_p*SI.R_earth
     #Pasamos la masa del planeta a kg
-    M_p = M_p*cons.M_earth.value 
+    M_p = M_p*SI.M_earth 
     #Pasamos la presión atmosférica del planeta a pascales
-    P_0 = P_0*cons.atm.value #atm a Pa
+    P_0 = P_0*SI.atm #atm a Pa
     #Constante gravitacional en (N*m**2)/kg**2
-    G = cons.G.value 
+    G = SI.G 
     
     #Calculamos la masa atmosférica inicial en kg
     Matm0 = (4*np.pi*(R_p**4)*P_0)/(G*M_p)
     
     #Hacemos que para tiempos mayores a t_cross, la masa sea igual a la
     #masa cuando t=t_cross
-    if t > t_cross(E, d, n):
-        t = t_cross(E, d, n)
-    else:
-        pass
+    t = np.minimum(t, t_c)
     
     #Obtenemos la masa atmosférica y la entregamos
     Matm = -Mpunto*t + Matm0
@@ -1461,7 +2570,8 @@ def dM_atm(t, E, d, R_p, alpha=0.03, n=0.1, tipo='Ia'):
     Sedov-Taylor (con energía E y distancia d) lleva un tiempo t pasando por
     el planeta.
     
-    El cambio de masa entregado está en kg.
+    El cambio de masa entregado está en kg. Todos los parámetros pueden ser
+    arrays (con broadcasting), igual que en M_atm.
     Depende de:
     
     t: Tiempo que lleva pasando el remanente (segundos)
@@ -1474,15 +2584,269 @@ def dM_atm(t, E, d, R_p, alpha=0.03, n=0.1, tipo='Ia'):
     tipo: String que nos dice si la supernova con la que se está tratando 
           es de tipo Ia o II.
     '''
+    #Calculamos la densidad, la rapidez y el tiempo de cruce del remanente 
+    #una sola vez
+    rho, v, t_c = _remanente_en_planeta(E, d, n, tipo)
     #Calculamos la tasa de erosión en kg/s
-    Mpunto=M_punto_atm(E, d, R_p, alpha, n, tipo)
+    Mpunto = _M_punto_atm(rho, v, R_p, alpha)
     
     #Hacemos que para tiempos mayores a t_cross, la masa perdida sea igual a la
     #perdida cuando t=t_cross
-    if t > t_cross(E, d, n):
-        t = t_cross(E, d, n)
-    else:
-        pass
+    t = np.minimum(t, t_c)
     
     #Multiplicamos la tasa por el tiempo t (en s) y lo entregamos
-    return Mpunto*t
\ No newline at end of file
+    return Mpunto*t
+
+#Historia de la masa atmosférica de varios planetas
+def historia_M_atm(t, E, d, R_p, M_p, P_0, alpha=0.03, n=0.1, tipo='Ia'):
+    '''
+    Función que entrega la masa atmosférica (En kg) de varios planetas a lo 
+    largo del paso del remanente de una supernova (con energía E y distancia
+    d), como un array de dos dimensiones (planetas x tiempos). Los valores son
+    los de M_atm, pero la densidad, la rapidez y el tiempo de cruce del 
+    remanente se calculan una sola vez.
+    Depende de:
+    
+    t: Array con los tiempos (segundos)
+    R_p, M_p, P_0 y alpha: Radios (Radios terrestres), masas (Masas 
+                           terrestres), presiones atmosféricas iniciales (atm)
+                           y coeficientes de arrastre de los planetas (números
+                           o arrays de una dimensión)
+    E, d, n y tipo: Parámetros de la supernova, ver M_atm
+    '''
+    
+    #Los planetas van en el primer eje y los tiempos en el segundo
+    R_p, M_p, P_0, alpha = [np.reshape(p, (-1, 1)) for p in np.broadcast_arrays(R_p, M_p, P_0, alpha)]
+    t = np.reshape(t, (1, -1))
+    
+    return M_atm(t, E, d, R_p, M_p, P_0, alpha, n, tipo)
+
+#Remanente de supernova que evoluciona en el tiempo
+class SedovTaylor:
+    '''
+    Clase que representa la evolución en el tiempo del remanente de una 
+    supernova en fase de Sedov-Taylor que liberó una energía E en un medio
+    interestelar de densidad n. El radio del choque crece como 
+    R_s = beta*(E*t**2/rho_ISM)**(1/5), y en cada instante la densidad, la
+    rapidez y la presión del remanente son las de rho_SNR, v_SNR y P_SNR con
+    d = R_s, es decir, las del cascarón cuando llega a esa distancia.
+    
+    Los tiempos se miden en segundos desde la explosión, y todos los métodos
+    aceptan arrays (con broadcasting con E, n y tipo).
+    Depende de:
+    
+    E: Energía liberada por la supernova (En ergios)
+    n: Número de partículas por centímetro cúbico en el medio 
+       interestelar (cm^-3)
+    tipo: String que nos dice si la supernova con la que se está tratando 
+          es de tipo Ia o II.
+    '''
+    
+    def __init__(self, E, n=0.1, tipo='Ia'):
+        
+        self.E = E
+        self.n = n
+        self.tipo = tipo
+        
+        #Densidad del medio interestelar en kg/m^3
+        self.rho_ISM = n*(SI.m_p)*(10**6)
+        
+        #Constante k de R_s = k*t**(2/5) (En m/s**(2/5)), con el mismo factor
+        #beta de v_SNR y la energía en joules
+        self._k = BETA_SNR*((E*10**-7)/self.rho_ISM)**0.2
+    
+    def radius(self, t):
+        '''
+        Entrega el radio del choque (En parsecs) en el tiempo t (En segundos).
+        '''
+        
+        return self._k*t**0.4/SI.pc
+    
+    def arrival_time(self, d):
+        '''
+        Entrega el tiempo (En segundos) en el que el choque llega a la 
+        distancia d (En parsecs).
+        '''
+        
+        return ((d*SI.pc)/self._k)**2.5
+    
+    def velocity(self, t):
+        '''
+        Entrega la rapidez del remanente (En km/s) en el tiempo t (En 
+        segundos).
+        '''
+        
+        return v_SNR(self.E, self.radius(t), self.n)
+    
+    def density(self, t):
+        '''
+        Entrega la densidad del remanente (En kg/m^3) en el tiempo t (En
+        segundos).
+        '''
+        
+        return rho_SNR(self.radius(t), self.n, self.tipo)
+    
+    def pressure(self, t):
+        '''
+        Entrega la presión del remanente (En pascales) en el tiempo t (En
+        segundos).
+        '''
+        
+        return self.state(t)[3]
+    
+    def state(self, t):
+        '''
+        Entrega la tupla (R_s, rho, v, P) con el radio del choque (En 
+        parsecs), la densidad (En kg/m^3), la rapidez (En km/s) y la presión
+        (En pascales) del remanente en el tiempo t (En segundos), calculando
+        el radio y la rapidez una sola vez.
+        '''
+        
+        R_s = self.radius(t)
+        rho = rho_SNR(R_s, self.n, self.tipo)
+        v = v_SNR(self.E, R_s, self.n)
+        P = _P_SNR(rho, v*10**3, self.n)
+        
+        return R_s, rho, v, P
+
+#Resultado del paso del remanente por una estrella
+class PasoRemanente:
+    '''
+    Clase con los resultados de paso_remanente. Los arrays con un eje de 
+    tiempo tienen la forma de los parámetros más un último eje de largo 
+    'pasos'.
+    
+    t_llegada: Tiempo desde la explosión en que el choque llega a la 
+               estrella (En segundos)
+    duracion: Tiempo que la estrella pasa dentro del cascarón (En segundos)
+    fraccion: Array (pasos,) con la fracción de la duración de cada paso
+    R_eq: Radio de equilibrio en cada paso (En AU), o None si historia=False
+    dM: Masa atmosférica perdida hasta cada paso (En kg), o None si
+        historia=False
+    R_eq_min: Radio de equilibrio mínimo durante el paso (En AU)
+    dM_total: Masa atmosférica perdida durante todo el paso (En kg)
+    '''
+    
+    def __init__(self, t_llegada, duracion, fraccion, R_eq, dM, R_eq_min, dM_total):
+        
+        self.t_llegada = t_llegada
+        self.duracion = duracion
+        self.fraccion = fraccion
+        self.R_eq = R_eq
+        self.dM = dM
+        self.R_eq_min = R_eq_min
+        self.dM_total = dM_total
+    
+    def tiempo(self):
+        '''
+        Entrega el tiempo de cada paso desde que el choque llega a la 
+        estrella (En segundos), con la forma de R_eq.
+        '''
+        
+        return np.multiply.outer(self.duracion, self.fraccion)
+
+#Paso del remanente por una estrella, resuelto en el tiempo
+def paso_remanente(t, M, R, E, d, n=0.1, tipo='Ia', R_p=1, alpha=0.03, a_p=None, pasos=10**4, historia=True):
+    '''
+    Función que sigue en el tiempo el paso del cascarón de un remanente de 
+    supernova en fase de Sedov-Taylor (ver SedovTaylor) por una estrella que
+    está a una distancia d de la supernova, en vez de usar el cascarón fijo 
+    de P_SNR y la tasa de erosión constante de M_atm. El paso dura desde que
+    el choque llega a la estrella (R_s = d) hasta que la deja atrás el borde
+    interno del cascarón (R_s - DeltaR_SNR(R_s) = d), y se divide en 'pasos'
+    tiempos equiespaciados. En cada tiempo se calculan la presión del 
+    remanente, el radio de equilibrio con los vientos (igual que 
+    StellarWind.equilibrium_radius) y la tasa de erosión de un planeta (igual
+    que M_punto_atm), que se integra con la regla del trapecio.
+    
+    Entrega un objeto PasoRemanente. Todo se calcula con arrays, de a bloques
+    de sistemas para acotar la memoria.
+    Depende de:
+    
+    t: Tiempo en la secuencia principal de la estrella (En Gyr)
+    M: Masa de la estrella (En Masas solares)
+    R: Radio de la estrella (En Radios solares)
+    E: Energía liberada por la supernova (En ergios)
+    d: Distancia a la que ocurre la supernova (En parsecs)
+    n: Número de partículas por centímetro cúbico en el medio 
+       interestelar (cm^-3)
+    tipo: String que nos dice si la supernova con la que se está tratando 
+          es de tipo Ia o II.
+    R_p: Radio del planeta (Radios terrestres)
+    alpha: Coeficiente de arrastre del planeta (adimensional)
+    a_p: Distancia del planeta a la estrella (En AU). Si se da, el planeta 
+         pierde atmósfera solo mientras el remanente llega hasta él 
+         (R_eq < a_p); si es None se supone expuesto durante todo el paso,
+         como en M_atm
+    pasos: Número de tiempos en que se divide el paso (al menos 2)
+    historia: Si es False no se guardan R_eq ni dM en cada paso, solo 
+              R_eq_min y dM_total
+    
+    Todos los parámetros (salvo pasos e historia) pueden ser arrays (con 
+    broadcasting).
+    '''
+    
+    if pasos < 2:
+        raise ValueError('pasos debe ser al menos 2')
+    
+    #Llevamos todos los parámetros a una misma forma y los aplanamos
+    t, M, R, E, d, n, tipo, R_p, alpha, a_p = np.broadcast_arrays(t, M, R, E, d, n, tipo, R_p, alpha,
+                                                                  np.nan if a_p is None else a_p)
+    forma = t.shape
+    t, M, R, E, d, n, tipo, R_p, alpha, a_p = [np.ravel(p) for p in (t, M, R, E, d, n, tipo, R_p, alpha, a_p)]
+    N = t.size
+    
+    #Tiempos de llegada del choque y del borde interno del cascarón, que 
+    #tiene un grosor DeltaR_SNR(R_s) = f*R_s
+    remanente = SedovTaylor(E, n, tipo)
+    f = DeltaR_SNR(1.0)
+    t_llegada = remanente.arrival_time(d)
+    duracion = remanente.arrival_time(d/(1 - f)) - t_llegada
+    fraccion = np.linspace(0, 1, pasos)
+    
+    R_eq = np.empty((N, pasos)) if historia else None
+    dM = np.empty((N, pasos)) if historia else None
+    R_eq_min = np.empty(N)
+    dM_total = np.empty(N)
+    
+    #Bloques de sistemas de unos 2**20 elementos (sistemas x pasos)
+    bloque = max(1, 2**20//pasos)
+    
+    for i in range(0, N, bloque):
+        
+        s = slice(i, i + bloque)
+        col = lambda p: p[s, None]
+        
+        #Estado del remanente en cada tiempo del paso
+        tiempos = col(t_llegada) + col(duracion)*fraccion
+        _, rho, v, P = SedovTaylor(col(E), col(n), col(tipo)).state(tiempos)
+        
+        #Radio de equilibrio con los vientos de la estrella, que no cambian
+        #durante el paso
+        viento = StellarWind(col(t), col(M), col(R))
+        Req = viento.equilibrium_radius(P)
+        
+        #Tasa de erosión (En kg/s), solo mientras el remanente llega al planeta
+        Mpunto = _M_punto_atm(rho, v*10**3, col(R_p), col(alpha))
+        expuesto = np.isnan(col(a_p)) | (viento.pressure(col(a_p)) < P)
+        Mpunto = np.where(expuesto, Mpunto, 0.0)
+        
+        #Masa perdida acumulada (regla del trapecio con paso uniforme)
+        dt = col(duracion)/(pasos - 1)
+        perdida = np.cumsum(dt*(Mpunto[:, 1:] + Mpunto[:, :-1])/2, axis=1)
+        
+        with np.errstate(invalid='ignore'):
+            R_eq_min[s] = np.min(Req, axis=1)
+        dM_total[s] = perdida[:, -1]
+        
+        if historia:
+            R_eq[s] = Req
+            dM[s, 0] = 0.0
+            dM[s, 1:] = perdida
+    
+    if historia:
+        R_eq = R_eq.reshape(forma + (pasos,))
+        dM = dM.reshape(forma + (pasos,))
+    
+    return PasoRemanente(_escalar(t_llegada.reshape(forma)), _escalar(duracion.reshape(forma)), fraccion,
+                         R_eq, dM, _escalar(R_eq_min.reshape(forma)), _escalar(dM_total.reshape(forma)))
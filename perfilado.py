@@ -0,0 +1,206 @@
+###############################################################################
+#PERFILADO DE LLAMADAS ENTRE LAS FUNCIONES DEL MÓDULO
+###############################################################################
+
+#Modo opcional de instrumentación que cuenta cuántas veces se llama cada
+#función del módulo (y de qué función viene cada llamada) y cuánto tiempo
+#toma. Sirve para encontrar trabajo repetido, por ejemplo cuántas veces una
+#llamada de R_eqM calcula T_0 o t_BGB, y decidir dónde conviene guardar
+#resultados.
+#
+#Uso:
+#
+#    with profile_calls() as stats:
+#        R_eqM(1.0, 1.0, 0.02, 10**51, 10)
+#
+#    stats.imprimir()                       #tabla por función y llamador
+#    stats.guardar_tabla('llamadas.csv')    #la misma tabla en CSV
+#    stats.guardar_pilas('pilas.txt')       #pilas colapsadas (flame graph)
+#
+#Mientras el bloque 'with' está activo, las funciones y los métodos de las
+#clases del módulo se reemplazan por versiones que registran las llamadas, y
+#al salir se restauran. Solo se registran las llamadas que pasan por el
+#módulo (investigando_en_fisica.R_MS o R_MS dentro del módulo), no las de
+#referencias guardadas antes (por ejemplo 'from investigando_en_fisica
+#import R_MS').
+
+import contextlib
+import csv
+import functools
+import inspect
+import threading
+import time
+import investigando_en_fisica as ief
+
+#Nombre del llamador de las llamadas hechas desde fuera de los módulos
+RAIZ = '<raiz>'
+
+#Estadísticas de las llamadas
+class EstadisticasLlamadas:
+    '''
+    Clase con las llamadas registradas por profile_calls.
+
+    llamadas: Diccionario {(llamador, funcion): [número de llamadas, tiempo
+              total en segundos]} (el tiempo incluye el de las funciones
+              que llama)
+    pilas: Diccionario {(raiz, ..., funcion): tiempo propio en segundos} con
+           el tiempo de cada función sin contar el de las funciones que
+           llama, separado por la pila de llamadas completa
+    '''
+
+    def __init__(self):
+
+        self.llamadas = {}
+        self.pilas = {}
+
+    def tabla(self):
+        '''
+        Entrega una lista de filas (funcion, llamador, llamadas, tiempo total
+        en segundos), ordenada de mayor a menor tiempo.
+        '''
+
+        filas = [(f, l, n, t) for (l, f), (n, t) in self.llamadas.items()]
+
+        return sorted(filas, key=lambda fila: -fila[3])
+
+    def por_funcion(self):
+        '''
+        Entrega un diccionario {funcion: (llamadas, tiempo total en
+        segundos)} sumando sobre todos los llamadores.
+        '''
+
+        total = {}
+        for (_, f), (n, t) in self.llamadas.items():
+            n0, t0 = total.get(f, (0, 0.0))
+            total[f] = (n0 + n, t0 + t)
+
+        return total
+
+    def imprimir(self, filas=None):
+        '''
+        Imprime la tabla de llamadas (las primeras 'filas' filas si se da un
+        número).
+        '''
+
+        print(f"{'funcion':<32} {'llamador':<32} {'llamadas':>10} {'total (ms)':>12} {'por llamada (us)':>17}")
+        for f, l, n, t in self.tabla()[:filas]:
+            print(f'{f:<32} {l:<32} {n:>10} {t*1e3:>12.3f} {t/n*1e6:>17.2f}')
+
+    def guardar_tabla(self, archivo):
+        '''
+        Guarda la tabla de llamadas en un archivo CSV.
+        '''
+
+        with open(archivo, 'w', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['funcion', 'llamador', 'llamadas', 'tiempo_total_s', 'tiempo_por_llamada_us'])
+            for funcion, llamador, n, t in self.tabla():
+                escritor.writerow([funcion, llamador, n, repr(t), repr(t/n*1e6)])
+
+    def pilas_colapsadas(self):
+        '''
+        Entrega las líneas de las pilas colapsadas ('a;b;c valor', con el
+        tiempo propio en microsegundos), el formato que usan flamegraph.pl y
+        speedscope.
+        '''
+
+        return [';'.join(pila) + f' {round(t*1e6)}' for pila, t in sorted(self.pilas.items())]
+
+    def guardar_pilas(self, archivo):
+        '''
+        Guarda las pilas colapsadas en un archivo de texto.
+        '''
+
+        with open(archivo, 'w') as f:
+            f.write('\n'.join(self.pilas_colapsadas()) + '\n')
+
+#Funciones y métodos de un módulo que se instrumentan
+def _instrumentables(modulo):
+    '''
+    Función que entrega una lista de (objeto, atributo, nombre) con las
+    funciones definidas en el módulo y los métodos de sus clases.
+    '''
+
+    lista = []
+    for atributo, valor in list(vars(modulo).items()):
+
+        #La función __getattr__ del módulo (importación diferida) no se toca
+        if atributo.startswith('__'):
+            continue
+
+        if inspect.isclass(valor) and valor.__module__ == modulo.__name__:
+            for metodo, funcion in list(vars(valor).items()):
+                if inspect.isfunction(funcion):
+                    lista.append((valor, metodo, f'{atributo}.{metodo}'))
+
+        elif callable(valor) and getattr(valor, '__module__', None) == modulo.__name__ and not inspect.isclass(valor):
+            lista.append((modulo, atributo, atributo))
+
+    return lista
+
+#Estado del perfilado activo
+_activo = threading.Lock()
+
+@contextlib.contextmanager
+def profile_calls(*modulos):
+    '''
+    Manejador de contexto que registra las llamadas a las funciones de los
+    módulos dados (por defecto investigando_en_fisica) mientras está
+    activo, y entrega un objeto EstadisticasLlamadas con los resultados.
+    No se pueden anidar.
+    '''
+
+    if not _activo.acquire(blocking=False):
+        raise RuntimeError('profile_calls ya está activo')
+
+    modulos = modulos or (ief,)
+    stats = EstadisticasLlamadas()
+    local = threading.local()
+    reloj = time.perf_counter
+
+    def instrumentar(funcion, nombre):
+
+        @functools.wraps(funcion)
+        def envuelta(*args, **kwargs):
+
+            #Pila de llamadas del hilo: cada marco es [nombre, tiempo de las
+            #funciones que llama]
+            pila = getattr(local, 'pila', None)
+            if pila is None:
+                pila = local.pila = []
+
+            llamador = pila[-1][0] if pila else RAIZ
+            marco = [nombre, 0.0]
+            pila.append(marco)
+            inicio = reloj()
+
+            try:
+                return funcion(*args, **kwargs)
+            finally:
+                dt = reloj() - inicio
+                camino = (RAIZ,) + tuple(m[0] for m in pila)
+                pila.pop()
+                if pila:
+                    pila[-1][1] += dt
+
+                registro = stats.llamadas.setdefault((llamador, nombre), [0, 0.0])
+                registro[0] += 1
+                registro[1] += dt
+                stats.pilas[camino] = stats.pilas.get(camino, 0.0) + dt - marco[1]
+
+        return envuelta
+
+    originales = []
+    try:
+        for modulo in modulos:
+            for objeto, atributo, nombre in _instrumentables(modulo):
+                funcion = vars(objeto)[atributo]
+                originales.append((objeto, atributo, funcion))
+                setattr(objeto, atributo, instrumentar(funcion, nombre))
+
+        yield stats
+
+    finally:
+        for objeto, atributo, funcion in reversed(originales):
+            setattr(objeto, atributo, funcion)
+        _activo.release()
@@ -0,0 +1,444 @@
+###############################################################################
+#SÍNTESIS DE POBLACIONES (MONTE CARLO) DE EXPOSICIÓN A SUPERNOVAS
+###############################################################################
+
+#Funciones para muestrear poblaciones de estrellas (masas según una función
+#inicial de masa, metalicidades y edades en la secuencia principal) y de
+#supernovas (distancias, energías y densidades del medio interestelar), y
+#calcular para cada muestra si el remanente entra a la zona habitable y
+#cuánta atmósfera pierde un planeta como la Tierra.
+#
+#Las muestras se generan y calculan por lotes con un generador, de modo que
+#se pueden procesar poblaciones de 10^7 muestras o más sin guardarlas todas
+#en memoria. Cada lote usa su propio flujo de números aleatorios derivado de
+#la semilla, así que los resultados son reproducibles.
+
+import numpy as np
+import investigando_en_fisica as ief
+
+#Número de muestras por lote
+LOTE = 2**16
+
+###############################################################################
+#Distribuciones
+
+#Cada distribución es una función dist(rng, N) que entrega un array con N
+#muestras usando el generador de numpy rng. Donde se pide una distribución
+#también se puede dar un número, que se usa como valor fijo.
+
+#Distribución uniforme
+def uniforme(a, b):
+    '''
+    Entrega una distribución uniforme en [a, b].
+    '''
+
+    def dist(rng, N):
+        return rng.uniform(a, b, N)
+
+    return dist
+
+#Distribución uniforme en el logaritmo
+def log_uniforme(a, b):
+    '''
+    Entrega una distribución uniforme en log10 entre a y b (a y b > 0).
+    '''
+
+    def dist(rng, N):
+        return 10**rng.uniform(np.log10(a), np.log10(b), N)
+
+    return dist
+
+#Distribución de valores discretos
+def discreta(valores, p=None):
+    '''
+    Entrega una distribución que elige entre los valores dados (números o
+    strings) con probabilidades p (por defecto todos con igual probabilidad).
+    Sirve por ejemplo para el tipo de supernova:
+    discreta(['Ia', 'II'], [0.25, 0.75]).
+    '''
+
+    valores = np.asarray(valores)
+
+    def dist(rng, N):
+        return rng.choice(valores, N, p=p)
+
+    return dist
+
+#Distribución de una ley de potencias por tramos
+def ley_de_potencias(bordes, exponentes):
+    '''
+    Entrega una distribución con densidad proporcional a x**(-exponente) en
+    cada tramo [bordes[i], bordes[i+1]], continua en los bordes. Se muestrea
+    invirtiendo la función de distribución acumulada.
+    Depende de:
+
+    bordes: Límites de los tramos (creciente, de largo len(exponentes) + 1)
+    exponentes: Exponente de cada tramo
+    '''
+
+    bordes = np.asarray(bordes, dtype=float)
+    exponentes = np.asarray(exponentes, dtype=float)
+    x0, x1 = bordes[:-1], bordes[1:]
+    uno = 1 - exponentes
+
+    #Constantes para que la densidad sea continua en los bordes
+    k = np.ones(exponentes.size)
+    for i in range(1, exponentes.size):
+        k[i] = k[i-1]*x0[i]**(exponentes[i] - exponentes[i-1])
+
+    #Probabilidad de cada tramo (integral de k*x**(-exponente))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        integral = np.where(uno == 0, k*np.log(x1/x0), k*(x1**uno - x0**uno)/uno)
+    acumulada = np.concatenate([[0], np.cumsum(integral)])/np.sum(integral)
+
+    def dist(rng, N):
+
+        u = rng.uniform(0, 1, N)
+        i = np.minimum(np.searchsorted(acumulada, u, side='right') - 1, exponentes.size - 1)
+
+        #Fracción de la integral del tramo y la inversa de la acumulada
+        f = (u - acumulada[i])/(acumulada[i+1] - acumulada[i])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.where(uno[i] == 0,
+                         x0[i]*(x1[i]/x0[i])**f,
+                         (x0[i]**uno[i] + f*(x1[i]**uno[i] - x0[i]**uno[i]))**(1/uno[i]))
+
+        return x
+
+    return dist
+
+#Función inicial de masa de Kroupa
+def imf_kroupa(M_min=0.1, M_max=100):
+    '''
+    Entrega la función inicial de masa de Kroupa (2001), con exponente 1.3
+    bajo 0.5 masas solares y 2.3 sobre ese valor, entre M_min y M_max (En
+    masas solares). Por defecto son los límites de masa de las fórmulas de
+    la secuencia principal.
+    '''
+
+    bordes = np.unique(np.clip([M_min, 0.5, M_max], M_min, M_max))
+    exponentes = np.where(bordes[:-1] < 0.5, 1.3, 2.3)
+
+    return ley_de_potencias(bordes, exponentes)
+
+#Función inicial de masa de Salpeter
+def imf_salpeter(M_min=0.1, M_max=100):
+    '''
+    Entrega la función inicial de masa de Salpeter (1955), con exponente 2.35
+    entre M_min y M_max (En masas solares).
+    '''
+
+    return ley_de_potencias([M_min, M_max], [2.35])
+
+#Distancias uniformes en volumen
+def distancia_volumen(d_min, d_max):
+    '''
+    Entrega una distribución de distancias (En parsecs) de supernovas
+    distribuidas uniformemente en el volumen de una cáscara esférica entre
+    d_min y d_max (densidad proporcional a d**2).
+    '''
+
+    return ley_de_potencias([d_min, d_max], [-2])
+
+#Distribución normal (barras de error)
+def normal(media, sigma, minimo=-np.inf, maximo=np.inf):
+    '''
+    Entrega una distribución normal con la media y la desviación estándar
+    dadas, truncada a [minimo, maximo] (las muestras fuera del intervalo se
+    vuelven a sortear). Sirve para parámetros medidos con barras de error,
+    por ejemplo normal(10, 2, minimo=0) para una distancia de 10 +- 2 pc.
+    '''
+
+    def dist(rng, N):
+
+        x = rng.normal(media, sigma, N)
+        fuera = (x < minimo) | (x > maximo)
+        while np.any(fuera):
+            x[fuera] = rng.normal(media, sigma, np.count_nonzero(fuera))
+            fuera = (x < minimo) | (x > maximo)
+
+        return x
+
+    return dist
+
+#Distribución log-normal (barras de error en dex)
+def log_normal(media, sigma_dex):
+    '''
+    Entrega una distribución cuyo log10 es normal, centrada en log10(media)
+    y con desviación estándar sigma_dex (En dex). Sirve para parámetros con
+    errores en escala logarítmica, como la metalicidad o la energía de la
+    supernova.
+    '''
+
+    def dist(rng, N):
+        return 10**rng.normal(np.log10(media), sigma_dex, N)
+
+    return dist
+
+def _muestrear(dist, rng, N):
+
+    if callable(dist):
+        return dist(rng, N)
+
+    #Un array de muestras (por ejemplo de una cadena MCMC) se usa tal cual si
+    #tiene N elementos, y si no se remuestrea con reemplazo
+    if np.ndim(dist) > 0:
+        dist = np.ravel(dist)
+        return dist if dist.size == N else rng.choice(dist, N)
+
+    return np.full(N, dist, dtype=None if isinstance(dist, str) else float)
+
+###############################################################################
+#Población
+
+#Flujo de números aleatorios de un lote
+def _rng(semilla, lote):
+    '''
+    Función que entrega el generador de números aleatorios del lote número
+    'lote' de una población con la semilla dada. Cada lote tiene su propio
+    flujo independiente (derivado con SeedSequence), de modo que el lote k
+    es siempre el mismo sin importar cómo se recorran los demás.
+    '''
+
+    return np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=(lote,)))
+
+#Cálculo de un lote de la población
+def muestra(rng, N, M=imf_kroupa(), Z=log_uniforme(0.0001, 0.03), edad=uniforme(0, 1),
+            E=10**51, d=distancia_volumen(1, 100), n=0.1, tipo='Ia', R_p=1, alpha=0.03, **kwargs):
+    '''
+    Función que muestrea N sistemas (estrella, supernova y planeta) con el
+    generador rng y calcula para cada uno los límites de la zona habitable,
+    el radio de equilibrio, si el remanente entra a la zona habitable y la
+    masa atmosférica que pierde un planeta como la Tierra.
+
+    Entrega un diccionario de arrays de largo N con las llaves:
+    M, Z, t (En Gyr), t_MS (En Gyr), E, d, n, tipo, R_p, alpha: Parámetros
+                                                         muestreados
+    R_HZ_int, R_HZ_ext: Límites de la zona habitable (En AU)
+    R_eq: Radio de equilibrio (En AU), nan si no hay raíz dentro de [a, b]
+    alcanza_HZ: True si el remanente entra a la zona habitable, es decir, si
+                R_eq < R_HZ_ext (los vientos no protegen toda la zona)
+    cubre_HZ: True si el remanente cubre toda la zona habitable
+              (R_eq < R_HZ_int)
+    dM_atm: Masa atmosférica que pierde el planeta mientras pasa todo el
+            remanente (En kg)
+
+    Las distribuciones de los parámetros (ver uniforme, log_uniforme,
+    discreta, imf_kroupa, distancia_volumen) o sus valores fijos son:
+
+    M: Masa de la estrella (En Masas solares)
+    Z: Metalicidad de la estrella (adimensional)
+    edad: Edad de la estrella como fracción de t_MS (entre 0 y 1)
+    E: Energía liberada por la supernova (En ergios)
+    d: Distancia a la que ocurre la supernova (En parsecs)
+    n: Número de partículas por centímetro cúbico en el medio
+       interestelar (cm^-3)
+    tipo: Tipo de la supernova ('Ia' o 'II')
+    R_p: Radio del planeta (Radios terrestres)
+    alpha: Coeficiente de arrastre del planeta (adimensional)
+    kwargs: Se pasan a R_eq_batch (a, b, method, xtol, rtol, maxiter)
+    '''
+
+    M = _muestrear(M, rng, N)
+    Z = _muestrear(Z, rng, N)
+    edad = _muestrear(edad, rng, N)
+    E = _muestrear(E, rng, N)
+    d = _muestrear(d, rng, N)
+    n = _muestrear(n, rng, N)
+    tipo = _muestrear(tipo, rng, N)
+    R_p = _muestrear(R_p, rng, N)
+    alpha = _muestrear(alpha, rng, N)
+
+    #Los coeficientes de la metalicidad se calculan una sola vez para todo el
+    #lote y la estrella da t_MS, el radio y la luminosidad a la vez (En Myr)
+    estrella = ief.StarTrack(M, ief.coeficientes(Z))
+    t = edad*estrella.t_MS
+
+    resultado = _evaluar(estrella, t, M, E, d, n, tipo, R_p, alpha, np.inf, **kwargs)
+
+    return dict(M=M, Z=Z, t=t/1000, t_MS=estrella.t_MS/1000, E=E, d=d, n=n, tipo=tipo,
+                R_p=R_p, alpha=alpha, **resultado)
+
+#Cálculo de los sistemas ya muestreados
+def _evaluar(estrella, t, M, E, d, n, tipo, R_p, alpha, t_atm, **kwargs):
+    '''
+    Función que calcula los límites de la zona habitable, el radio de
+    equilibrio, si el remanente entra a la zona habitable (o la cubre) y la
+    masa atmosférica perdida para sistemas ya muestreados, con la estrella
+    dada como StarTrack y su edad t (En Myr). t_atm es el tiempo que lleva
+    pasando el remanente por el planeta (En segundos) para dM_atm.
+    '''
+
+    R, L, _ = estrella.RLT(t)
+    t = t/1000
+
+    R_HZ_int, R_HZ_ext = ief.R_HZ(L, R)
+    R_eq, _ = ief.R_eq_batch(t, M, R, E, d, n, tipo, **kwargs)
+
+    #La presión de los vientos disminuye con la distancia, así que el
+    #remanente entra a la zona habitable si en el límite externo su presión es
+    #mayor que la de los vientos (igual a R_eq < R_HZ_ext, pero sirve también
+    #donde R_eq queda fuera de [a, b])
+    viento = ief.StellarWind(t, M, R)
+    P = ief.P_SNR(E, d, n, tipo)
+    with np.errstate(invalid='ignore'):
+        alcanza_HZ = viento.pressure(R_HZ_ext) < P
+        cubre_HZ = viento.pressure(R_HZ_int) < P
+
+    #Masa perdida mientras pasa el remanente (todo el remanente si
+    #t_atm >= t_cross)
+    dM = ief.dM_atm(t_atm, E, d, R_p, alpha, n, tipo)
+
+    return dict(R_HZ_int=R_HZ_int, R_HZ_ext=R_HZ_ext, R_eq=R_eq,
+                alcanza_HZ=alcanza_HZ, cubre_HZ=cubre_HZ, dM_atm=dM)
+
+#Población por lotes
+def poblacion(N, semilla=None, lote=LOTE, **parametros):
+    '''
+    Generador que entrega la población de N sistemas en lotes de 'lote'
+    muestras (diccionarios como los de la función muestra). Los parámetros
+    son las distribuciones de la función muestra.
+
+    Con la misma semilla (un entero) y el mismo tamaño de lote se obtienen
+    siempre los mismos lotes. Si semilla es None se elige una al azar; la
+    semilla usada queda en la llave 'semilla' de cada lote, junto con el
+    número del lote en 'lote'.
+    '''
+
+    if semilla is None:
+        semilla = np.random.SeedSequence().entropy
+
+    for k, inicio in enumerate(range(0, N, lote)):
+
+        resultado = muestra(_rng(semilla, k), min(lote, N - inicio), **parametros)
+        resultado['semilla'] = semilla
+        resultado['lote'] = k
+
+        yield resultado
+
+#Resumen de una población
+def resumen(lotes):
+    '''
+    Función que recorre los lotes de una población (por ejemplo el generador
+    poblacion(...)) y entrega un diccionario con el número de muestras, la
+    fracción de sistemas en que el remanente entra a la zona habitable y en
+    que la cubre entera, y la media y el máximo de dM_atm (En kg), sin
+    guardar los lotes en memoria. Si no hay muestras, las fracciones, la
+    media y el máximo son nan.
+    '''
+
+    N = alcanza = cubre = 0
+    suma_dM = 0.0
+    max_dM = -np.inf
+
+    for l in lotes:
+        if l['M'].size == 0:
+            continue
+        N += l['M'].size
+        alcanza += np.count_nonzero(l['alcanza_HZ'])
+        cubre += np.count_nonzero(l['cubre_HZ'])
+        suma_dM += np.sum(l['dM_atm'])
+        max_dM = max(max_dM, np.max(l['dM_atm']))
+
+    if N == 0:
+        return dict(N=0, fraccion_alcanza_HZ=np.nan, fraccion_cubre_HZ=np.nan,
+                    dM_atm_media=np.nan, dM_atm_max=np.nan)
+
+    return dict(N=N, fraccion_alcanza_HZ=alcanza/N, fraccion_cubre_HZ=cubre/N,
+                dM_atm_media=suma_dM/N, dM_atm_max=max_dM)
+
+###############################################################################
+#Propagación de incertidumbres de un sistema
+
+#Cuantiles que entrega por defecto incertidumbre (mediana, 1 y 2 sigma)
+CUANTILES = (0.025, 0.16, 0.5, 0.84, 0.975)
+
+#Incertidumbre de los resultados de un sistema observado
+def incertidumbre(M, Z, t, E, d, n=0.1, tipo='Ia', R_p=1, alpha=0.03, t_atm=np.inf,
+                  N=10**5, semilla=None, cuantiles=CUANTILES, **kwargs):
+    '''
+    Función que propaga las incertidumbres de los parámetros de un sistema
+    (estrella, supernova y planeta) a los resultados de R_eqM, R_HZM y
+    dM_atm, evaluando las N muestras de una sola vez (por lotes) en vez de
+    llamar a las funciones escalares N veces.
+
+    Cada parámetro puede ser un número (valor fijo), una distribución (ver
+    normal, log_normal, uniforme, log_uniforme, discreta) o un array de
+    muestras (por ejemplo de una cadena MCMC), que se usa tal cual si tiene
+    N elementos y si no se remuestrea con reemplazo.
+    Depende de:
+
+    M: Masa de la estrella (En Masas solares)
+    Z: Metalicidad de la estrella (adimensional)
+    t: Edad de la estrella (En Gyr)
+    E: Energía liberada por la supernova (En ergios)
+    d: Distancia a la que ocurre la supernova (En parsecs)
+    n: Número de partículas por centímetro cúbico en el medio
+       interestelar (cm^-3)
+    tipo: Tipo de la supernova ('Ia' o 'II')
+    R_p: Radio del planeta (Radios terrestres)
+    alpha: Coeficiente de arrastre del planeta (adimensional)
+    t_atm: Tiempo que lleva pasando el remanente por el planeta para
+           dM_atm (segundos), por defecto todo el remanente
+    N: Número de muestras (al menos 1)
+    semilla: Semilla de los números aleatorios (None para una al azar)
+    cuantiles: Cuantiles que se entregan (entre 0 y 1)
+    kwargs: Se pasan a R_eq_batch (a, b, method, xtol, rtol, maxiter)
+
+    Entrega un diccionario con las llaves:
+    cuantiles: Los cuantiles pedidos
+    R_eq, R_HZ_int, R_HZ_ext, dM_atm: Arrays con los cuantiles de cada
+                                      resultado (En AU y kg), calculados
+                                      con las muestras en que la estrella
+                                      está en la secuencia principal y el
+                                      resultado no es nan
+    P_alcanza_HZ: Probabilidad de que el remanente entre a la zona habitable
+    P_cubre_HZ: Probabilidad de que el remanente cubra toda la zona habitable
+    fraccion_MS: Fracción de las muestras en que la estrella está en la
+                 secuencia principal (las demás no se consideran)
+    N: Número de muestras
+    muestras: Diccionario con las muestras y sus resultados (como en la
+              función muestra), para histogramas o correlaciones
+    '''
+
+    if N < 1:
+        raise ValueError('N debe ser al menos 1')
+
+    rng = np.random.default_rng(semilla)
+    lotes = []
+
+    for inicio in range(0, N, LOTE):
+
+        #Los arrays de muestras de largo N se cortan en el mismo lote
+        k = min(LOTE, N - inicio)
+        corte = lambda x: x[inicio:inicio + k] if np.ndim(x) > 0 and np.size(x) == N else x
+        p = {nombre: _muestrear(corte(x), rng, k) for nombre, x in
+             dict(M=M, Z=Z, t=t, E=E, d=d, n=n, tipo=tipo, R_p=R_p, alpha=alpha, t_atm=t_atm).items()}
+
+        #Las edades fuera de la secuencia principal quedan como nan
+        estrella = ief.StarTrack(p['M'], ief.coeficientes(p['Z']))
+        en_MS = (p['t'] >= 0) & (p['t']*1000 <= estrella.t_MS)
+        edad = np.where(en_MS, p['t']*1000, np.nan)
+
+        resultado = _evaluar(estrella, edad, p['M'], p['E'], p['d'], p['n'], p['tipo'],
+                             p['R_p'], p['alpha'], p['t_atm'], **kwargs)
+        lotes.append(dict(p, en_MS=en_MS, **resultado))
+
+    muestras = {llave: np.concatenate([l[llave] for l in lotes]) for llave in lotes[0]}
+    en_MS = muestras['en_MS']
+    validas = max(np.count_nonzero(en_MS), 1)
+
+    def cuantil(x):
+        x = x[en_MS]
+        x = x[~np.isnan(x)]
+        return np.quantile(x, cuantiles) if x.size else np.full(len(cuantiles), np.nan)
+
+    return dict(cuantiles=np.asarray(cuantiles),
+                R_eq=cuantil(muestras['R_eq']),
+                R_HZ_int=cuantil(muestras['R_HZ_int']),
+                R_HZ_ext=cuantil(muestras['R_HZ_ext']),
+                dM_atm=cuantil(muestras['dM_atm']),
+                P_alcanza_HZ=np.count_nonzero(muestras['alcanza_HZ'] & en_MS)/validas,
+                P_cubre_HZ=np.count_nonzero(muestras['cubre_HZ'] & en_MS)/validas,
+                fraccion_MS=np.mean(en_MS),
+                N=N, muestras=muestras)
@@ -0,0 +1,613 @@
+###############################################################################
+#SERVICIO HTTP (JSON-RPC) QUE AGRUPA LAS CONSULTAS EN LOTES
+###############################################################################
+
+#Servicio local que atiende R_eqM, R_HZM, L_MS y R_MS por HTTP con JSON-RPC
+#2.0, para que los paneles y los programas que consultan un punto a la vez
+#no tengan que importar el módulo (y pagar su tiempo de inicio) cada vez.
+#
+#Las consultas que llegan dentro de una ventana corta de tiempo (VENTANA) se
+#juntan y se calculan de una sola vez con las versiones vectorizadas de las
+#funciones, y las respuestas recientes se guardan en un caché LRU en memoria.
+#El servicio lleva contadores de consultas, aciertos del caché, lotes y
+#latencias, que se leen con GET /estadisticas o con el método 'estadisticas'.
+#
+#Uso:
+#
+#    python servicio.py --puerto 8750
+#
+#    curl -s localhost:8750 -d '{"jsonrpc": "2.0", "id": 1, "method": "R_eqM",
+#                                "params": [1.0, 1.0, 0.02, 1e51, 10]}'
+#
+#    llamar('http://localhost:8750', 'R_HZM', 1.0, 1.0, 0.02)   #desde python
+#
+#Los parámetros se pueden dar como lista (en el orden de la función) o como
+#diccionario, y una petición puede ser una lista de llamadas (batch de
+#JSON-RPC). Los resultados nan (por ejemplo R_eqM sin raíz en [a, b]) se
+#entregan como null.
+
+import argparse
+import collections
+import inspect
+import json
+import math
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import investigando_en_fisica as ief
+
+#Puerto por defecto del servicio
+PUERTO = 8750
+
+#Tiempo (En segundos) que se esperan más consultas antes de calcular un lote
+VENTANA = 0.002
+
+#Número máximo de consultas por lote
+MAXIMO_LOTE = 2**14
+
+#Número máximo de respuestas guardadas en el caché
+TAMANO_CACHE = 10**5
+
+#Número de latencias recientes con las que se calculan los percentiles
+MUESTRAS_LATENCIA = 10**4
+
+#Códigos de error de JSON-RPC
+ERROR_FORMATO = -32700
+ERROR_PETICION = -32600
+ERROR_METODO = -32601
+ERROR_PARAMETROS = -32602
+ERROR_INTERNO = -32603
+
+#Funciones vectorizadas que calculan los lotes. Cada una recibe los
+#parámetros como arrays (los de 'vectoriales') o como valores comunes a todo
+#el lote (los demás, que separan los lotes) y entrega una lista con un
+#resultado por consulta
+def _R_eqM(t, M, Z, E, d, n, tipo, a, b, method):
+
+    #Con method='brentq' R_eqM resuelve con brentq un punto a la vez; el
+    #lote usa el método de intervalo de R_eqM_batch, que da la misma raíz
+    #dentro de su tolerancia
+    metodo = 'analytic' if method == 'analytic' else 'bracket'
+
+    return ief.R_eqM_batch(t, M, Z, E, d, n, tipo, a, b, method=metodo)[0].tolist()
+
+def _R_HZM(t, M, Z):
+
+    R_int, R_ext = ief.R_HZM(t, M, Z)
+
+    return np.stack(np.broadcast_arrays(R_int, R_ext), axis=-1).tolist()
+
+def _L_MS(t, M, Z):
+
+    return np.broadcast_to(ief.L_MS(t, M, Z), np.shape(t)).tolist()
+
+def _R_MS(t, M, Z):
+
+    return np.broadcast_to(ief.R_MS(t, M, Z), np.shape(t)).tolist()
+
+#Métodos del servicio: nombre -> (función del módulo, función del lote,
+#parámetros que se juntan en arrays)
+METODOS = {
+    'R_eqM': ('R_eqM', _R_eqM, ('t', 'M', 'Z', 'E', 'd', 'n', 'tipo')),
+    'R_HZM': ('R_HZM', _R_HZM, ('t', 'M', 'Z')),
+    'L_MS': ('L_MS', _L_MS, ('t', 'M', 'Z')),
+    'R_MS': ('R_MS', _R_MS, ('t', 'M', 'Z')),
+}
+
+#Parámetros de las funciones del módulo que son strings, con los valores que
+#admiten (None si admiten cualquiera). Los demás tienen que ser números
+_STRINGS = {'R_eqM': {'tipo': None, 'method': ('brentq', 'analytic')}}
+
+#Error de una llamada
+class ErrorRPC(Exception):
+    '''
+    Excepción con un código y un mensaje de error de JSON-RPC.
+    '''
+
+    def __init__(self, codigo, mensaje):
+
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.mensaje = mensaje
+
+#Caché LRU en memoria
+class CacheLRU:
+    '''
+    Clase con un caché en memoria que guarda hasta 'tamano' respuestas y
+    borra las usadas hace más tiempo cuando se llena. Se puede usar desde
+    varios hilos a la vez.
+    '''
+
+    def __init__(self, tamano=TAMANO_CACHE):
+
+        self.tamano = tamano
+        self._datos = collections.OrderedDict()
+        self._candado = threading.Lock()
+
+    def leer(self, clave):
+        '''
+        Entrega la tupla (encontrado, valor) de la respuesta guardada con la
+        clave dada, y la marca como recién usada.
+        '''
+
+        with self._candado:
+            if clave not in self._datos:
+                return False, None
+            self._datos.move_to_end(clave)
+            return True, self._datos[clave]
+
+    def escribir(self, clave, valor):
+        '''
+        Guarda una respuesta y borra la usada hace más tiempo si el caché
+        supera su tamaño.
+        '''
+
+        if self.tamano <= 0:
+            return
+
+        with self._candado:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.tamano:
+                self._datos.popitem(last=False)
+
+    def __len__(self):
+
+        return len(self._datos)
+
+#Contadores del servicio
+class Estadisticas:
+    '''
+    Clase con los contadores del servicio: consultas atendidas, aciertos del
+    caché, lotes calculados (y su número de puntos), errores y latencias
+    (tiempo desde que llega cada consulta hasta que tiene su respuesta).
+    '''
+
+    def __init__(self):
+
+        self.inicio = time.time()
+        self.consultas = 0
+        self.aciertos = 0
+        self.errores = 0
+        self.lotes = 0
+        self.puntos = 0
+        self.tiempo_lotes = 0.0
+        self.latencia_total = 0.0
+        self.latencia_max = 0.0
+        self._latencias = collections.deque(maxlen=MUESTRAS_LATENCIA)
+        self._candado = threading.Lock()
+
+    def consulta(self, latencia, acierto=False, error=False):
+        '''
+        Registra una consulta atendida con su latencia (En segundos).
+        '''
+
+        with self._candado:
+            self.consultas += 1
+            self.aciertos += acierto
+            self.errores += error
+            self.latencia_total += latencia
+            self.latencia_max = max(self.latencia_max, latencia)
+            self._latencias.append(latencia)
+
+    def lote(self, puntos, tiempo):
+        '''
+        Registra un lote calculado con su número de puntos y su tiempo de
+        cálculo (En segundos).
+        '''
+
+        with self._candado:
+            self.lotes += 1
+            self.puntos += puntos
+            self.tiempo_lotes += tiempo
+
+    def resumen(self):
+        '''
+        Entrega un diccionario con los contadores, la tasa de consultas por
+        segundo desde el inicio, el tamaño medio de los lotes y la latencia
+        media, máxima y sus percentiles 50, 90 y 99 recientes (En
+        milisegundos).
+        '''
+
+        with self._candado:
+            duracion = time.time() - self.inicio
+            latencias = np.array(self._latencias)
+            p50, p90, p99 = np.percentile(latencias, [50, 90, 99])*1e3 if latencias.size else (None,)*3
+
+            return dict(segundos=duracion, consultas=self.consultas, aciertos_cache=self.aciertos,
+                        errores=self.errores, lotes=self.lotes, puntos_calculados=self.puntos,
+                        consultas_por_segundo=self.consultas/duracion if duracion > 0 else 0.0,
+                        puntos_por_lote=self.puntos/self.lotes if self.lotes else 0.0,
+                        tiempo_lotes_ms=self.tiempo_lotes*1e3,
+                        latencia_media_ms=self.latencia_total/self.consultas*1e3 if self.consultas else None,
+                        latencia_max_ms=self.latencia_max*1e3,
+                        latencia_p50_ms=p50, latencia_p90_ms=p90, latencia_p99_ms=p99)
+
+#Normalización de los parámetros de una consulta
+def _argumentos(metodo, params):
+    '''
+    Función que asocia los parámetros de una consulta (lista o diccionario)
+    a los de la función del módulo (con sus valores por defecto) y entrega
+    la tupla de valores en el orden de la función. Arroja un ErrorRPC con
+    ERROR_PARAMETROS si no calzan con la firma, si un parámetro de _STRINGS
+    no es uno de sus valores admitidos o si otro parámetro no es un número.
+    '''
+
+    nombre, _, vectoriales = METODOS[metodo]
+    firma = inspect.signature(getattr(ief, nombre))
+
+    try:
+        if isinstance(params, dict):
+            argumentos = firma.bind(**params)
+        else:
+            argumentos = firma.bind(*(params or ()))
+    except TypeError as error:
+        raise ErrorRPC(ERROR_PARAMETROS, str(error))
+
+    argumentos.apply_defaults()
+    strings = _STRINGS.get(metodo, {})
+    valores = []
+    for parametro, valor in argumentos.arguments.items():
+        if parametro in strings:
+            if not isinstance(valor, str):
+                raise ErrorRPC(ERROR_PARAMETROS, f"'{parametro}' debe ser un string")
+            if strings[parametro] is not None and valor not in strings[parametro]:
+                opciones = ' o '.join(f"'{v}'" for v in strings[parametro])
+                raise ErrorRPC(ERROR_PARAMETROS, f"'{parametro}' debe ser {opciones}")
+            valores.append(valor)
+        elif isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise ErrorRPC(ERROR_PARAMETROS, f"'{parametro}' debe ser un número")
+        else:
+            #Los números se guardan como float, de modo que 1 y 1.0 sean la
+            #misma consulta en el caché
+            valores.append(float(valor))
+
+    return tuple(valores)
+
+#Agrupador de consultas en lotes
+class Agrupador:
+    '''
+    Clase que junta las consultas que llegan dentro de una ventana de tiempo
+    y las calcula por lotes en un hilo aparte. Cada consulta recibe un
+    Future con su resultado.
+    Depende de:
+
+    ventana: Tiempo (En segundos) que se esperan más consultas después de
+             la primera antes de calcular el lote
+    maximo: Número máximo de consultas por lote
+    cache: Caché LRU de las respuestas (CacheLRU)
+    estadisticas: Contadores del servicio (Estadisticas)
+    '''
+
+    def __init__(self, ventana=VENTANA, maximo=MAXIMO_LOTE, cache=None, estadisticas=None):
+
+        self.ventana = ventana
+        self.maximo = maximo
+        self.cache = CacheLRU() if cache is None else cache
+        self.estadisticas = Estadisticas() if estadisticas is None else estadisticas
+        self._pendientes = []
+        self._condicion = threading.Condition()
+        self._activo = True
+        self._hilo = threading.Thread(target=self._ciclo, daemon=True)
+        self._hilo.start()
+
+    def enviar(self, metodo, params):
+        '''
+        Agrega una consulta y entrega un Future con su resultado. Si la
+        respuesta ya está en el caché, el Future se entrega resuelto.
+        '''
+
+        llegada = time.perf_counter()
+        futuro = Future()
+
+        if metodo not in METODOS:
+            raise ErrorRPC(ERROR_METODO, f"método desconocido '{metodo}'")
+
+        argumentos = _argumentos(metodo, params)
+        encontrado, valor = self.cache.leer((metodo, argumentos))
+        if encontrado:
+            futuro.set_result(valor)
+            self.estadisticas.consulta(time.perf_counter() - llegada, acierto=True)
+            return futuro
+
+        with self._condicion:
+            self._pendientes.append((metodo, argumentos, futuro, llegada))
+            self._condicion.notify()
+
+        return futuro
+
+    def cerrar(self):
+        '''
+        Detiene el hilo que calcula los lotes.
+        '''
+
+        with self._condicion:
+            self._activo = False
+            self._condicion.notify()
+        self._hilo.join()
+
+    def _ciclo(self):
+
+        while True:
+
+            #Espera la primera consulta y luego la ventana, o hasta que se
+            #llene el lote
+            with self._condicion:
+                while self._activo and not self._pendientes:
+                    self._condicion.wait()
+                if not self._activo:
+                    return
+                limite = time.perf_counter() + self.ventana
+                while len(self._pendientes) < self.maximo:
+                    restante = limite - time.perf_counter()
+                    if restante <= 0:
+                        break
+                    self._condicion.wait(restante)
+                lote = self._pendientes[:self.maximo]
+                del self._pendientes[:self.maximo]
+
+            self._calcular(lote)
+
+    def _calcular(self, lote):
+        '''
+        Calcula un lote de consultas: las separa por método y por los
+        parámetros que no se juntan en arrays, calcula cada grupo con una
+        sola llamada vectorizada (las consultas repetidas una sola vez) y
+        entrega los resultados a sus Future.
+        '''
+
+        grupos = collections.defaultdict(lambda: collections.defaultdict(list))
+        for metodo, argumentos, futuro, llegada in lote:
+            _, _, vectoriales = METODOS[metodo]
+            comunes = argumentos[len(vectoriales):]
+            grupos[(metodo, comunes)][argumentos].append((futuro, llegada))
+
+        for (metodo, comunes), consultas in grupos.items():
+
+            inicio = time.perf_counter()
+            puntos = list(consultas)
+            try:
+                resultados = _evaluar(metodo, puntos, comunes)
+            except Exception:
+                #Si el lote falla (por ejemplo por un parámetro inválido), se
+                #calcula cada punto por separado para que solo fallen los que
+                #tienen el problema
+                resultados = []
+                for punto in puntos:
+                    try:
+                        resultados.append(_evaluar(metodo, [punto], comunes)[0])
+                    except Exception as error:
+                        resultados.append(ErrorRPC(ERROR_INTERNO, f'{type(error).__name__}: {error}'))
+
+            self.estadisticas.lote(len(puntos), time.perf_counter() - inicio)
+            fin = time.perf_counter()
+
+            for argumentos, resultado in zip(puntos, resultados):
+                error = isinstance(resultado, ErrorRPC)
+                if not error:
+                    self.cache.escribir((metodo, argumentos), resultado)
+                for futuro, llegada in consultas[argumentos]:
+                    if error:
+                        futuro.set_exception(resultado)
+                    else:
+                        futuro.set_result(resultado)
+                    self.estadisticas.consulta(fin - llegada, error=error)
+
+#Cálculo vectorizado de un grupo de consultas
+def _evaluar(metodo, puntos, comunes):
+    '''
+    Función que calcula con una sola llamada vectorizada las consultas de un
+    mismo método y con los mismos parámetros comunes, y entrega la lista de
+    resultados (listos para JSON) en el orden de 'puntos'.
+    '''
+
+    _, funcion, vectoriales = METODOS[metodo]
+    columnas = list(zip(*puntos))[:len(vectoriales)]
+    arrays = [np.array(c) if isinstance(c[0], str) else np.array(c, dtype=float) for c in columnas]
+
+    with np.errstate(all='ignore'):
+        resultados = funcion(*arrays, *comunes)
+
+    return [_json(r) for r in resultados]
+
+#Valores que se pueden escribir en JSON
+def _json(x):
+    '''
+    Función que cambia los nan e infinitos de un resultado (número o lista)
+    por None, ya que JSON no los admite.
+    '''
+
+    if isinstance(x, list):
+        return [_json(v) for v in x]
+
+    return x if math.isfinite(x) else None
+
+#Servidor HTTP
+class Servicio(ThreadingHTTPServer):
+    '''
+    Servidor HTTP que atiende las llamadas JSON-RPC (POST /) y las
+    estadísticas (GET /estadisticas), con un Agrupador que calcula las
+    consultas por lotes. Se detiene con shutdown() y server_close().
+    Depende de:
+
+    direccion: Tupla (host, puerto). Con puerto 0 se elige uno libre
+               (queda en servicio.server_address)
+    ventana, maximo, tamano_cache: Ver Agrupador y CacheLRU
+    '''
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, direccion=('127.0.0.1', PUERTO), ventana=VENTANA, maximo=MAXIMO_LOTE,
+                 tamano_cache=TAMANO_CACHE):
+
+        super().__init__(direccion, _Manejador)
+        self.estadisticas = Estadisticas()
+        self.cache = CacheLRU(tamano_cache)
+        self.agrupador = Agrupador(ventana, maximo, self.cache, self.estadisticas)
+
+    def atender(self, peticion):
+        '''
+        Entrega la respuesta JSON-RPC (diccionario, lista o None para las
+        notificaciones) de una petición ya leída del JSON.
+        '''
+
+        if isinstance(peticion, list):
+            if not peticion:
+                return _error(None, ERROR_PETICION, 'batch vacío')
+            #Se envían todas las llamadas antes de esperar, así que quedan en
+            #el mismo lote
+            pendientes = [self._enviar(p) for p in peticion]
+            respuestas = [self._respuesta(p, f) for p, f in zip(peticion, pendientes)]
+            respuestas = [r for r in respuestas if r is not None]
+            return respuestas or None
+
+        return self._respuesta(peticion, self._enviar(peticion))
+
+    def _enviar(self, peticion):
+
+        if not isinstance(peticion, dict) or peticion.get('jsonrpc') != '2.0' or not isinstance(peticion.get('method'), str):
+            return ErrorRPC(ERROR_PETICION, 'petición inválida')
+
+        if peticion['method'] == 'estadisticas':
+            futuro = Future()
+            futuro.set_result(self.estadisticas_completas())
+            return futuro
+
+        try:
+            return self.agrupador.enviar(peticion['method'], peticion.get('params'))
+        except ErrorRPC as error:
+            return error
+
+    def _respuesta(self, peticion, futuro):
+
+        id_ = peticion.get('id') if isinstance(peticion, dict) else None
+        notificacion = isinstance(peticion, dict) and 'id' not in peticion
+
+        if isinstance(futuro, ErrorRPC):
+            respuesta = _error(id_, futuro.codigo, futuro.mensaje)
+        else:
+            try:
+                respuesta = dict(jsonrpc='2.0', id=id_, result=futuro.result())
+            except ErrorRPC as error:
+                respuesta = _error(id_, error.codigo, error.mensaje)
+
+        return None if notificacion else respuesta
+
+    def estadisticas_completas(self):
+        '''
+        Entrega el resumen de las estadísticas junto con el tamaño del caché
+        y la configuración del agrupador.
+        '''
+
+        return dict(self.estadisticas.resumen(), entradas_cache=len(self.cache),
+                    tamano_cache=self.cache.tamano, ventana_ms=self.agrupador.ventana*1e3,
+                    maximo_lote=self.agrupador.maximo)
+
+    def server_close(self):
+
+        super().server_close()
+        self.agrupador.cerrar()
+
+def _error(id_, codigo, mensaje):
+
+    return dict(jsonrpc='2.0', id=id_, error=dict(code=codigo, message=mensaje))
+
+#Manejador de las peticiones HTTP
+class _Manejador(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    #Sin el algoritmo de Nagle, que con las respuestas cortas de una conexión
+    #persistente agrega unos 40 ms de latencia por consulta
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+
+        try:
+            largo = int(self.headers.get('Content-Length', 0))
+            peticion = json.loads(self.rfile.read(largo))
+        except ValueError as error:
+            return self._enviar(200, _error(None, ERROR_FORMATO, f'JSON inválido: {error}'))
+
+        respuesta = self.server.atender(peticion)
+        if respuesta is None:
+            self.send_response(204)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        else:
+            self._enviar(200, respuesta)
+
+    def do_GET(self):
+
+        if self.path.rstrip('/') == '/estadisticas':
+            self._enviar(200, self.server.estadisticas_completas())
+        else:
+            self._enviar(404, dict(error='use POST / (JSON-RPC) o GET /estadisticas'))
+
+    def _enviar(self, codigo, datos):
+
+        cuerpo = json.dumps(datos).encode()
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, formato, *args):
+
+        #Sin una línea por consulta (las estadísticas están en /estadisticas)
+        pass
+
+#Cliente
+def llamar(url, metodo, *params, **kwparams):
+    '''
+    Función que llama un método del servicio en la url dada (por ejemplo
+    'http://localhost:8750') y entrega su resultado. Los parámetros se dan
+    igual que a la función del módulo (en orden o por nombre). Lanza
+    ErrorRPC si el servicio entrega un error.
+    '''
+
+    cuerpo = json.dumps(dict(jsonrpc='2.0', id=1, method=metodo, params=kwparams or list(params))).encode()
+    peticion = urllib.request.Request(url, cuerpo, {'Content-Type': 'application/json'})
+
+    with urllib.request.urlopen(peticion) as respuesta:
+        datos = json.loads(respuesta.read())
+
+    if 'error' in datos:
+        raise ErrorRPC(datos['error']['code'], datos['error']['message'])
+
+    return datos['result']
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Servicio JSON-RPC de R_eqM, R_HZM, L_MS y R_MS')
+    parser.add_argument('--host', default='127.0.0.1', help='dirección (por defecto %(default)s)')
+    parser.add_argument('--puerto', type=int, default=PUERTO, help='puerto (por defecto %(default)s)')
+    parser.add_argument('--ventana', type=float, default=VENTANA*1e3,
+                        help='ventana de agrupación en milisegundos (por defecto %(default)s)')
+    parser.add_argument('--maximo-lote', type=int, default=MAXIMO_LOTE,
+                        help='consultas máximas por lote (por defecto %(default)s)')
+    parser.add_argument('--cache', type=int, default=TAMANO_CACHE,
+                        help='respuestas guardadas en el caché LRU (por defecto %(default)s)')
+    args = parser.parse_args(argv)
+
+    servicio = Servicio((args.host, args.puerto), args.ventana/1e3, args.maximo_lote, args.cache)
+    host, puerto = servicio.server_address[:2]
+    print(f'Atendiendo en http://{host}:{puerto}', flush=True)
+
+    try:
+        servicio.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.server_close()
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,564 @@
+###############################################################################
+#TABLAS PRECALCULADAS E INTERPOLACIÓN
+###############################################################################
+
+#Tablas de funciones calculadas de antemano sobre una grilla de parámetros,
+#que después se consultan interpolando. Sirven para cuando una misma función
+#se evalúa muchísimas veces: se paga el costo de calcular la grilla una vez
+#(y se puede guardar en un archivo) y cada consulta cuesta solo unas pocas
+#operaciones con arrays.
+
+import functools
+import itertools
+import struct
+import zipfile
+import numpy as np
+import investigando_en_fisica as ief
+
+#Esquinas de una celda de N dimensiones (2**N filas de N booleanos)
+@functools.lru_cache(maxsize=None)
+def _esquinas(N):
+
+    return np.array(list(itertools.product((0, 1), repeat=N)), dtype=bool)
+
+#Interpolación multilineal
+def _interpolar(ejes, valores, puntos):
+    '''
+    Función que interpola linealmente en N dimensiones los valores de una
+    grilla. Entrega un array con la forma de los puntos (broadcasting) más
+    los ejes iniciales de valores que no son de la grilla. Los puntos fuera
+    de la grilla dan nan.
+    Depende de:
+
+    ejes: Lista con los N ejes de la grilla (arrays crecientes)
+    valores: Array contiguo cuyos últimos N ejes son los de la grilla
+    puntos: Lista con las N coordenadas de los puntos (arrays)
+    '''
+
+    puntos = np.broadcast_arrays(*puntos)
+    forma = puntos[0].shape
+    N = len(ejes)
+    extra = valores.shape[:-N]
+
+    #Paso de cada eje de la grilla en el array aplanado
+    pasos = [valores.strides[k - N]//valores.itemsize for k in range(N)]
+
+    #Índice de la celda y posición dentro de ella en cada eje, y el índice
+    #(en la grilla aplanada) de la esquina inferior de la celda
+    base = 0
+    pesos = []
+    fuera = False
+    for eje, x, paso in zip(ejes, puntos, pasos):
+        x = np.ravel(x)
+        i = np.minimum(np.maximum(np.searchsorted(eje, x, side='right') - 1, 0), eje.size - 2)
+        pesos.append((x - eje[i])/(eje[i+1] - eje[i]))
+        fuera = fuera | ~((eje[0] <= x) & (x <= eje[-1]))
+        base = base + i*paso
+
+    #Las 2**N esquinas de la celda: su desplazamiento en la grilla aplanada y
+    #su peso (producto de w o 1 - w en cada eje)
+    esquinas = _esquinas(N)
+    desplazamientos = esquinas @ np.array(pasos)
+    w = np.stack(pesos, axis=-1)[:, None, :]
+    w = np.where(esquinas, w, 1 - w).prod(axis=-1)
+
+    planos = valores.reshape(extra + (-1,))
+    resultado = (planos[..., base[:, None] + desplazamientos]*w).sum(axis=-1)
+    resultado[..., fuera] = np.nan
+
+    return resultado.reshape(extra + forma)
+
+#Tabla de distancias críticas
+class TablaDcrit:
+    '''
+    Clase con una tabla precalculada de las distancias críticas d_crit (ver
+    investigando_en_fisica.d_crit) sobre una grilla de masa, metalicidad,
+    edad, energía de la supernova y densidad del medio interestelar, para un
+    tipo de supernova. Se crea con TablaDcrit.construir(...) o se carga de un
+    archivo con TablaDcrit.cargar(archivo), y se consulta llamándola igual
+    que d_crit: tabla(t, M, Z, E, n) entrega (d_int, d_ext) en parsecs.
+
+    La interpolación es multilineal en log10(M), log10(Z), t, log10(E) y
+    log10(n), sobre log10(d_crit). Fuera de la grilla entrega nan, y también
+    en las celdas que tocan puntos sin distancia crítica (por ejemplo edades
+    posteriores a t_MS).
+
+    ejes: Diccionario con los ejes M, Z, t (En Gyr), E y n de la grilla
+    tipo: Tipo de supernova de la tabla
+    log_d: Array con log10(d_int) y log10(d_ext) en la grilla, de forma
+           (2, len(M), len(Z), len(t), len(E), len(n))
+    '''
+
+    #Parámetros de la grilla, en el orden de los ejes de log_d
+    PARAMETROS = ('M', 'Z', 't', 'E', 'n')
+
+    #Parámetros que se interpolan en escala logarítmica
+    LOGARITMICOS = ('M', 'Z', 'E', 'n')
+
+    def __init__(self, ejes, tipo, log_d):
+
+        self.ejes = {k: np.asarray(ejes[k], dtype=float) for k in self.PARAMETROS}
+        self.tipo = str(tipo)
+        self.log_d = np.ascontiguousarray(log_d, dtype=float)
+        self._ejes = [self._escala(k, v) for k, v in self.ejes.items()]
+
+        for k, eje in zip(self.PARAMETROS, self._ejes):
+            if eje.ndim != 1 or eje.size < 2 or np.any(np.diff(eje) <= 0):
+                raise ValueError(f'El eje {k} debe ser creciente y tener al menos dos valores')
+
+    def _escala(self, k, v):
+
+        return np.log10(v) if k in self.LOGARITMICOS else np.asarray(v, dtype=float)
+
+    @classmethod
+    def construir(cls, M, Z, t, E, n=0.1, tipo='Ia', **kwargs):
+        '''
+        Calcula la tabla con d_crit sobre la grilla de los ejes M, Z, t (En
+        Gyr), E y n (arrays crecientes). Cualquiera puede ser un número, y
+        entonces la tabla se consulta solo con ese valor. kwargs se pasa a
+        d_crit.
+
+        La precisión depende del espaciado de la grilla: P_SNR cambia de
+        forma donde se activan los límites de masa y rapidez del remanente,
+        y cerca de esos cambios el error es mayor. Conviene compararla con
+        d_crit en puntos al azar antes de usarla.
+        '''
+
+        ejes = dict(M=M, Z=Z, t=t, E=E, n=n)
+        ejes = {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in ejes.items()}
+
+        #Un eje de un solo valor se duplica (con un ancho mínimo) para poder
+        #interpolar en él
+        for k, v in ejes.items():
+            if v.size == 1:
+                ejes[k] = v + np.array([0, max(abs(v[0]), 1)*1e-12])
+
+        malla = np.meshgrid(*ejes.values(), indexing='ij')
+        p = dict(zip(cls.PARAMETROS, malla))
+        d_int, d_ext = ief.d_crit(p['t'], p['M'], p['Z'], p['E'], p['n'], tipo, **kwargs)
+
+        return cls(ejes, tipo, np.log10([d_int, d_ext]))
+
+    def __call__(self, t, M, Z, E, n=0.1):
+        '''
+        Entrega la tupla (d_int, d_ext) interpolada (En parsecs).
+        '''
+
+        puntos = dict(M=M, Z=Z, t=t, E=E, n=n)
+        puntos = [self._escala(k, np.asarray(puntos[k], dtype=float)) for k in self.PARAMETROS]
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            d = 10**_interpolar(self._ejes, self.log_d, puntos)
+
+        return ief._escalar(d[0]), ief._escalar(d[1])
+
+    def guardar(self, archivo):
+        '''
+        Guarda la tabla en un archivo .npz.
+        '''
+
+        np.savez(archivo, tipo=self.tipo, log_d=self.log_d, **self.ejes)
+
+    @classmethod
+    def cargar(cls, archivo):
+        '''
+        Carga una tabla guardada con guardar.
+        '''
+
+        with np.load(archivo) as datos:
+            ejes = {k: datos[k] for k in cls.PARAMETROS}
+            return cls(ejes, datos['tipo'][()], datos['log_d'])
+
+#Memoria mapeada de una entrada de un .npz sin comprimir
+def _mapear(archivo, nombre):
+    '''
+    Función que abre la entrada 'nombre' del archivo .npz 'archivo' (guardado
+    con np.savez, que no comprime) como memoria mapeada de solo lectura.
+    '''
+
+    with zipfile.ZipFile(archivo) as z:
+        info = z.getinfo(nombre)
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f'la entrada {nombre} de {archivo} está comprimida')
+
+    with open(archivo, 'rb') as f:
+        #Encabezado local de la entrada en el zip (30 bytes más el nombre y
+        #el campo extra) y después el encabezado del .npy
+        f.seek(info.header_offset)
+        largo_nombre, largo_extra = struct.unpack('<HH', f.read(30)[26:])
+        f.seek(info.header_offset + 30 + largo_nombre + largo_extra)
+        version = np.lib.format.read_magic(f)
+        leer = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        forma, fortran, dtype = leer(f)
+        inicio = f.tell()
+
+    return np.memmap(archivo, dtype, 'r', inicio, forma, 'F' if fortran else 'C')
+
+#Emulador de la secuencia principal
+class EmuladorMS:
+    '''
+    Clase que emula R_MS, L_MS, T_eff y t_MS con tablas precalculadas sobre
+    una grilla de M, Z y tau = t/t_MS, interpoladas con splines cúbicos
+    (B-splines de scipy.ndimage). Sirve para barridos que no necesitan los
+    valores exactos de las fórmulas de ajuste.
+
+    La grilla es regular en log10(M), log10(Z) y u = 1 - (1 - tau)**0.5, de
+    modo que los puntos en tau se juntan cerca del final de la secuencia
+    principal, donde los términos tau**10, tau**40 y tau**eta cambian más
+    rápido.
+
+    Se crea con EmuladorMS.construir(...), que además estima el error
+    relativo máximo del emulador respecto a las funciones exactas en cada
+    celda de masa de la grilla ('error_celda') y en toda la grilla
+    ('error_max'). Las fórmulas de ajuste tienen cambios bruscos (en las
+    masas límite M_hook, a17, M_x, a42, a66, a67 y a68, que dependen de Z, y
+    en Z = 0.0009 para eta) que no pueden quedar en los nodos de una grilla
+    regular, y cerca de ellos el error es mucho mayor que en el resto de la
+    grilla, así que el error se busca en los centros de todas las celdas, en
+    puntos al azar, en puntos al azar a menos de una celda de esos cambios y
+    alrededor de los peores puntos encontrados, en varias rondas (ver
+    _error_max). Es el máximo de una muestra de validación, no una cota
+    demostrada. Con 'tolerancia' el emulador no entrega (entrega nan) las
+    cantidades en las celdas de masa donde el error muestreado de esa
+    cantidad es mayor que la tolerancia, de modo que lo que entrega tiene
+    a lo más ese error en la muestra.
+
+    Con guardar(archivo) las tablas quedan en un archivo .npz (sin
+    comprimir) que EmuladorMS.cargar(archivo) abre como memoria mapeada, de
+    modo que muchos procesos comparten una sola copia y no hay que calcular
+    nada al empezar.
+
+    Fuera de la grilla (o para tau > 1) el emulador entrega nan.
+
+    ejes: Diccionario con los límites (mínimo, máximo, número de puntos) de
+          M (En masas solares), Z y tau
+    coeficientes: Array de forma (4, num_M, num_Z, num_tau) con los
+                  coeficientes de los splines de log10(R), log10(L),
+                  log10(T_eff) y log10(t_MS) (t_MS no depende de tau, se
+                  repite en ese eje)
+    error_celda: Array de forma (4, num_M - 1) con el error relativo máximo
+                 muestreado de R, L, T_eff y t_MS en cada celda de masa (en
+                 todos los Z y tau), o None si no se midió
+    tolerancia: Error relativo máximo aceptado (None para entregar todo)
+
+    El atributo error_max es un diccionario con el error relativo máximo
+    muestreado de R, L, T_eff y t_MS en toda la grilla (None si no se midió).
+    '''
+
+    #Cantidades de la tabla, en el orden del primer eje de coeficientes
+    CANTIDADES = ('R', 'L', 'T_eff', 't_MS')
+
+    #Parámetros de la grilla
+    PARAMETROS = ('M', 'Z', 'tau')
+
+    def __init__(self, ejes, coeficientes, error_celda=None, tolerancia=None):
+
+        self.ejes = {k: tuple(ejes[k]) for k in self.PARAMETROS}
+        self.coeficientes = coeficientes
+        self.error_celda = None if error_celda is None else np.asarray(error_celda)
+        self.tolerancia = tolerancia
+
+    @property
+    def error_max(self):
+
+        if self.error_celda is None:
+            return None
+
+        return {k: float(np.max(e)) for k, e in zip(self.CANTIDADES, self.error_celda)}
+
+    @property
+    def tolerancia(self):
+
+        return self._tolerancia
+
+    @tolerancia.setter
+    def tolerancia(self, tolerancia):
+
+        if tolerancia is not None and self.error_celda is None:
+            raise ValueError('el emulador no tiene el error medido, no se puede usar una tolerancia')
+        self._tolerancia = tolerancia
+
+    @classmethod
+    def construir(cls, M=(0.1, 100, 513), Z=(0.0001, 0.03, 65), tau=(0, 1, 129), tolerancia=None):
+        '''
+        Calcula las tablas del emulador y su error. Cada eje se da como
+        (mínimo, máximo, número de puntos). Por defecto cubre los límites de
+        masa y metalicidad de las fórmulas de ajuste.
+        '''
+
+        from scipy import ndimage
+
+        ejes = dict(M=M, Z=Z, tau=tau)
+        nodos = [cls._nodos(k, ejes[k]) for k in cls.PARAMETROS]
+
+        valores = cls._exactos(*np.meshgrid(*nodos, indexing='ij'))
+        coeficientes = np.stack([ndimage.spline_filter(np.log10(v), order=3, mode='mirror') for v in valores])
+
+        emulador = cls(ejes, coeficientes)
+        emulador.error_celda = emulador._error_max()
+        emulador.tolerancia = tolerancia
+
+        return emulador
+
+    @staticmethod
+    def _uniforme(k, x):
+        '''
+        Entrega la coordenada en la que la grilla del parámetro k es regular.
+        '''
+
+        if k == 'tau':
+            return 1 - np.sqrt(1 - x)
+
+        return np.log10(x)
+
+    @staticmethod
+    def _inversa(k, u):
+
+        if k == 'tau':
+            return 1 - (1 - u)**2
+
+        return 10**u
+
+    @classmethod
+    def _nodos(cls, k, eje, centros=False):
+        '''
+        Entrega los nodos de la grilla del parámetro k (o los centros de las
+        celdas si centros=True).
+        '''
+
+        minimo, maximo, num = eje
+        u = np.linspace(cls._uniforme(k, minimo), cls._uniforme(k, maximo), int(num))
+        if centros:
+            u = (u[1:] + u[:-1])/2
+
+        return cls._inversa(k, u)
+
+    def _aleatorios(self, rng, N, centro=None, ancho=None):
+        '''
+        Entrega N puntos (M, Z, tau) al azar dentro de la grilla, uniformes
+        en las coordenadas en que la grilla es regular. Con centro (lista de
+        arrays con esas coordenadas) y ancho (en celdas), los puntos quedan
+        a lo más a 'ancho' celdas de los centros dados.
+        '''
+
+        puntos = []
+        for j, k in enumerate(self.PARAMETROS):
+            minimo, maximo, num = self.ejes[k]
+            u0, u1 = self._uniforme(k, minimo), self._uniforme(k, maximo)
+            if centro is None:
+                u = rng.uniform(u0, u1, N)
+            else:
+                h = ancho*(u1 - u0)/(num - 1)
+                u = centro[j] + rng.uniform(-h, h, np.shape(centro[j]))
+            puntos.append(self._inversa(k, np.clip(u, u0, u1)))
+
+        return puntos
+
+    @staticmethod
+    def _exactos(M, Z, tau):
+        '''
+        Entrega (R, L, T_eff, t_MS) exactos en los puntos (M, Z, tau).
+        '''
+
+        estrella = ief.StarTrack(M, Z)
+        R, L, T = estrella.RLT(tau*estrella.t_MS)
+
+        return R, L, T, np.broadcast_to(estrella.t_MS, R.shape)
+
+    #Masas límite de las funciones seccionadas (atributos de los coeficientes
+    #de la metalicidad), donde las fórmulas de ajuste cambian bruscamente
+    LIMITES_MASA = ('M_hook', 'a17', 'M_x', 'a42', 'a66', 'a67', 'a68')
+
+    def _error_max(self, muestras=2*10**5, rondas=4, peores=1000, semilla=0):
+        '''
+        Calcula el error relativo máximo de cada cantidad respecto a las
+        funciones exactas en cada celda de masa, como un array de forma
+        (4, num_M - 1) (ver error_celda). Se evalúa en:
+
+        - Los centros de todas las celdas de la grilla
+        - 'muestras' puntos al azar en toda la grilla
+        - 'muestras' puntos al azar a menos de una celda de las masas límite
+          (LIMITES_MASA, que dependen de Z) y de Z = 0.0009
+        - En cada una de las 'rondas' siguientes, 'muestras' puntos al azar a
+          menos de media celda de los 'peores' puntos encontrados hasta ahí
+          y otros 'muestras' repartidos entre los peores puntos de cada
+          celda de masa (de cada cantidad)
+        '''
+
+        rng = np.random.default_rng(semilla)
+        (M0, M1, num_M), (Z0, Z1, _), _ = [self.ejes[k] for k in self.PARAMETROS]
+        maximo = np.zeros((len(self.CANTIDADES), int(num_M) - 1))
+        candidatos = [[] for _ in self.CANTIDADES]
+        #Peor punto de cada celda de masa, de cada cantidad
+        peor = np.zeros((len(self.CANTIDADES), 3, int(num_M) - 1))
+
+        def medir(puntos):
+            puntos = [np.ravel(x) for x in np.broadcast_arrays(*puntos)]
+            with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+                errores = [np.abs(e/x - 1) for e, x in zip(self._evaluar(*puntos, tolerancia=False),
+                                                           self._exactos(*puntos))]
+            celda = self._celda_M(puntos[0])
+            for q, error in enumerate(errores):
+                error = np.where(np.isnan(error), -1.0, error)
+                #El último punto de cada celda ordenando por celda y error es
+                #el peor de la celda
+                orden = np.lexsort((error, celda))
+                ultimos = orden[np.r_[celda[orden][1:] != celda[orden][:-1], True]]
+                mejora = error[ultimos] > maximo[q, celda[ultimos]]
+                i = ultimos[mejora]
+                maximo[q, celda[i]] = error[i]
+                peor[q][:, celda[i]] = [x[i] for x in puntos]
+                orden = np.argsort(error)[-peores:]
+                candidatos[q].append((error[orden], [x[orden] for x in puntos]))
+
+        medir(np.meshgrid(*[self._nodos(k, self.ejes[k], centros=True) for k in self.PARAMETROS], indexing='ij'))
+        medir(self._aleatorios(rng, muestras))
+
+        #Cerca de los cambios bruscos: la masa límite (o Z = 0.0009) más un
+        #desplazamiento de hasta una celda
+        M, Z, tau = self._aleatorios(rng, muestras)
+        c = ief.coeficientes(Z)
+        limite = np.choose(rng.integers(len(self.LIMITES_MASA), size=muestras),
+                           [np.broadcast_to(getattr(c, a), Z.shape) for a in self.LIMITES_MASA])
+        u = [self._uniforme('M', np.clip(limite, M0, M1)), self._uniforme('Z', Z), self._uniforme('tau', tau)]
+        medir(self._aleatorios(rng, muestras, u, 1))
+        if Z0 < 0.0009 < Z1:
+            u = [self._uniforme('M', M), np.full(muestras, self._uniforme('Z', 0.0009)), self._uniforme('tau', tau)]
+            medir(self._aleatorios(rng, muestras, u, 1))
+
+        #Rondas alrededor de los peores puntos de cada cantidad
+        for _ in range(rondas):
+            for q in range(len(self.CANTIDADES)):
+                error = np.concatenate([e for e, _ in candidatos[q]])
+                puntos = [np.concatenate([p[j] for _, p in candidatos[q]]) for j in range(3)]
+                orden = np.argsort(error)[-peores:]
+                elegidos = rng.choice(orden, muestras)
+                u = [self._uniforme(k, puntos[j][elegidos]) for j, k in enumerate(self.PARAMETROS)]
+                candidatos[q] = [(error[orden], [x[orden] for x in puntos])]
+                medir(self._aleatorios(rng, muestras, u, 0.5))
+                celdas = rng.integers(peor.shape[2], size=muestras)
+                u = [self._uniforme(k, peor[q][j][celdas]) for j, k in enumerate(self.PARAMETROS)]
+                medir(self._aleatorios(rng, muestras, u, 0.5))
+
+        return maximo
+
+    def _celda_M(self, M):
+        '''
+        Entrega el índice de la celda de masa de la grilla de cada masa M.
+        '''
+
+        minimo, maximo, num = self.ejes['M']
+        u0, u1 = self._uniforme('M', minimo), self._uniforme('M', maximo)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            i = np.floor((self._uniforme('M', M) - u0)*((num - 1)/(u1 - u0)))
+
+        return np.clip(np.nan_to_num(i), 0, num - 2).astype(int)
+
+    def _evaluar(self, M, Z, tau, cantidades=CANTIDADES, tolerancia=True):
+        '''
+        Entrega una lista con las cantidades pedidas interpoladas en los
+        puntos (M, Z, tau). Con tolerancia=True las cantidades de las celdas
+        de masa con error mayor que self.tolerancia quedan como nan.
+        '''
+
+        from scipy import ndimage
+
+        M, Z, tau = np.broadcast_arrays(M, Z, tau)
+        forma = M.shape
+
+        #Coordenadas de los puntos en índices de la grilla
+        coordenadas = []
+        fuera = np.zeros(M.size, dtype=bool)
+        for k, x in zip(self.PARAMETROS, (M, Z, tau)):
+            minimo, maximo, num = self.ejes[k]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                fuera |= ~((minimo <= np.ravel(x)) & (np.ravel(x) <= maximo))
+                x = self._uniforme(k, np.ravel(x))
+            minimo, maximo = self._uniforme(k, minimo), self._uniforme(k, maximo)
+            coordenadas.append((x - minimo)*((num - 1)/(maximo - minimo)))
+
+        coordenadas = np.nan_to_num(np.array(coordenadas))
+
+        resultado = []
+        for c in cantidades:
+            i = self.CANTIDADES.index(c)
+            v = 10**ndimage.map_coordinates(self.coeficientes[i], coordenadas, order=3, mode='mirror', prefilter=False)
+            v[fuera] = np.nan
+            if tolerancia and self.tolerancia is not None:
+                v[self.error_celda[i][self._celda_M(np.ravel(M))] > self.tolerancia] = np.nan
+            resultado.append(ief._escalar(v.reshape(forma)))
+
+        return resultado
+
+    def t_MS(self, M, Z):
+        '''
+        Entrega el tiempo de vida en la secuencia principal (En Myr).
+        '''
+
+        return self._evaluar(M, Z, 0.0, ('t_MS',))[0]
+
+    def RLT_tau(self, tau, M, Z):
+        '''
+        Entrega la tupla (R, L, T_eff) (En radios solares, luminosidades
+        solares y Kelvin) en la fracción tau = t/t_MS de la secuencia
+        principal.
+        '''
+
+        return tuple(self._evaluar(M, Z, tau, ('R', 'L', 'T_eff')))
+
+    def RLT(self, t, M, Z):
+        '''
+        Entrega la tupla (R, L, T_eff) a la edad t (En Myr), como R_MS,
+        L_MS y T_eff.
+        '''
+
+        return self.RLT_tau(np.divide(t, self.t_MS(M, Z)), M, Z)
+
+    def R(self, t, M, Z):
+        '''
+        Emula R_MS(t, M, Z) (t en Myr, radio en radios solares).
+        '''
+
+        return self.RLT(t, M, Z)[0]
+
+    def L(self, t, M, Z):
+        '''
+        Emula L_MS(t, M, Z) (t en Myr, luminosidad en luminosidades
+        solares).
+        '''
+
+        return self.RLT(t, M, Z)[1]
+
+    def T_eff(self, t, M, Z):
+        '''
+        Emula T_eff(L_MS(t, M, Z), R_MS(t, M, Z)) (t en Myr, temperatura
+        en Kelvin).
+        '''
+
+        return self.RLT(t, M, Z)[2]
+
+    def guardar(self, archivo):
+        '''
+        Guarda el emulador en el archivo .npz 'archivo', con los ejes y los
+        errores de cada celda de masa en entradas separadas de los
+        coeficientes (la tolerancia no se guarda, se elige al cargarlo).
+        '''
+
+        ejes = np.array([self.ejes[k] for k in self.PARAMETROS], dtype=float)
+        errores = np.full((len(self.CANTIDADES), self.ejes['M'][2] - 1), np.nan) if self.error_celda is None else self.error_celda
+        np.savez(archivo, ejes=ejes, error_celda=errores, coeficientes=self.coeficientes)
+
+    @classmethod
+    def cargar(cls, archivo, mmap=True, tolerancia=None):
+        '''
+        Carga un emulador guardado con guardar, con la tolerancia dada. Con
+        mmap=True (por defecto) los coeficientes se abren como memoria
+        mapeada (de solo lectura) en vez de leerlos completos.
+        '''
+
+        with np.load(archivo) as datos:
+            ejes = {k: (float(m), float(M), int(n)) for k, (m, M, n) in zip(cls.PARAMETROS, datos['ejes'])}
+            errores = datos['error_celda']
+            coeficientes = _mapear(archivo, 'coeficientes.npy') if mmap else datos['coeficientes']
+
+        return cls(ejes, coeficientes, None if np.isnan(errores).all() else errores, tolerancia)